@@ -0,0 +1,289 @@
+"""
+A local stand-in for the Google Sheets API, serving fixture spreadsheets over HTTP so the real googleapiclient
+transport can be used offline, i.e. to benchmark the fetching of the sheets deterministically.
+
+It serves the discovery document of the API, `spreadsheets.get` with the grid properties of the worksheets, and
+`spreadsheets.values.get`/`batchGet`. Every response can be delayed, and every nth request can be throttled with a
+429, like the API does when the quota is exceeded.
+
+Run it from the generator folder, i.e. `python -m benchmark.fake_sheets_server --keys 10000 --locales 30`, and point
+the generator at it with `--api-endpoint http://127.0.0.1:8080`.
+"""
+import argparse
+import gzip
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from benchmark.fake_spreadsheets import FakeSpreadsheets, Spreadsheets
+from benchmark.synthetic import SheetShape, generate_sheets
+from localisation import KEYS_VALUE, PLURAL_KEYS_VALUE
+
+SPREADSHEET_PATH = re.compile(r"^/v4/spreadsheets/(?P<id>[^/]+)$")
+VALUES_PATH = re.compile(r"^/v4/spreadsheets/(?P<id>[^/]+)/values/(?P<range>.+)$")
+BATCH_GET_PATH = re.compile(r"^/v4/spreadsheets/(?P<id>[^/]+)/values:batchGet$")
+DISCOVERY_PATH = "/$discovery/rest"
+
+
+class FakeSheetsServer:
+    """
+    Serves the given spreadsheets on a background thread, on a random free port unless one is given.
+    Use it as a context manager, or call `start` and `stop`.
+    """
+
+    def __init__(self,
+                 spreadsheets: Spreadsheets,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.0,
+                 throttle_every: int = 0,
+                 retry_after: float = 0.0,
+                 extra_rows: int = 0,
+                 extra_columns: int = 0):
+        """
+        :param latency: Seconds every API response is delayed by
+        :param throttle_every: Answers every nth API request with a 429 instead, if it's greater than 0
+        :param retry_after: The `Retry-After` seconds of the throttled responses
+        :param extra_rows: Rows without values in the grid of every worksheet, like a real spreadsheet has
+        :param extra_columns: Columns without values in the grid of every worksheet
+        """
+        self.spreadsheets = FakeSpreadsheets(spreadsheets, extra_rows=extra_rows, extra_columns=extra_columns)
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        # The path of every API request received, including the throttled ones
+        self.requests: List[str] = []
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.__server.daemon_threads = True
+        self.__server.fake = self
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """
+        The root URL of the API, i.e. http://127.0.0.1:8080
+        """
+        host, port = self.__server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self) -> "FakeSheetsServer":
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self) -> "FakeSheetsServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def serve_forever(self):
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+
+    def _record(self, path: str) -> bool:
+        """
+        Records an API request.
+        :return: True if the request is throttled
+        """
+        with self.__lock:
+            self.requests.append(path)
+            throttled = self.throttle_every > 0 and len(self.requests) % self.throttle_every == 0
+            if throttled:
+                self.throttled += 1
+            return throttled
+
+    def _add_bytes_sent(self, count: int):
+        with self.__lock:
+            self.bytes_sent += count
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # Keeps the connections open between requests, like the API
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        fake: FakeSheetsServer = self.server.fake
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == DISCOVERY_PATH:
+            self.__send_json(200, discovery_document("http://{}".format(self.headers.get("Host"))))
+            return
+
+        if fake.latency > 0:
+            sleep(fake.latency)
+        if fake._record(self.path):
+            self.__send_json(429, _error(429, "Quota exceeded", "RESOURCE_EXHAUSTED"),
+                             headers={"Retry-After": "{:g}".format(fake.retry_after)})
+            return
+
+        major_dimension = query.get("majorDimension", ["ROWS"])[0]
+        try:
+            match = SPREADSHEET_PATH.match(url.path)
+            if match:
+                self.__send_json(200, fake.spreadsheets.metadata(unquote(match.group("id"))))
+                return
+
+            match = BATCH_GET_PATH.match(url.path)
+            if match:
+                spreadsheet_id = unquote(match.group("id"))
+                value_ranges = [fake.spreadsheets.value_range(spreadsheet_id, range, major_dimension)
+                                for range in query.get("ranges", [])]
+                self.__send_json(200, {"spreadsheetId": spreadsheet_id, "valueRanges": value_ranges})
+                return
+
+            match = VALUES_PATH.match(url.path)
+            if match:
+                self.__send_json(200, fake.spreadsheets.value_range(unquote(match.group("id")),
+                                                                    unquote(match.group("range")), major_dimension))
+                return
+        except KeyError as error:
+            self.__send_json(404, _error(404, "Requested entity was not found: {}".format(error), "NOT_FOUND"))
+            return
+        except ValueError as error:
+            self.__send_json(400, _error(400, str(error), "INVALID_ARGUMENT"))
+            return
+
+        self.__send_json(404, _error(404, "Unknown path {}".format(url.path), "NOT_FOUND"))
+
+    def __send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        content = json.dumps(body).encode("utf-8")
+        compressed = "gzip" in self.headers.get("Accept-Encoding", "")
+        if compressed:
+            content = gzip.compress(content)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(content)))
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.fake._add_bytes_sent(len(content))
+
+    def log_message(self, format, *args):
+        # Every request would be printed otherwise
+        pass
+
+
+def discovery_document(root_url: str) -> Dict:
+    """
+    A discovery document with only the methods the generator uses, so googleapiclient can build the service
+    without fetching the real one.
+    """
+    def method(id: str, path: str, parameters: Dict, response: str) -> Dict:
+        parameters = dict(parameters, spreadsheetId={"type": "string", "required": True, "location": "path"})
+        return {"id": id, "path": path, "flatPath": path, "httpMethod": "GET", "parameters": parameters,
+                "parameterOrder": [name for name, parameter in parameters.items() if parameter.get("required")],
+                "response": {"$ref": response}}
+
+    major_dimension = {"type": "string", "location": "query", "enum": ["DIMENSION_UNSPECIFIED", "ROWS", "COLUMNS"]}
+    return {
+        "kind": "discovery#restDescription",
+        "discoveryVersion": "v1",
+        "id": "sheets:v4",
+        "name": "sheets",
+        "version": "v4",
+        "protocol": "rest",
+        "rootUrl": root_url + "/",
+        "servicePath": "",
+        "baseUrl": root_url + "/",
+        "batchPath": "batch",
+        "parameters": {
+            "alt": {"type": "string", "location": "query", "default": "json"},
+            "fields": {"type": "string", "location": "query"},
+            "key": {"type": "string", "location": "query"}
+        },
+        "schemas": {name: {"id": name, "type": "object"}
+                    for name in ["Spreadsheet", "ValueRange", "BatchGetValuesResponse"]},
+        "resources": {
+            "spreadsheets": {
+                "methods": {
+                    "get": method("sheets.spreadsheets.get", "v4/spreadsheets/{spreadsheetId}",
+                                  {"ranges": {"type": "string", "location": "query", "repeated": True},
+                                   "includeGridData": {"type": "boolean", "location": "query"}},
+                                  "Spreadsheet")
+                },
+                "resources": {
+                    "values": {
+                        "methods": {
+                            "get": method("sheets.spreadsheets.values.get",
+                                          "v4/spreadsheets/{spreadsheetId}/values/{range}",
+                                          {"range": {"type": "string", "required": True, "location": "path"},
+                                           "majorDimension": major_dimension},
+                                          "ValueRange"),
+                            "batchGet": method("sheets.spreadsheets.values.batchGet",
+                                               "v4/spreadsheets/{spreadsheetId}/values:batchGet",
+                                               {"ranges": {"type": "string", "location": "query", "repeated": True},
+                                                "majorDimension": major_dimension},
+                                               "BatchGetValuesResponse")
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+def synthetic_spreadsheet(shape: SheetShape, sheet_name: str = "Translations",
+                          plurals_sheet_name: str = "Plurals") -> Dict[str, List[List[str]]]:
+    """
+    Returns the worksheets of a synthetic spreadsheet with the given shape, laid out like the real ones: a row with
+    the headers, then a row per key or plural.
+    """
+    localisations, plurals = generate_sheets(shape)
+    return {sheet_name: __rows(localisations, KEYS_VALUE), plurals_sheet_name: __rows(plurals, PLURAL_KEYS_VALUE)}
+
+
+def __rows(columns: Dict[str, List[str]], first_header: str) -> List[List[str]]:
+    headers = [first_header] + [header for header in columns.keys() if header != first_header]
+    return [headers] + [list(row) for row in zip(*[columns[header] for header in headers])]
+
+
+def _error(code: int, message: str, status: str) -> Dict:
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (defaults to 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (defaults to 8080)")
+    parser.add_argument("--fixture",
+                        help="JSON file with the spreadsheets to serve, as {spreadsheet_id: {sheet_name: [[cell]]}}")
+    parser.add_argument("--spreadsheet-id", default="benchmark",
+                        help="Id of the synthetic spreadsheet served if there's no fixture (defaults to benchmark)")
+    parser.add_argument("--keys", type=int, default=1000, help="Number of keys of the synthetic spreadsheet")
+    parser.add_argument("--locales", type=int, default=5, help="Number of locales of the synthetic spreadsheet")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every response is delayed by")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answers every nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds of the 429 responses")
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture, "r") as f:
+            spreadsheets = json.load(f)
+    else:
+        spreadsheets = {args.spreadsheet_id: synthetic_spreadsheet(SheetShape(keys=args.keys, locales=args.locales))}
+
+    server = FakeSheetsServer(spreadsheets, host=args.host, port=args.port, latency=args.latency,
+                              throttle_every=args.throttle_every, retry_after=args.retry_after)
+    print("Serving {} on {}".format(", ".join(spreadsheets.keys()), server.endpoint))
+    server.serve_forever()
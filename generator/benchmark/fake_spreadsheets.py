@@ -0,0 +1,88 @@
+"""
+Fixture spreadsheets answering the Sheets API requests the generator makes, shared by the in-memory service of the
+tests and the local HTTP server of the benchmarks, so both serve the same responses.
+"""
+import re
+from typing import Dict, List
+
+from localisation.googlesheethelper import GoogleSheetHelper
+
+# {spreadsheet_id: {sheet_name: [row, row, ...]}}, where each row is a list of strings
+Spreadsheets = Dict[str, Dict[str, List[List[str]]]]
+
+A1_RANGE_PATTERN = re.compile(r"^'?(?P<sheet>.+?)'?!(?P<start>[A-Z]*)(?P<start_row>\d*)(:(?P<end>[A-Z]*)(?P<end_row>\d*))?$")
+
+
+class FakeSpreadsheets:
+    """
+    Serves the grid properties and the values of the given spreadsheets like the API does.
+    Like in a real spreadsheet, the grid of each worksheet can have `extra_rows` and `extra_columns` without values.
+    """
+
+    def __init__(self, spreadsheets: Spreadsheets, extra_rows: int = 0, extra_columns: int = 0):
+        self.spreadsheets = spreadsheets
+        self.extra_rows = extra_rows
+        self.extra_columns = extra_columns
+
+    def metadata(self, spreadsheet_id: str) -> Dict:
+        """
+        The response of `spreadsheets.get`, with the title and grid properties of every worksheet.
+        Raises KeyError if there's no such spreadsheet.
+        """
+        sheets = []
+        for title, rows in self.spreadsheets[spreadsheet_id].items():
+            column_count = max((len(row) for row in rows), default=0)
+            sheets.append({"properties": {"title": title, "gridProperties": {
+                "rowCount": len(rows) + self.extra_rows,
+                "columnCount": column_count + self.extra_columns
+            }}})
+        return {"spreadsheetId": spreadsheet_id, "sheets": sheets}
+
+    def value_range(self, spreadsheet_id: str, range: str, major_dimension: str = "ROWS") -> Dict:
+        """
+        The values of a range, trimmed like the API does: trailing empty cells and trailing empty rows or columns
+        are left out, and so is the "values" key when there aren't any.
+        Raises KeyError if there's no such worksheet, and ValueError if the range isn't in A1 notation.
+        """
+        rows = self.__rows_in_range(spreadsheet_id, range)
+        values = rows if major_dimension == "ROWS" else [list(column) for column in zip(*rows)]
+        values = [_trim(line) for line in values]
+        while values and not values[-1]:
+            values.pop()
+
+        value_range = {"range": range, "majorDimension": major_dimension}
+        if values:
+            value_range["values"] = values
+        return value_range
+
+    def __rows_in_range(self, spreadsheet_id: str, range: str) -> List[List[str]]:
+        match = A1_RANGE_PATTERN.match(range)
+        if not match:
+            raise ValueError("Unable to parse range: {}".format(range))
+
+        rows = self.spreadsheets[spreadsheet_id][match.group("sheet")]
+        column_count = max((len(row) for row in rows), default=0)
+        end, end_row = (match.group("end"), match.group("end_row")) if match.group(4) is not None \
+            else (match.group("start"), match.group("start_row"))
+
+        first_column = _column_index(match.group("start"), default=0)
+        last_column = _column_index(end, default=column_count - 1)
+        first_row = int(match.group("start_row")) - 1 if match.group("start_row") else 0
+        last_row = int(end_row) - 1 if end_row else len(rows) - 1
+
+        selected = []
+        for row in rows[first_row:last_row + 1]:
+            padded = row + [""] * (column_count - len(row))
+            selected.append(padded[first_column:last_column + 1])
+        return selected
+
+
+def _trim(line: List[str]) -> List[str]:
+    line = list(line)
+    while line and not line[-1]:
+        line.pop()
+    return line
+
+
+def _column_index(letters: str, default: int) -> int:
+    return GoogleSheetHelper.get_column_index(letters) if letters else default
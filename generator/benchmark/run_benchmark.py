@@ -0,0 +1,251 @@
+"""
+Benchmarks the stages of the generator with synthetic spreadsheets, reporting the time and the peak memory of each
+stage, and comparing them with a stored baseline.
+
+Run it from the generator folder, i.e. `python -m benchmark.run_benchmark --scale medium`.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from benchmark.synthetic import SheetShape, generate_sheets
+from localisation import CHECKSUM_FILENAME, KEYS_VALUE
+from localisation.output.enum_builder import output_enums
+from localisation.output.stringsfile_builder import output_localisable_strings
+from localisation.output.template_helper import TemplateGenerator
+from localisation.parser.sheet_parser import parse_table
+from localisation.utils import create_checksum
+from localisation.validator import validate, validate_plurals
+
+T = TypeVar("T")
+
+PROJECT_NAME = "Benchmark"
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASELINE_VERSION = 1
+SCALES = {
+    "small": [SheetShape(keys=1000, locales=5)],
+    "medium": [SheetShape(keys=10000, locales=30)],
+    "large": [SheetShape(keys=100000, locales=60)],
+    "full": [SheetShape(keys=keys, locales=locales)
+             for keys in [1000, 10000, 100000] for locales in [5, 30, 60]]
+}
+# The same stage names the generator records in its metrics
+STAGES = ["validate", "parse", "render", "enums", "checksum"]
+
+
+@dataclass
+class StageResult:
+    seconds: float
+    # Peak of the memory allocated by Python while the stage ran, in bytes. None if it wasn't traced.
+    peak_bytes: Optional[int] = None
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    keys: int
+    locales: int
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+
+
+def run_scenario(shape: SheetShape, output_dir: str, jobs: int = 1, trace_memory: bool = True) -> ScenarioResult:
+    """
+    Runs every stage with a synthetic spreadsheet of the given shape, each one with the output of the previous one.
+    Each stage is timed without tracing the memory, as tracemalloc slows it down, and run again traced to measure its
+    peak memory. The memory of the processes rendering the languages when `jobs` > 1 isn't traced.
+    """
+    localisation_dict, plurals_dict = generate_sheets(shape)
+    template_generator = TemplateGenerator()
+    result = ScenarioResult(name=shape.name, keys=shape.keys, locales=shape.locales)
+
+    def measure(stage: str, function: Callable[[], T]) -> T:
+        value, seconds = __timed(function)
+        peak_bytes = None
+        if trace_memory:
+            # The value of the traced run is dropped, so only one of them is kept in memory
+            peak_bytes = __traced_peak(function)
+        result.stages[stage] = StageResult(seconds=seconds, peak_bytes=peak_bytes)
+        return value
+
+    validated_dicts, validated_plurals = measure("validate", lambda: __validate(localisation_dict, plurals_dict))
+    rows = measure("parse", lambda: parse_table(validated_dicts, validated_plurals))
+    digests = {}
+    strings_paths = measure("render", lambda: output_localisable_strings(rows,
+                                                                          template_generator=template_generator,
+                                                                          output_dir=output_dir,
+                                                                          project_name=PROJECT_NAME,
+                                                                          jobs=jobs,
+                                                                          digests=digests))
+    enum_path = measure("enums", lambda: output_enums(rows,
+                                                      template_generator=template_generator,
+                                                      project_name=PROJECT_NAME,
+                                                      output_dir=output_dir,
+                                                      digests=digests))
+    measure("checksum", lambda: create_checksum(CHECKSUM_FILENAME, strings_paths,
+                                                output_dir=output_dir,
+                                                digests=digests,
+                                                enum_path=enum_path))
+    return result
+
+
+def __validate(localisation_dict: Dict[str, List[str]], plurals_dict: Dict[str, List[str]]) -> Tuple[Dict, Dict]:
+    """
+    Validates every locale like Localisation.localise does.
+    """
+    validated_dicts = {}
+    for localisation in localisation_dict.keys():
+        if localisation != KEYS_VALUE:
+            validated_dicts[localisation] = validate(localisation, localisation_dict[KEYS_VALUE],
+                                                     localisation_dict[localisation]).result
+    return validated_dicts, validate_plurals(plurals_dict)
+
+
+def __timed(function: Callable[[], T]) -> Tuple[T, float]:
+    gc.collect()
+    start = perf_counter()
+    value = function()
+    return value, perf_counter() - start
+
+
+def __traced_peak(function: Callable[[], T]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def read_baseline(path: str) -> Dict[str, ScenarioResult]:
+    """
+    Returns the scenarios of the baseline, keyed by their name, or an empty dict if there's no baseline.
+    """
+    try:
+        with open(path, "r") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if baseline.get("version") != BASELINE_VERSION:
+        return {}
+
+    scenarios = {}
+    for scenario in baseline["scenarios"]:
+        stages = {name: StageResult(**stage) for name, stage in scenario["stages"].items()}
+        scenarios[scenario["name"]] = ScenarioResult(name=scenario["name"], keys=scenario["keys"],
+                                                     locales=scenario["locales"], stages=stages)
+    return scenarios
+
+
+def write_baseline(path: str, results: List[ScenarioResult]):
+    """
+    Writes the results as the baseline, keeping the scenarios of the previous baseline that weren't run.
+    """
+    scenarios = read_baseline(path)
+    for result in results:
+        scenarios[result.name] = result
+    with open(path, "w") as f:
+        json.dump({"version": BASELINE_VERSION,
+                   "scenarios": [asdict(scenario) for scenario in scenarios.values()]}, f, indent=2)
+        f.write("\n")
+
+
+def compare(result: ScenarioResult, baseline: Optional[ScenarioResult]) -> List[str]:
+    """
+    Returns a line per stage with its time and peak memory, and the ratio to the baseline if there is one.
+    """
+    lines = ["{} ({} keys x {} locales)".format(result.name, result.keys, result.locales)]
+    for name, stage in result.stages.items():
+        line = "  {:<9} {:>9.3f}s".format(name, stage.seconds)
+        baseline_stage = baseline.stages.get(name) if baseline else None
+        if baseline_stage:
+            line += " ({:.2f}x)".format(__ratio(stage.seconds, baseline_stage.seconds))
+        if stage.peak_bytes is not None:
+            line += " {:>9.1f}MB".format(stage.peak_bytes / 1024 / 1024)
+            if baseline_stage and baseline_stage.peak_bytes:
+                line += " ({:.2f}x)".format(__ratio(stage.peak_bytes, baseline_stage.peak_bytes))
+        lines.append(line)
+    return lines
+
+
+def regressions(result: ScenarioResult, baseline: Optional[ScenarioResult], tolerance: float) -> List[str]:
+    """
+    Returns the stages whose time or peak memory is more than `tolerance` times the one in the baseline.
+    """
+    if baseline is None:
+        return []
+    found = []
+    for name, stage in result.stages.items():
+        baseline_stage = baseline.stages.get(name)
+        if baseline_stage is None:
+            continue
+        if __ratio(stage.seconds, baseline_stage.seconds) > tolerance:
+            found.append("{} {} time".format(result.name, name))
+        if stage.peak_bytes is not None and baseline_stage.peak_bytes and \
+                __ratio(stage.peak_bytes, baseline_stage.peak_bytes) > tolerance:
+            found.append("{} {} peak memory".format(result.name, name))
+    return found
+
+
+def __ratio(value: float, baseline: float) -> float:
+    return value / baseline if baseline else float("inf")
+
+
+def main(shapes: List[SheetShape], jobs: int, trace_memory: bool, baseline_path: str, save_baseline: bool,
+         tolerance: Optional[float]):
+    baseline = read_baseline(baseline_path)
+    results = []
+    found_regressions = []
+    for shape in shapes:
+        print("Running {}...".format(shape.name))
+        with TemporaryDirectory() as output_dir:
+            result = run_scenario(shape, output_dir=output_dir, jobs=jobs, trace_memory=trace_memory)
+        results.append(result)
+        print("\n".join(compare(result, baseline.get(result.name))))
+        if tolerance is not None:
+            found_regressions += regressions(result, baseline.get(result.name), tolerance)
+
+    if save_baseline:
+        write_baseline(baseline_path, results)
+        print("Saved the baseline to {}".format(baseline_path))
+
+    if found_regressions:
+        print("Slower or bigger than the baseline: {}".format(", ".join(found_regressions)))
+        sys.exit(-1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=sorted(SCALES.keys()), action="append",
+                        help="Predefined spreadsheet sizes to run, small and medium if neither it nor --keys is set")
+    parser.add_argument("--keys", type=int, help="Number of keys of a custom spreadsheet")
+    parser.add_argument("--locales", type=int, default=5, help="Number of locales of a custom spreadsheet")
+    parser.add_argument("--placeholder-density", type=float, default=0.3,
+                        help="Ratio of the translations of a custom spreadsheet with placeholders")
+    parser.add_argument("--plural-density", type=float, default=0.05,
+                        help="Ratio of the translations of a custom spreadsheet with plurals")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of processes rendering the languages")
+    parser.add_argument("--no-memory", action="store_true", help="Doesn't trace the peak memory of the stages")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Path to the baseline to compare the results with")
+    parser.add_argument("--save-baseline", action="store_true", help="Saves the results as the new baseline")
+    parser.add_argument("--tolerance", type=float,
+                        help="Fails if a stage takes more than this many times the time or memory of the baseline")
+    args = parser.parse_args()
+
+    shapes = [shape for scale in (args.scale or []) for shape in SCALES[scale]]
+    if args.keys:
+        shapes.append(SheetShape(keys=args.keys, locales=args.locales, placeholder_density=args.placeholder_density,
+                                 plural_density=args.plural_density))
+    if not shapes:
+        shapes = SCALES["small"] + SCALES["medium"]
+
+    main(shapes, jobs=args.jobs, trace_memory=not args.no_memory, baseline_path=args.baseline,
+         save_baseline=args.save_baseline, tolerance=args.tolerance)
@@ -0,0 +1,106 @@
+"""
+Benchmarks the ways of fetching the sheets against a local fake Sheets API, with the real googleapiclient transport,
+a configurable latency and throttling. The same options always make the same requests, so the results are
+comparable between runs.
+
+Run it from the generator folder, i.e. `python -m benchmark.run_fetch_benchmark --latency 0.2 --throttle-every 5`.
+"""
+import argparse
+import contextlib
+import io
+from dataclasses import dataclass
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+from benchmark.fake_sheets_server import FakeSheetsServer, synthetic_spreadsheet
+from benchmark.synthetic import SheetShape
+from localisation.googlesheethelper import GoogleSheetHelper
+from localisation.metrics import Metrics
+from localisation.output.template_helper import TemplateGenerator
+from localisation.process_localisation import Localisation
+from localisation.request_scheduler import RequestScheduler
+from localisation.snapshot_cache import SnapshotCache
+from localisation.transport import SheetsTransport
+
+SPREADSHEET_ID = "benchmark"
+SHEET_NAME = "Translations"
+PLURALS_SHEET_NAME = "Plurals"
+STRATEGIES = ["sequential", "concurrent", "cached"]
+
+
+@dataclass
+class FetchResult:
+    strategy: str
+    seconds: float
+    # Requests received by the server, including the throttled ones
+    requests: int
+    retries: int
+    bytes_received: int
+
+
+def run_strategy(strategy: str, server: FakeSheetsServer) -> FetchResult:
+    """
+    Fetches the sheets served by the server like Localisation.localise does, and returns how long it took.
+    The cached strategy fetches them once to fill the snapshot cache, and measures a second fetch.
+    """
+    with TemporaryDirectory() as temp_dir:
+        snapshot_cache = SnapshotCache(directory=temp_dir) if strategy == "cached" else None
+        if snapshot_cache is not None:
+            __fetch(server, concurrent_fetch=False, snapshot_cache=snapshot_cache, output_dir=temp_dir)
+
+        requests = len(server.requests)
+        bytes_sent = server.bytes_sent
+        metrics, request_scheduler = __fetch(server, concurrent_fetch=strategy == "concurrent",
+                                             snapshot_cache=snapshot_cache, output_dir=temp_dir)
+
+    return FetchResult(strategy=strategy,
+                       seconds=metrics.stages["fetch"].seconds,
+                       requests=len(server.requests) - requests,
+                       retries=request_scheduler.retries,
+                       bytes_received=server.bytes_sent - bytes_sent)
+
+
+def __fetch(server: FakeSheetsServer, concurrent_fetch: bool, snapshot_cache: Optional[SnapshotCache],
+            output_dir: str):
+    metrics = Metrics()
+    request_scheduler = RequestScheduler()
+    transport = SheetsTransport()
+    google_sheet_helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id=SPREADSHEET_ID,
+                                            sheet_name=SHEET_NAME, plurals_sheet_name=PLURALS_SHEET_NAME,
+                                            snapshot_cache=snapshot_cache, request_scheduler=request_scheduler,
+                                            transport=transport, metrics=metrics, api_endpoint=server.endpoint)
+    # The generator prints every key and locale it fetches and validates
+    with contextlib.redirect_stdout(io.StringIO()):
+        localisation = Localisation(google_sheet_helper, TemplateGenerator(), output_dir, output_dir,
+                                    concurrent_fetch=concurrent_fetch, project_name="Benchmark", metrics=metrics)
+        localisation.localise(skip_csv_generation=False, force=True)
+    transport.close()
+    return metrics, request_scheduler
+
+
+def main(shape: SheetShape, strategies: List[str], latency: float, throttle_every: int, retry_after: float):
+    spreadsheets = {SPREADSHEET_ID: synthetic_spreadsheet(shape, sheet_name=SHEET_NAME,
+                                                          plurals_sheet_name=PLURALS_SHEET_NAME)}
+    with FakeSheetsServer(spreadsheets, latency=latency, throttle_every=throttle_every,
+                          retry_after=retry_after) as server:
+        print("Fetching {} keys x {} locales from {}, {:g}s latency".format(shape.keys, shape.locales,
+                                                                          server.endpoint, latency))
+        for strategy in strategies:
+            result = run_strategy(strategy, server)
+            print("  {:<10} {:>8.3f}s {:>3} requests {:>3} retries {:>10} bytes".format(
+                result.strategy, result.seconds, result.requests, result.retries, result.bytes_received))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1000, help="Number of keys of the spreadsheet")
+    parser.add_argument("--locales", type=int, default=5, help="Number of locales of the spreadsheet")
+    parser.add_argument("--strategy", choices=STRATEGIES, action="append",
+                        help="Ways of fetching the sheets to run, all of them if it's not set")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds every response is delayed by")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answers every nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds of the 429 responses")
+    args = parser.parse_args()
+
+    main(SheetShape(keys=args.keys, locales=args.locales), strategies=args.strategy or STRATEGIES,
+         latency=args.latency, throttle_every=args.throttle_every, retry_after=args.retry_after)
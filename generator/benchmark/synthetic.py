@@ -0,0 +1,89 @@
+"""
+Synthetic spreadsheets for the benchmarks, shaped like the dicts fetched from the Translations and Plurals sheets.
+"""
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from localisation import KEYS_VALUE, PLURAL_KEYS_VALUE
+from localisation.parser.sheet_parser import PLURAL_LANGUAGE_KEY
+
+# Real locales, so the lproj names and the sizes of the files look like the ones of an app
+LOCALES = ["en", "fr", "de", "es", "it", "pt", "nl", "ja", "ko", "zh-Hans", "zh-Hant", "ru", "pl", "sv", "da", "fi",
+           "nb", "tr", "ar", "he", "el", "cs", "hu", "ro", "sk", "uk", "hr", "ca", "th", "vi", "id", "ms", "hi", "bn",
+           "ta", "te", "mr", "gu", "kn", "ml", "ur", "fa", "sr", "sl", "bg", "lt", "lv", "et", "is", "ga", "cy", "eu",
+           "gl", "af", "sw", "fil", "kk", "az", "ka", "hy", "en-GB", "fr-CA", "es-MX", "pt-BR", "en-AU"]
+PLURAL_COLUMNS = ["ZERO", "ONE", "TWO", "FEW", "MANY", "OTHER"]
+WORDS = ["account", "settings", "profile", "payment", "order", "basket", "delivery", "message", "notification",
+         "search", "filter", "review", "photo", "address", "card", "voucher", "subscription", "password", "email",
+         "login", "logout", "confirm", "cancel", "retry", "continue", "error", "success", "title", "subtitle",
+         "description", "button", "alert", "empty", "loading", "offline", "help"]
+# Characters that are escaped in the stringsdict files. Quotes are left out, the validator reports every one of them.
+SPECIAL_CHARACTERS = ["'", "&", "<", ">", "\\n"]
+
+
+@dataclass
+class SheetShape:
+    keys: int
+    locales: int
+    # Ratio of the translations with at least one `${variable}` placeholder
+    placeholder_density: float = 0.3
+    # Ratio of the translations with a placeholder that's a plural
+    plural_density: float = 0.05
+    # Ratio of the translations with a character that has to be escaped
+    special_character_density: float = 0.05
+    # Number of plural variables, each one with a row per locale in the Plurals sheet
+    plural_variables: int = 200
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return "{}x{}".format(self.keys, self.locales)
+
+
+def generate_sheets(shape: SheetShape) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """
+    Generates the dicts of a spreadsheet with the given shape. The same shape always generates the same dicts.
+    :return: A tuple with the localisation dict, i.e. {"key": [...], "en": [...], ...}, and the plurals dict, i.e.
+    {"VARIABLE": [...], "LANG": [...], "ZERO": [...], ...}
+    """
+    if shape.locales > len(LOCALES):
+        raise ValueError("There are only {} synthetic locales".format(len(LOCALES)))
+    generator = random.Random(shape.seed)
+    locales = LOCALES[:shape.locales]
+
+    variables = ["${{{}_count_{}}}".format(generator.choice(WORDS), index) for index in range(shape.plural_variables)]
+    plurals = {PLURAL_KEYS_VALUE: [], PLURAL_LANGUAGE_KEY: []}
+    for column in PLURAL_COLUMNS:
+        plurals[column] = []
+    for variable in variables:
+        for locale in locales:
+            plurals[PLURAL_KEYS_VALUE].append(variable)
+            plurals[PLURAL_LANGUAGE_KEY].append(locale)
+            noun = generator.choice(WORDS)
+            for column in PLURAL_COLUMNS:
+                plurals[column].append("{} {} {}".format(variable, column.lower(), noun))
+
+    keys = ["{}.{}.{}{}".format(generator.choice(WORDS), generator.choice(WORDS), generator.choice(WORDS), index)
+            for index in range(shape.keys)]
+    localisations = {KEYS_VALUE: keys}
+    for locale in locales:
+        localisations[locale] = []
+
+    for _ in keys:
+        words = " ".join(generator.choice(WORDS) for _ in range(generator.randint(2, 12)))
+        placeholders = []
+        if variables and generator.random() < shape.plural_density:
+            placeholders.append(generator.choice(variables))
+        if generator.random() < shape.placeholder_density:
+            placeholders.extend("${{{}}}".format(generator.choice(WORDS)) for _ in range(generator.randint(1, 3)))
+        special = generator.choice(SPECIAL_CHARACTERS) \
+            if generator.random() < shape.special_character_density else ""
+
+        for locale in locales:
+            translation = "{} {}{}".format(locale, words, special)
+            if placeholders:
+                translation = "{} {}".format(translation, " ".join(placeholders))
+            localisations[locale].append(translation)
+
+    return localisations, plurals
@@ -8,6 +8,7 @@ output_dir="$script_dir/../output/"
 sheet_name="Translations"
 plurals_sheet_name="Plurals"
 development=false
+locale_fallbacks=()
 
 function show_help_and_exit {
     cat <<HELPTEXT
@@ -29,6 +30,8 @@ MANDATORY ARGUMENTS
 OPTIONAL ARGUMENTS
 
     -b  specify this flag to bypass the csv generation and use the csv file that's in the specified Xcode project folder
+    -f  fetch the translations and plurals sheets concurrently
+    -l <locale=lproj_locale> copy a locale to another lproj when the project has none for it, i.e. pt=pt-PT. Can be repeated
     -o <path> path to folder to generate code into (defaults to output folder in project)
     -h  display this help text
     -d  run in development mode
@@ -113,13 +116,21 @@ function run_docker_localisation {
         python_command="$python_command --skip-csv"
     fi
 
+    if [ "${concurrent_fetch}" = true ]; then
+        python_command="$python_command --concurrent-fetch"
+    fi
+
+    for locale_fallback in "${locale_fallbacks[@]}"; do
+        python_command="$python_command --locale-fallback ${locale_fallback}"
+    done
+
     docker_command="docker run -v ${plugin_project_path}:/work ${expose_computer_to_docker} -w /work -i -e PYTHONUNBUFFERED=0 localizable-googlesheets ${python_command}"
 
     ${docker_command}
 }
 
 # Parse command line args...
-while getopts s:n:p:c:m:o:hb opt; do
+while getopts s:n:p:c:m:o:l:hbf opt; do
     case $opt in
         s)
             sheet_id=$OPTARG
@@ -139,6 +150,12 @@ while getopts s:n:p:c:m:o:hb opt; do
         b)
             skip_csv=true
             ;;
+        f)
+            concurrent_fetch=true
+            ;;
+        l)
+            locale_fallbacks+=("$OPTARG")
+            ;;
         d)
             development=true
             ;;
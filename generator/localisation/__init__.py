@@ -1,2 +1,6 @@
+KEYS_VALUE = "key"
 PLURAL_KEYS_VALUE = "VARIABLE"
 CHECKSUM_FILENAME = ".checksum.localizablegooglesheets"
+CHECKSUM_MANIFEST_FILENAME = ".checksum.localizablegooglesheets.json"
+CHECKSUM_MANIFEST_VERSION = 1
+SNAPSHOT_FILENAME = ".snapshot.localizablegooglesheets"
@@ -1,11 +1,15 @@
-from os import path, walk
-from shutil import copy, SameFileError
+from os import path
+from typing import Dict, Optional
 
-from localisation import CHECKSUM_FILENAME
+from localisation import CHECKSUM_FILENAME, CHECKSUM_MANIFEST_FILENAME
+from localisation.locales import LocaleResolver
+from localisation.project_index import ProjectIndex, index_project
+from localisation.utils import copy_if_changed
 
 
 CHECKSUM_VALIDATOR_SCRIPT_LOCATION = "./templates"
 CHECKSUM_VALIDATOR_SCRIPT_NAME = "validate_checksum.sh"
+CHECKSUM_VERIFIER_SCRIPT_NAME = "validate_checksum.py"
 
 
 def copy_xcode_files( csv_paths: [str],
@@ -13,11 +17,17 @@ def copy_xcode_files( csv_paths: [str],
                       stringsdict_path: dict,
                       strings_path: dict,
                       checksum_path: str,
-                      project_dir: str) -> bool:
+                      project_dir: str,
+                      locale_fallbacks: Optional[Dict[str, str]] = None,
+                      project_index: Optional[ProjectIndex] = None) -> bool:
     """
     Copies the files generated from the localisation process to the required project directory.
-    To do the copying, it runs through the target project directory and finds a file with the same name
+    To do the copying, it indexes the target project directory once and finds a file with the same name
     as the file it wants to copy, then copies it.
+    Files whose content is already in the project aren't copied, so Xcode doesn't rebuild them.
+    Each locale is copied to the lproj directories of the same locale, or of its fallback in `locale_fallbacks` if
+    there are none, i.e. {"pt": "pt-PT"}.
+    `project_index` is the index of the project dir, if it was already built. Otherwise the project dir is indexed.
     Returns `True` if successfully copied, `False` otherwise.
     """
     if not path.isdir(project_dir):
@@ -29,67 +39,87 @@ def copy_xcode_files( csv_paths: [str],
 
     checksum_copied = False
 
-    # {"en": "/Users/.....", "ja": "/Users/...."}
-    stringsdict_copied = [False] * len(stringsdict_path.keys())
-    strings_copied = [False] * len(strings_path.keys())
-
-    for dirpath, _, files in walk(project_dir):
-        if "DerivedData" in dirpath or ".app" in dirpath:
-            continue
-
-        csv_paths_copy = list(csv_paths)
-        for csv_path in csv_paths_copy:
-            csv_name = path.basename(csv_path)
-            if not len(csv_paths) == 0 and csv_name in files:
-                copy(csv_path, dirpath)
-                csv_paths.remove(csv_path)
-                print("Updated {} at {}".format(csv_name, dirpath))
-
-        try:
-            if not checksum_copied and CHECKSUM_FILENAME in files:
-                copy(checksum_path, dirpath)
-                copy(path.join(CHECKSUM_VALIDATOR_SCRIPT_LOCATION, CHECKSUM_VALIDATOR_SCRIPT_NAME),
-                     path.join(dirpath, CHECKSUM_VALIDATOR_SCRIPT_NAME))
-                checksum_copied = True
-                print("Updated {} at {}".format(CHECKSUM_FILENAME, dirpath))
-        except SameFileError:
-            checksum_copied = True
-            continue
-
-        if not enum_copied and enum_name.upper() in (file.upper() for file in files):
-            copy(enum_path, dirpath)
-            enum_copied = True
-            print("Updated {} at {}".format(enum_name, dirpath))
-
-        if ".lproj" in dirpath and ".bundle" not in dirpath:
-            if "Localizable.strings" in files:
-                for localisation in strings_path.keys():
-                    if localisation in path.basename(dirpath):
-                        copy(strings_path[localisation], path.join(dirpath, "Localizable.strings"))
-                        strings_copied.pop()
-                        print("Updated {} at {}".format(path.basename(strings_path[localisation]), dirpath))
-            if "Localizable.stringsdict" in files:
-                for localisation in stringsdict_path.keys():
-                    if localisation in path.basename(dirpath):
-                        copy(stringsdict_path[localisation], path.join(dirpath, "Localizable.stringsdict"))
-                        stringsdict_copied.pop()
-                        print("Updated {} at {}".format(path.basename(stringsdict_path[localisation]), dirpath))
-
-    if not len(csv_paths) == 0 or not enum_copied or stringsdict_path or not checksum_copied:
+    # The locales with lproj directories in the project, none of which has a stringsdict to replace
+    stringsdict_missing = set()
+
+    index = project_index if project_index is not None else index_project(project_dir)
+
+    for csv_path in list(csv_paths):
+        csv_name = path.basename(csv_path)
+        csv_dirs = index.directories_with(csv_name)
+        if csv_dirs:
+            __copy(csv_path, csv_dirs[0], csv_name, csv_dirs[0])
+            csv_paths.remove(csv_path)
+
+    checksum_dirs = index.directories_with(CHECKSUM_FILENAME)
+    if checksum_dirs:
+        __copy(checksum_path, checksum_dirs[0], CHECKSUM_FILENAME, checksum_dirs[0])
+        __copy_validator(checksum_path, checksum_dirs[0])
+        checksum_copied = True
+
+    enum_dirs = index.directories_with(enum_name, ignore_case=True)
+    if enum_dirs:
+        __copy(enum_path, enum_dirs[0], enum_name, enum_dirs[0])
+        enum_copied = True
+
+    locale_resolver = LocaleResolver(locale_fallbacks)
+    # The locales without an lproj directory of their own or of their fallback
+    unresolved_locales = set()
+    for localisation, lproj_dirs in locale_resolver.resolve(strings_path.keys(), index.lproj_dirs).items():
+        if not lproj_dirs:
+            unresolved_locales.add(localisation)
+        for lproj_dir in lproj_dirs:
+            if "Localizable.strings" in lproj_dir.files:
+                __copy(strings_path[localisation], path.join(lproj_dir.path, "Localizable.strings"),
+                       path.basename(strings_path[localisation]), lproj_dir.path)
+    for localisation, lproj_dirs in locale_resolver.resolve(stringsdict_path.keys(), index.lproj_dirs).items():
+        if not lproj_dirs:
+            unresolved_locales.add(localisation)
+        for lproj_dir in lproj_dirs:
+            if "Localizable.stringsdict" in lproj_dir.files:
+                __copy(stringsdict_path[localisation], path.join(lproj_dir.path, "Localizable.stringsdict"),
+                       path.basename(stringsdict_path[localisation]), lproj_dir.path)
+        if lproj_dirs and not any("Localizable.stringsdict" in lproj_dir.files for lproj_dir in lproj_dirs):
+            stringsdict_missing.add(localisation)
+
+    if not len(csv_paths) == 0 or not enum_copied or stringsdict_missing or unresolved_locales or not checksum_copied:
         if not len(csv_paths) == 0:
             for csv_path in csv_paths:
-                copy(csv_path, project_dir)
-                print("Added {} into {}".format(csv_name, project_dir))
+                copy_if_changed(csv_path, project_dir)
+                print("Added {} into {}".format(path.basename(csv_path), project_dir))
         if not checksum_copied:
-            copy(checksum_path, project_dir)
-            copy(path.join(CHECKSUM_VALIDATOR_SCRIPT_LOCATION, CHECKSUM_VALIDATOR_SCRIPT_NAME),
-                 path.join(dirpath, CHECKSUM_VALIDATOR_SCRIPT_NAME))
+            copy_if_changed(checksum_path, project_dir)
+            __copy_validator(checksum_path, project_dir)
             print("Added {} into {}".format(CHECKSUM_FILENAME, project_dir))
         if not enum_copied:
             print("\n\nWARNING: Couldn't find enum file to replace. Please add \n  {}\nto your Xcode project.\n\n"
                   .format(enum_path))
-        if stringsdict_copied:
+        if stringsdict_missing:
             print("WARNING: Couldn't copy STRINGSDICT files, couldn't find an existing one!")
+        for localisation in sorted(unresolved_locales):
+            print("WARNING: Couldn't find an lproj for {0} in the project, its files weren't copied! Add one, or set "
+                  "a fallback with --locale-fallback {0}=<lproj locale>".format(localisation))
         return False
 
     return True
+
+
+def __copy(source: str, destination: str, name: str, dirpath: str):
+    """
+    Copies the file unless the destination already has the same content.
+    """
+    if copy_if_changed(source, destination):
+        print("Updated {} at {}".format(name, dirpath))
+    else:
+        print("{} is up to date at {}".format(name, dirpath))
+
+
+def __copy_validator(checksum_path: str, dirpath: str):
+    """
+    Copies the checksum manifest and the scripts validating it next to the checksum file.
+    """
+    manifest_path = path.join(path.dirname(checksum_path), CHECKSUM_MANIFEST_FILENAME)
+    if path.exists(manifest_path):
+        copy_if_changed(manifest_path, dirpath)
+    for script_name in [CHECKSUM_VALIDATOR_SCRIPT_NAME, CHECKSUM_VERIFIER_SCRIPT_NAME]:
+        copy_if_changed(path.join(CHECKSUM_VALIDATOR_SCRIPT_LOCATION, script_name), path.join(dirpath, script_name))
@@ -1,32 +1,99 @@
+import json
 import os
 import pickle
-from typing import NewType, TypeVar, Tuple, Optional, Dict
+import threading
+import time
+from dataclasses import dataclass
+from typing import NewType, TypeVar, Tuple, Optional, Dict, List, Callable
 
-from googleapiclient.discovery import build, Resource
+import httplib2
+from googleapiclient.discovery import V2_DISCOVERY_URI, build, build_from_document, Resource
+from googleapiclient.http import HttpRequest
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
 
+from localisation.metrics import Metrics, RequestMetrics
+from localisation.request_scheduler import RequestScheduler
+from localisation.snapshot_cache import SnapshotCache
+from localisation.transport import SheetsTransport
+
 SheetRef = TypeVar("SheetRef", str, int)
 
 SheetRange = NewType("SheetRange", Tuple[SheetRef, SheetRef])
 A1NotationRange = NewType("A1NotationRange", str)
 
+SHEETS_API_NAME = "sheets"
+SHEETS_API_VERSION = "v4"
+DISCOVERY_CACHE_PATH = os.path.join(os.path.dirname(__file__), '../resources/discovery/sheets.v4.json')
+# The cached discovery document is fetched again once it's older than this many seconds, to pick up API changes
+DISCOVERY_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+# Where the discovery document of the Sheets API is fetched from, i.e. https://sheets.googleapis.com/$discovery/rest
+DISCOVERY_URL = V2_DISCOVERY_URI
+# Where an API endpoint serves its discovery document, like https://sheets.googleapis.com does
+DISCOVERY_DOCUMENT_PATH = "/$discovery/rest?version={apiVersion}"
+
+
+@dataclass
+class GridProperties:
+    row_count: int
+    column_count: int
+
+
+class MissingWorksheetError(Exception):
+    """
+    Raised when values are requested from a worksheet the spreadsheet doesn't have.
+    """
+
+    def __init__(self, spreadsheet_id: str, sheet_name: str):
+        super().__init__("The spreadsheet {} doesn't have a worksheet named '{}'".format(spreadsheet_id, sheet_name))
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+
 
 class GoogleSheetHelper:
 
-    def __init__(self, scopes: [str], credentials: str, spreadsheet_id: str, sheet_name: str, plurals_sheet_name: Optional[str] = None):
+    def __init__(self, scopes: [str], credentials: str, spreadsheet_id: str, sheet_name: str, plurals_sheet_name: Optional[str] = None,
+                 service: Optional[Resource] = None, snapshot_cache: Optional[SnapshotCache] = None,
+                 request_scheduler: Optional[RequestScheduler] = None, transport: Optional[SheetsTransport] = None,
+                 metrics: Optional[Metrics] = None, api_endpoint: Optional[str] = None):
+        """
+        :param service: An already built GoogleSheets service. If it's not given, it's built with the credentials
+        when the first request is made.
+        :param snapshot_cache: If given, responses are read from it when they're fresh enough, and stored in it otherwise.
+        :param request_scheduler: Rate limits and retries the requests. Defaults to retrying failed requests without a rate limit.
+        :param transport: The pool of connections the requests are made with.
+        :param metrics: Records the time taken by each request.
+        :param api_endpoint: The root URL of another Sheets API, i.e. a local fake one like http://127.0.0.1:8080.
+        The service is built from the discovery document it serves, and its requests aren't authorised, so the
+        credentials aren't needed.
+        """
         self.__scopes = scopes
         self.__credentials = credentials
         self.__spreadsheet_id = spreadsheet_id
         self.__sheet_name = sheet_name
         self.__plurals_sheet_name = plurals_sheet_name
-        self.__service = None
+        self.__service = service
+        self.__snapshot_cache = snapshot_cache
+        self.__request_scheduler = request_scheduler if request_scheduler is not None else RequestScheduler()
+        self.__transport = transport if transport is not None else SheetsTransport()
+        self.__metrics = metrics if metrics is not None else Metrics()
+        self.__api_endpoint = api_endpoint
+        self.__creds = None
+        # The helper this one was made from with `with_spreadsheet`, whose service it shares
+        self.__parent: Optional[GoogleSheetHelper] = None
+        self.__grid_properties: Optional[Dict[str, GridProperties]] = None
+        self.__grid_properties_lock = threading.Lock()
+        self.__service_lock = threading.Lock()
 
     def __build_sheets_service(self) -> Resource:
         """
         Builds the GoogleSheets service with the class scopes
         :return:
         """
+        if self.__api_endpoint:
+            return self.__build_endpoint_service()
+
         creds = None
         cache_path = os.path.join(os.path.dirname(__file__), '../resources/cache.pickle')
         credentials_path = self.__credentials
@@ -48,8 +115,176 @@ class GoogleSheetHelper:
             with open(cache_path, 'wb') as token:
                 pickle.dump(creds, token)
 
-        service = build('sheets', 'v4', credentials=creds)
-        return service
+        self.__creds = creds
+        self.__transport.authorize(creds)
+        document = self.__get_discovery_document()
+        if document is not None:
+            return build_from_document(document, credentials=creds)
+
+        # Lets googleapiclient fetch the document itself
+        return build(SHEETS_API_NAME, SHEETS_API_VERSION, credentials=creds, cache_discovery=False)
+
+    def __build_endpoint_service(self) -> Resource:
+        """
+        Builds the service for the API at api_endpoint from the discovery document it serves, with anonymous
+        credentials. The requests still go through the transport, so they're made like the ones to Google.
+        """
+        creds = AnonymousCredentials()
+        self.__creds = creds
+        self.__transport.authorize(creds)
+        discovery_url = self.__api_endpoint.rstrip("/") + DISCOVERY_DOCUMENT_PATH
+        return build(SHEETS_API_NAME, SHEETS_API_VERSION, credentials=creds, discoveryServiceUrl=discovery_url,
+                     cache_discovery=False)
+
+    def __get_discovery_document(self) -> Optional[Dict]:
+        """
+        Returns the Sheets API discovery document cached on disk, fetching it again if it's missing or older than
+        DISCOVERY_CACHE_MAX_AGE. An older document is still used if fetching fails.
+        Returns None if there isn't any.
+        """
+        document = self.__load_discovery_document(max_age=DISCOVERY_CACHE_MAX_AGE)
+        if document is not None:
+            return document
+
+        document = self.__fetch_discovery_document()
+        if document is not None:
+            self.__save_discovery_document(document)
+            return document
+        return self.__load_discovery_document(max_age=None)
+
+    def __load_discovery_document(self, max_age: Optional[float]) -> Optional[Dict]:
+        """
+        Loads the Sheets API discovery document cached on disk, so building the service doesn't need a network call.
+        Returns None if there is no cached document, if it's older than `max_age` seconds, or if it isn't for the API
+        version we use.
+        """
+        if not os.path.exists(DISCOVERY_CACHE_PATH):
+            return None
+        if max_age is not None and time.time() - os.path.getmtime(DISCOVERY_CACHE_PATH) > max_age:
+            return None
+
+        try:
+            with open(DISCOVERY_CACHE_PATH, 'r') as f:
+                document = json.load(f)
+        except ValueError:
+            print("Ignoring corrupted discovery document cache at {}".format(DISCOVERY_CACHE_PATH))
+            return None
+
+        if document.get("name") != SHEETS_API_NAME or document.get("version") != SHEETS_API_VERSION:
+            print("Ignoring discovery document cache for {} {}".format(document.get("name"), document.get("version")))
+            return None
+        return document
+
+    def __fetch_discovery_document(self) -> Optional[Dict]:
+        """
+        Fetches the Sheets API discovery document with a connection of the transport.
+        Returns None if it couldn't be fetched, or if it isn't for the API version we use.
+        """
+        url = DISCOVERY_URL.format(api=SHEETS_API_NAME, apiVersion=SHEETS_API_VERSION)
+        try:
+            with self.__transport.connection() as http:
+                response, content = http.request(url, "GET")
+            if response.status >= 400:
+                print("Couldn't fetch the discovery document from {}, status {}".format(url, response.status))
+                return None
+            document = json.loads(content)
+        except (httplib2.HttpLib2Error, OSError, ValueError) as error:
+            print("Couldn't fetch the discovery document from {}: {}".format(url, error))
+            return None
+
+        if document.get("name") != SHEETS_API_NAME or document.get("version") != SHEETS_API_VERSION:
+            print("Ignoring discovery document for {} {}".format(document.get("name"), document.get("version")))
+            return None
+        return document
+
+    def __save_discovery_document(self, document: Dict):
+        """
+        Saves the discovery document so the next runs can build the service without fetching it.
+        """
+        os.makedirs(os.path.dirname(DISCOVERY_CACHE_PATH), exist_ok=True)
+        temp_path = "{}.{}.tmp".format(DISCOVERY_CACHE_PATH, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(document, f)
+        os.replace(temp_path, DISCOVERY_CACHE_PATH)
+
+    def __get_service(self) -> Resource:
+        """
+        Returns the GoogleSheets service, building it the first time it's needed, or the one of the helper this one
+        was made from. Safe to call from several threads, the service is only built once.
+        """
+        with self.__service_lock:
+            if not self.__service:
+                if self.__parent is not None:
+                    self.__service = self.__parent.__get_service()
+                    self.__creds = self.__parent.__creds
+                else:
+                    self.__service = self.__build_sheets_service()
+            return self.__service
+
+    def __execute(self, request: HttpRequest) -> Dict:
+        """
+        Executes a request built from the service through the request scheduler and the transport.
+        The service can be shared between threads, but the http objects can't, so each request checks one out of the
+        transport's pool. A service given to the helper is used with its own http object.
+        """
+        if self.__creds is None:
+            return self.__request_scheduler.execute(request.execute)
+        return self.__request_scheduler.execute(lambda: self.__transport.execute(request))
+
+    def __get_response(self, sheet_name: str, request: str, build_request: Callable[[Resource], HttpRequest]) -> Dict:
+        """
+        Returns the response for a request made to the given sheet, from the snapshot cache if possible.
+        :param request: A description of the request, i.e. its method and ranges, used as part of the cache key.
+        :param build_request: Builds the request from the service. It's only called if the response isn't cached.
+        """
+        start = self.__metrics.clock()
+        if self.__snapshot_cache is not None:
+            response = self.__snapshot_cache.get(self.__spreadsheet_id, sheet_name, request)
+            if response is not None:
+                self.__add_request_metrics(sheet_name, request, start, cached=True)
+                return response
+
+        response = self.__execute(build_request(self.__get_service()))
+        self.__add_request_metrics(sheet_name, request, start, cached=False)
+
+        if self.__snapshot_cache is not None:
+            self.__snapshot_cache.put(self.__spreadsheet_id, sheet_name, request, response)
+        return response
+
+    def __add_request_metrics(self, sheet_name: str, request: str, start: float, cached: bool):
+        self.__metrics.add_request(RequestMetrics(spreadsheet_id=self.__spreadsheet_id,
+                                                  sheet_name=sheet_name,
+                                                  request=request,
+                                                  seconds=self.__metrics.clock() - start,
+                                                  cached=cached))
+
+    @staticmethod
+    def get_column_letter(index: int) -> str:
+        """
+        Returns the A1 notation letters of a column from its zero based index, i.e. 0 -> A, 25 -> Z, 26 -> AA, 702 -> AAA
+        """
+        if index < 0:
+            raise ValueError("Column index must be positive, got {}".format(index))
+
+        letters = ""
+        index += 1
+        while index > 0:
+            index, remainder = divmod(index - 1, 26)
+            letters = chr(ord("A") + remainder) + letters
+        return letters
+
+    @staticmethod
+    def get_column_index(letters: str) -> int:
+        """
+        Returns the zero based index of a column from its A1 notation letters, i.e. A -> 0, Z -> 25, AA -> 26
+        """
+        if not letters or not letters.isalpha():
+            raise ValueError("Invalid column letters '{}'".format(letters))
+
+        index = 0
+        for letter in letters.upper():
+            index = index * 26 + ord(letter) - ord("A") + 1
+        return index - 1
 
     def get_a1_notation_from_sheet_range(self, sheet_name: str, sheet_range: SheetRange) -> A1NotationRange:
         """
@@ -66,6 +301,104 @@ class GoogleSheetHelper:
 
         return self.get_a1_notation_from_sheet_range(sheet_name=sheet_name, sheet_range=sheet_range)
 
+    def get_column_range(self, sheet_name: str, start_column: int, end_column: Optional[int] = None) -> A1NotationRange:
+        """
+        Returns a A1NotationRange spawning from two whole columns, addressed by their zero based index.
+        The second one is optional
+        """
+        end_column = end_column if end_column is not None else start_column
+        return self.get_range(sheet_name=sheet_name,
+                              start_at=self.get_column_letter(start_column),
+                              end_at=self.get_column_letter(end_column))
+
+    def with_spreadsheet(self, spreadsheet_id: str, sheet_name: str,
+                         plurals_sheet_name: Optional[str] = None) -> "GoogleSheetHelper":
+        """
+        Returns a helper for another spreadsheet or worksheet, sharing this helper's service, credentials,
+        snapshot cache, request scheduler, transport and metrics.
+        The service isn't built until one of the helpers makes a request, so responses in the snapshot cache don't
+        need credentials.
+        """
+        helper = GoogleSheetHelper(scopes=self.__scopes,
+                                   credentials=self.__credentials,
+                                   spreadsheet_id=spreadsheet_id,
+                                   sheet_name=sheet_name,
+                                   plurals_sheet_name=plurals_sheet_name,
+                                   service=self.__service,
+                                   snapshot_cache=self.__snapshot_cache,
+                                   request_scheduler=self.__request_scheduler,
+                                   transport=self.__transport,
+                                   metrics=self.__metrics,
+                                   api_endpoint=self.__api_endpoint)
+        helper.__creds = self.__creds
+        helper.__parent = self
+        if spreadsheet_id == self.__spreadsheet_id:
+            # Worksheets of the same spreadsheet share its grid properties, which are fetched only once
+            self.__load_grid_properties()
+            helper.__grid_properties = self.__grid_properties
+        return helper
+
+    def get_sheet_names(self) -> List[str]:
+        """
+        Returns the names of all the worksheets in the spreadsheet, in order.
+        """
+        self.__load_grid_properties()
+        return list(self.__grid_properties.keys())
+
+    def get_grid_properties(self, sheet_name: str) -> Optional[GridProperties]:
+        """
+        Returns the number of rows and columns of a worksheet, or None if there isn't a worksheet with that name.
+        """
+        self.__load_grid_properties()
+        return self.__grid_properties.get(sheet_name)
+
+    def __check_worksheet(self, sheet_name: str):
+        """
+        Raises MissingWorksheetError if there isn't a worksheet with that name.
+        """
+        if self.get_grid_properties(sheet_name) is None:
+            raise MissingWorksheetError(self.__spreadsheet_id, sheet_name)
+
+    def __load_grid_properties(self):
+        """
+        Fetches the properties of every worksheet with a single request, the first time they're needed.
+        """
+        with self.__grid_properties_lock:
+            if self.__grid_properties is None:
+                fields = "sheets.properties(title,gridProperties(rowCount,columnCount))"
+                response = self.__get_response(
+                    sheet_name="",
+                    request="spreadsheets.get {}".format(fields),
+                    build_request=lambda service: service.spreadsheets().get(spreadsheetId=self.__spreadsheet_id,
+                                                                               fields=fields))
+                self.__grid_properties = {}
+                for sheet in response.get("sheets", []):
+                    properties = sheet.get("properties", {})
+                    grid = properties.get("gridProperties", {})
+                    self.__grid_properties[properties.get("title")] = GridProperties(row_count=grid.get("rowCount", 0),
+                                                                                     column_count=grid.get("columnCount", 0))
+
+    def get_bounded_range(self, sheet_name: str, start_at: SheetRef, end_at: Optional[SheetRef] = None) -> A1NotationRange:
+        """
+        Returns a A1NotationRange like `get_range`, but whole rows are bounded to the columns of the worksheet,
+        and whole columns to its rows, i.e. `'Translations'!C:C` becomes `'Translations'!C1:C250`.
+        Any other reference is returned unchanged.
+        """
+        end_at = end_at if end_at is not None else start_at
+        grid = self.get_grid_properties(sheet_name)
+        if grid is None or grid.row_count < 1 or grid.column_count < 1:
+            return self.get_range(sheet_name=sheet_name, start_at=start_at, end_at=end_at)
+
+        start, end = str(start_at), str(end_at)
+        if start.isdigit() and end.isdigit():
+            start_at = "A{}".format(start)
+            end_at = "{}{}".format(self.get_column_letter(grid.column_count - 1), end)
+        elif start.isalpha() and end.isalpha():
+            start_at = "{}1".format(start)
+            end_at = "{}{}".format(end, grid.row_count)
+
+        return self.get_range(sheet_name=sheet_name, start_at=start_at, end_at=end_at)
+
     def get_values(self, start_at: SheetRef, end_at: Optional[SheetRef] = None) -> Dict:
         return self._get_values(sheet_name=self.__sheet_name, start_at=start_at, end_at=end_at)
 
@@ -78,6 +411,18 @@ class GoogleSheetHelper:
             return {}
         return self._get_values(sheet_name=self.__plurals_sheet_name, start_at=start_at, end_at=end_at)
 
+    def get_columns(self, columns: List[SheetRef]) -> Dict[SheetRef, List[str]]:
+        return self._get_columns(sheet_name=self.__sheet_name, columns=columns)
+
+    def get_plurals_columns(self, columns: List[SheetRef]) -> Dict[SheetRef, List[str]]:
+        """
+        Gets the given columns from the plurals spreadsheet.
+        If there is no plurals spreadsheet defined, simply returns an empty dictionary.
+        """
+        if self.__plurals_sheet_name is None:
+            return {}
+        return self._get_columns(sheet_name=self.__plurals_sheet_name, columns=columns)
+
     def _get_values(self, sheet_name: str, start_at: SheetRef, end_at: Optional[SheetRef] = None) -> Dict:
         """
         Returns all the values for a given Row Range
@@ -85,14 +430,43 @@ class GoogleSheetHelper:
         :param start_at: The referect of the sheet where the fetching should end. This can be a cell, row, or column.
         If it's null, the start_at value will be used.
 
-        :return: A dictionary with the fetched values
+        :return: The rows of fetched values, empty if there aren't any
+        Raises MissingWorksheetError if there isn't a worksheet with that name.
+        """
+        self.__check_worksheet(sheet_name)
+        range = self.get_bounded_range(sheet_name=sheet_name, start_at=start_at, end_at=end_at)
+
+        response = self.__get_response(
+            sheet_name=sheet_name,
+            request="values.get {}".format(range),
+            build_request=lambda service: service.spreadsheets().values().get(spreadsheetId=self.__spreadsheet_id,
+                                                                                range=range))
+        # A range without any value comes back without the "values" key
+        return response.get("values", [])
+
+    def _get_columns(self, sheet_name: str, columns: List[SheetRef]) -> Dict[SheetRef, List[str]]:
         """
+        Returns the values of several whole columns, fetched with a single `values.batchGet` request.
+        :param columns: The references of the columns to fetch, i.e. ['A', 'C', 'D']
+
+        :return: A dictionary where the key is the column reference and the value is the list of cells in that column,
+        starting at the first row. Empty cells in the middle of a column are returned as empty strings, trailing empty cells
+        are omitted.
+        Raises MissingWorksheetError if there isn't a worksheet with that name.
+        """
+        if not columns:
+            return {}
+        self.__check_worksheet(sheet_name)
 
-        if not self.__service:
-            self.__service = self.__build_sheets_service()
+        ranges = [self.get_bounded_range(sheet_name=sheet_name, start_at=column) for column in columns]
 
-        range = self.get_range(sheet_name=sheet_name, start_at=start_at, end_at=end_at)
+        response = self.__get_response(
+            sheet_name=sheet_name,
+            request="values.batchGet COLUMNS {}".format(",".join(ranges)),
+            build_request=lambda service: service.spreadsheets().values().batchGet(spreadsheetId=self.__spreadsheet_id,
+                                                                                     ranges=ranges,
+                                                                                     majorDimension="COLUMNS"))
+        value_ranges = response.get("valueRanges", [])
 
-        result = self.__service.spreadsheets().values().get(spreadsheetId=self.__spreadsheet_id, range=range)
-        response = result.execute()
-        return response["values"]
+        # A column without any value comes back without the "values" key
+        return {column: (value_range.get("values") or [[]])[0] for column, value_range in zip(columns, value_ranges)}
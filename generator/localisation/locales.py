@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Optional, Tuple, TypeVar
+
+# The lproj directories, i.e. LprojDirectory
+D = TypeVar("D")
+
+# Names older Xcode projects used for the lproj directories of some languages
+LEGACY_LPROJ_NAMES = {
+    "english": "en",
+    "french": "fr",
+    "german": "de",
+    "italian": "it",
+    "japanese": "ja",
+    "spanish": "es",
+    "dutch": "nl"
+}
+
+
+def canonical_locale(name: str) -> str:
+    """
+    Returns the canonical identifier of a locale, given as in the spreadsheet or as the name of an lproj directory,
+    i.e. "en_gb" -> "en-GB", "zh-hans" -> "zh-Hans", "English" -> "en". "Base" is kept as it is.
+    """
+    if name.lower().endswith(".lproj"):
+        name = name[:-len(".lproj")]
+    if name == "Base":
+        return name
+    if name.lower() in LEGACY_LPROJ_NAMES:
+        return LEGACY_LPROJ_NAMES[name.lower()]
+
+    subtags = name.replace("_", "-").split("-")
+    canonical = [subtags[0].lower()]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4 and subtag.isalpha():
+            # Script, i.e. Hans
+            canonical.append(subtag.title())
+        elif len(subtag) == 2 or (len(subtag) == 3 and subtag.isdigit()):
+            # Region, i.e. GB or 419
+            canonical.append(subtag.upper())
+        else:
+            canonical.append(subtag)
+    return "-".join(canonical)
+
+
+def parse_locale_fallback(fallback: str) -> Tuple[str, str]:
+    """
+    Parses a fallback given as `locale=lproj_locale`, i.e. "pt=pt-PT"
+    """
+    locale, separator, lproj_locale = fallback.partition("=")
+    if not separator or not locale or not lproj_locale:
+        raise ValueError("Invalid locale fallback '{}', expected 'locale=lproj_locale'".format(fallback))
+    return locale, lproj_locale
+
+
+class LocaleResolver:
+    """
+    Maps the locales of the generated files to the lproj directories of the project.
+    A locale is copied to the lproj directories of exactly the same locale, so "en" never replaces "en-GB.lproj".
+    If the project has none, it's copied to the ones of its fallback, i.e. "pt" to "pt-PT.lproj", unless that
+    locale is generated as well.
+    """
+
+    def __init__(self, fallbacks: Optional[Dict[str, str]] = None):
+        self.__fallbacks = {canonical_locale(locale): canonical_locale(fallback)
+                            for locale, fallback in (fallbacks or {}).items()}
+
+    def resolve(self, locales: Iterable[str], lproj_dirs: Dict[str, List[D]]) -> Dict[str, List[D]]:
+        """
+        :param locales: The locales of the generated files
+        :param lproj_dirs: The lproj directories of the project, keyed by their canonical locale
+        :return: The lproj directories each locale is copied to, keyed by the locales as they were given
+        """
+        locales = list(locales)
+        generated = {canonical_locale(locale) for locale in locales}
+
+        destinations = {}
+        for locale in locales:
+            canonical = canonical_locale(locale)
+            if canonical in lproj_dirs:
+                destinations[locale] = lproj_dirs[canonical]
+                continue
+
+            fallback = self.__fallbacks.get(canonical)
+            if fallback is not None and fallback not in generated:
+                destinations[locale] = lproj_dirs.get(fallback, [])
+            else:
+                destinations[locale] = []
+        return destinations
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List
+
+
+@dataclass
+class StageMetrics:
+    # Total wall time spent in the stage, in seconds
+    seconds: float = 0.0
+    # Times the stage ran, i.e. once per language for a per-language stage
+    calls: int = 0
+
+
+@dataclass
+class RequestMetrics:
+    spreadsheet_id: str
+    sheet_name: str
+    # A description of the request, i.e. its method and ranges
+    request: str
+    # Wall time including retries and rate limiting, in seconds
+    seconds: float
+    # Whether the response came from the snapshot cache instead of the API
+    cached: bool = False
+
+
+@dataclass
+class Metrics:
+    """
+    Wall time of each stage of the pipeline, every Sheets request made and counters such as rows and bytes written.
+    Stages can be nested, i.e. "render" and "render.en", and are named by whoever records them.
+    """
+    stages: Dict[str, StageMetrics] = field(default_factory=dict)
+    requests: List[RequestMetrics] = field(default_factory=list)
+    counters: Dict[str, float] = field(default_factory=dict)
+    clock: Callable[[], float] = field(default=perf_counter, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times the code run within the `with` block as the given stage.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add_stage(name, self.clock() - start)
+
+    def add_stage(self, name: str, seconds: float):
+        """
+        Adds time measured elsewhere, i.e. in a worker process, to the given stage.
+        """
+        with self.__lock:
+            stage = self.stages.setdefault(name, StageMetrics())
+            stage.seconds += seconds
+            stage.calls += 1
+
+    def add_request(self, request: RequestMetrics):
+        with self.__lock:
+            self.requests.append(request)
+
+    def increment(self, name: str, value: float = 1):
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_counter(self, name: str, value: float):
+        with self.__lock:
+            self.counters[name] = value
+
+    def to_dict(self) -> Dict:
+        with self.__lock:
+            return {
+                "stages": {name: asdict(stage) for name, stage in self.stages.items()},
+                "requests": [asdict(request) for request in self.requests],
+                "counters": dict(self.counters)
+            }
+
+    def write_json(self, path: str):
+        """
+        Writes the metrics to a JSON file, creating its folder if needed.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self) -> str:
+        """
+        Returns a line per top-level stage with its wall time, for the log.
+        """
+        with self.__lock:
+            return "\n".join("{}: {:.3f}s".format(name, stage.seconds)
+                             for name, stage in self.stages.items() if "." not in name)
@@ -1,38 +1,44 @@
 from os import path
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 
 from localisation.utils import create_file
 from localisation.output.template_helper import TemplateGenerator
-from localisation.parser.sheet_parser import LocalisationRow
+from localisation.parser.sheet_parser import LocalisationRow, LocalisationTable
 
+ENUM_FILENAME_SUFFIX = "Localizations.swift"
 
-def output_enums(localisations: List[LocalisationRow],
+
+def output_enums(localisations: Union[LocalisationTable, List[LocalisationRow]],
                  template_generator: TemplateGenerator,
                  project_name: str,
-                 output_dir: str) -> str:
+                 output_dir: str,
+                 digests: Optional[Dict[str, str]] = None) -> str:
     """
     Outputs all the enums for the localisations, from the given CSV list of dicts, from which
     it builds a dictionary where the key == namespace (str), values == each case (list[str])
 
     :param localisation: The array of localisation rows from which the enums will be generated.
                          Should correspond to the input file.
+    :param digests: If it's set, the SHA-1 of the enum file is added to it, keyed by the path of the file
     """
 
     # Build an easier dict to work with for the enums
     enum_dict = __build_enum_dict(localisations=localisations)
 
     project_dict = {key: enum_dict[key] for key in enum_dict.keys()}
-    return __output_enum(dict=project_dict, template_generator=template_generator, project_name=project_name, output_dir=output_dir)
+    return __output_enum(dict=project_dict, template_generator=template_generator, project_name=project_name, output_dir=output_dir,
+                         digests=digests)
 
 
-def __output_enum(dict: Dict[str, Dict[str, List[str]]], template_generator: TemplateGenerator, project_name: str, output_dir: str) -> str:
+def __output_enum(dict: Dict[str, Dict[str, List[str]]], template_generator: TemplateGenerator, project_name: str, output_dir: str,
+                  digests: Optional[Dict[str, str]] = None) -> str:
     """
     Outputs an enum file from a dictionary
     :param dict: A dictionary where each key is an enum, and the value is a list with all the cases for said enum
     :returns: The path to the written enum
     """
-    filename = "{}Localizations.swift".format(project_name)
+    filename = "{}{}".format(project_name, ENUM_FILENAME_SUFFIX)
     with create_file(output_dir=path.join(output_dir, "enums"),
                     filename=filename) as f:
 
@@ -59,10 +65,14 @@ def __output_enum(dict: Dict[str, Dict[str, List[str]]], template_generator: Tem
                                                  project_name=project_name,
                                                  enums=enums)
         f.write(file)
-        return path.realpath(f.name)
+        enum_path = path.realpath(f.name)
+
+    if digests is not None:
+        digests[enum_path] = f.hexdigest()
+    return enum_path
 
 
-def __build_enum_dict(localisations: List[LocalisationRow]) -> Dict[str, Dict[str, List[str]]]:
+def __build_enum_dict(localisations: Union[LocalisationTable, List[LocalisationRow]]) -> Dict[str, Dict[str, List[str]]]:
     """
     returns something like...
     {
@@ -1,19 +1,47 @@
 
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from os import path
-from typing import List
+from time import perf_counter
+from typing import Dict, List, Optional, Union
 import re
 
-from localisation.parser.sheet_parser import LocalisationRow
+from localisation.metrics import Metrics
+from localisation.parser.sheet_parser import LanguageColumn, LocalisationRow, LocalisationTable
 from localisation.utils import create_file
 from localisation.output.template_helper import TemplateGenerator
 
 
-def output_localisable_strings(localisations: List[LocalisationRow], template_generator: TemplateGenerator, output_dir: str, project_name: str) -> (dict, dict):
+@dataclass
+class LanguageOutput:
+    """
+    The files written for a language, returned by the process that wrote them.
+    """
+    language: str
+    strings_path: str
+    stringsdict_path: str
+    # The SHA-1 of both files keyed by their path, hashed while they're written
+    digests: Dict[str, str]
+    rows: int
+    bytes_written: int
+    seconds: float
+
+
+def output_localisable_strings(localisations: Union[LocalisationTable, List[LocalisationRow]], template_generator: TemplateGenerator, output_dir: str, project_name: str,
+                               jobs: int = 1, digests: Optional[Dict[str, str]] = None,
+                               metrics: Optional[Metrics] = None) -> (dict, dict):
     """
     Outputs the localizable.stringsdict files into the folders
     '{output_dir}/{language_code}/
 
-    :param localisations: The localisations to be created in stringsdict format.
+    :param localisations: The localisations to be created in stringsdict format, as the table returned by
+    `parse_table` or a list of rows.
+    :param jobs: The number of processes rendering and writing the languages. Each language is rendered in the same way
+    regardless of the number of jobs, so the files are identical.
+    :param digests: If it's set, the SHA-1 of each written file is added to it, keyed by the path of the file
+    :param metrics: If it's set, the time taken by each language is recorded in it as the "render.{language}" stage,
+    along with the rows and bytes written
     :return a tuple of dict with the path for the written file, where the key is each language code, e.g.:
     {
         'pt': /path/to/pt.stringsdict,
@@ -27,38 +55,63 @@ def output_localisable_strings(localisations: List[LocalisationRow], template_ge
     plural_paths = {}
     regular_paths = {}
 
-    # First find all languages in the localisations
-    languages = set([row.language for row in localisations])
-
-    # Iterate through the languages we have in the localisations and create a dictionary for each record to be inserted
-    # into the plist file. Then, create a new file for the language and write the plist.
-    for lang in languages:
-        plural_localisation = []
-        regular_localisation = []
-        for row in localisations:
-            if row.language != lang:
-                continue
-
-            # Create the record from the localisation and append it to the list of localisations
-            if len(row.arguments) == 0:
-                regular_localisation.append(row)
-            else:
-                plist_record = __build_dict(row, template_generator)
-                plural_localisation.append(plist_record)
-
-        stringsdict_filename = f"{lang}.Localizable.stringsdict"
-        with create_file(path.join(output_dir, lang), stringsdict_filename) as f:
-            f.write(template_generator.generate_stringsdict(plural_localisation, stringsdict_filename, project_name))
-            plural_paths[lang] = path.realpath(f.name)
-
-        strings_filename = f"{lang}.localizable.strings"
-        with create_file(path.join(output_dir, lang), strings_filename) as f:
-            f.write(template_generator.generate_strings(regular_localisation, strings_filename, project_name))
-            regular_paths[lang] = path.realpath(f.name)
+    # The table has the localisations grouped by language already
+    columns = list(LocalisationTable.of(localisations).columns.values())
+    arguments = (columns, repeat(template_generator), repeat(output_dir), repeat(project_name))
+
+    if jobs > 1 and len(columns) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(columns))) as executor:
+            written = list(executor.map(__output_language, *arguments))
+    else:
+        written = list(map(__output_language, *arguments))
+
+    for output in written:
+        regular_paths[output.language] = output.strings_path
+        plural_paths[output.language] = output.stringsdict_path
+        if digests is not None:
+            digests.update(output.digests)
+        if metrics is not None:
+            metrics.add_stage("render.{}".format(output.language), output.seconds)
+            metrics.increment("rows.written", output.rows)
+            metrics.increment("bytes.written", output.bytes_written)
 
     return (regular_paths, plural_paths)
 
 
+def __output_language(column: LanguageColumn, template_generator: TemplateGenerator, output_dir: str,
+                      project_name: str) -> LanguageOutput:
+    """
+    Creates a dictionary for each record of the language to be inserted into the plist file.
+    Then, creates the stringsdict and strings files for the language.
+    """
+    start = perf_counter()
+    lang = column.language
+    # The plurals are rendered as they're written, so only one of them is in memory at a time
+    stringsdict_filename = f"{lang}.Localizable.stringsdict"
+    with create_file(path.join(output_dir, lang), stringsdict_filename) as f:
+        plurals = (__build_dict(row, template_generator) for row in column if len(row.arguments) > 0)
+        template_generator.write_stringsdict(f, plurals, stringsdict_filename, project_name)
+        stringsdict_path = path.realpath(f.name)
+    stringsdict_digest = f.hexdigest()
+    bytes_written = f.bytes_written
+
+    strings_filename = f"{lang}.localizable.strings"
+    with create_file(path.join(output_dir, lang), strings_filename) as f:
+        regular_localisation = (row for row in column if len(row.arguments) == 0)
+        template_generator.write_strings(f, regular_localisation, strings_filename, project_name)
+        strings_path = path.realpath(f.name)
+    strings_digest = f.hexdigest()
+    bytes_written += f.bytes_written
+
+    return LanguageOutput(language=lang,
+                          strings_path=strings_path,
+                          stringsdict_path=stringsdict_path,
+                          digests={strings_path: strings_digest, stringsdict_path: stringsdict_digest},
+                          rows=len(column),
+                          bytes_written=bytes_written,
+                          seconds=perf_counter() - start)
+
+
 def __build_dict(localisation, template_generator):
     """
     Builds the plist dictionary for a localisation in stringsdict format.
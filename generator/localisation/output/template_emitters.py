@@ -0,0 +1,136 @@
+"""
+Plain Python versions of the Handlebars templates in TemplateGenerator.
+
+Each emitter takes the same context as its template and returns exactly what the pybars version pinned in
+requirements.txt renders for it, including the HTML escaping of `{{value}}` and the whitespace left around standalone
+block tags, without interpreting the template on every call.
+"""
+from typing import Any, Dict, Iterable, TextIO
+
+
+def escape(value: str) -> str:
+    """
+    Escapes the value like pybars does for `{{value}}`.
+    """
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "'" in value:
+        value = value.replace("'", "&#x27;")
+    if "`" in value:
+        value = value.replace("`", "&#x60;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    return value
+
+
+def render_header(context: Dict[str, Any]) -> str:
+    return "//\n//  {}\n//  {}\n//\n//  THIS FILE IS GENERATED, DO NOT EDIT IT!\n//\n".format(
+        __escaped(context, "filename"), __escaped(context, "project_name"))
+
+
+def render_enum(context: Dict[str, Any]) -> str:
+    result = [__escaped(context, "header"), "\nimport LocalizableGoogleSheets\n"]
+    for enum in __items(context, "enum"):
+        if enum.get("enum_name_lint"):
+            result.append("\n//swiftlint:disable:next type_name")
+        result.append('\nenum {}Localizable: Localizable {{\n    static let localizationNamespace = "{}"\n\n'.format(
+            __escaped(enum, "name"), __escaped(enum, "namespace")))
+        for case in __items(enum, "case"):
+            result.append("    case ")
+            result.append(__escaped(case, "case_name"))
+            if case.get("identifier_lint"):
+                result.append(" //swiftlint:disable:this identifier_name")
+            result.append("\n")
+        result.append("}\n")
+    return "".join(result)
+
+
+STRINGSDICT_START = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+                     '<plist version="1.0">\n'
+                     '<dict>')
+STRINGSDICT_END = "\n</dict>\n</plist>"
+
+
+def render_stringsdict(context: Dict[str, Any]) -> str:
+    result = [STRINGSDICT_START]
+    for plural_template in __items(context, "plural_template"):
+        result.append("\n    ")
+        result.append(__raw(plural_template, "plural"))
+    result.append(STRINGSDICT_END)
+    return "".join(result)
+
+
+def write_stringsdict(file: TextIO, plurals: Iterable[str]):
+    """
+    Writes what render_stringsdict returns for the plurals, one plural at a time.
+    """
+    file.write(STRINGSDICT_START)
+    for plural in plurals:
+        file.write("\n    ")
+        file.write(plural)
+    file.write(STRINGSDICT_END)
+
+
+def render_plural(context: Dict[str, Any]) -> str:
+    return ("<key>{}</key>\n"
+            "<dict>\n"
+            "    <key>NSStringLocalizedFormatKey</key>\n"
+            "    <string>{}</string>\n"
+            "    {}\n"
+            "</dict>").format(__escaped(context, "key_name"),
+                              __escaped(context, "variable_string"),
+                              __raw(context, "variable_templates"))
+
+
+def render_variables(context: Dict[str, Any]) -> str:
+    result = []
+    for variable in __items(context, "variables"):
+        result.append("<key>{}</key>\n"
+                      "    <dict>\n"
+                      "        <key>NSStringFormatSpecTypeKey</key>\n"
+                      "        <string>NSStringPluralRuleType</string>\n"
+                      "        <key>NSStringFormatValueTypeKey</key>\n"
+                      "        <string>d</string>".format(__escaped(variable, "variable_name")))
+        for plural_type in __items(variable, "plural_types"):
+            result.append("\n        <key>{}</key>\n        <string>{}</string>".format(
+                __escaped(plural_type, "plural_name"), __escaped(plural_type, "plural_value")))
+        result.append("\n    </dict>")
+    return "".join(result)
+
+
+def __raw(context: Dict[str, Any], name: str) -> str:
+    """
+    Returns the value like pybars renders `{{{name}}}`.
+    """
+    value = context.get(name)
+    if value is None:
+        return ""
+    if type(value) is str:
+        return value
+    if type(value) is bool:
+        return "true" if value else "false"
+    return str(value)
+
+
+def __escaped(context: Dict[str, Any], name: str) -> str:
+    """
+    Returns the value like pybars renders `{{name}}`.
+    """
+    return escape(__raw(context, name))
+
+
+def __items(context: Dict[str, Any], name: str) -> Iterable[Any]:
+    """
+    Returns what `{{#each name}}` iterates over: the values of a dict, or the items of a list.
+    """
+    items = context.get(name)
+    if not items:
+        return []
+    if hasattr(items, "keys"):
+        return [items[key] for key in items]
+    return items
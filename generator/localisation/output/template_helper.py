@@ -1,9 +1,18 @@
 from datetime import date
 import re
 from pybars import Compiler
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Union
 
-from localisation.parser.sheet_parser import LocalisationRow
+from localisation.output import template_emitters
+from localisation.parser.sheet_parser import LocalisationRow, TableRow
+
+EMITTERS = {
+    "header": template_emitters.render_header,
+    "enum": template_emitters.render_enum,
+    "stringsdict": template_emitters.render_stringsdict,
+    "plural": template_emitters.render_plural,
+    "variables": template_emitters.render_variables
+}
 
 
 class TemplateGenerator:
@@ -53,19 +62,39 @@ enum {{name}}Localizable: Localizable {
         <string>{{plural_value}}</string>{{/each}}
     </dict>{{/each}}"""
 
-    def __init__(self):
-        self.__compiler = Compiler()
-        self.__header_template = self.__compiler.compile(TemplateGenerator.HEADER_TEMPLATE)
-        self.__enum_template = self.__compiler.compile(TemplateGenerator.ENUM_TEMPLATE)
-        self.__stringsdict_template = self.__compiler.compile(TemplateGenerator.STRINGSDICT_TEMPLATE)
-        self.__plurals_template = self.__compiler.compile(TemplateGenerator.PLURAL_TEMPLATE)
-        self.__variables_template = self.__compiler.compile(TemplateGenerator.VARIABLES_TEMPLATE)
+    # The templates compiled with pybars, shared by every generator. Compiling them takes longer than most renders
+    __pybars_templates: Optional[Dict[str, Callable[[dict], str]]] = None
+
+    def __init__(self, use_pybars: bool = False):
+        """
+        :param use_pybars: Renders the templates with pybars instead of the emitters in template_emitters, which
+        produce the same output without interpreting the templates on every render.
+        """
+        self.__use_pybars = use_pybars
+
+    @classmethod
+    def __compiled_pybars_templates(cls) -> Dict[str, Callable[[dict], str]]:
+        if cls.__pybars_templates is None:
+            compiler = Compiler()
+            cls.__pybars_templates = {
+                "header": compiler.compile(cls.HEADER_TEMPLATE),
+                "enum": compiler.compile(cls.ENUM_TEMPLATE),
+                "stringsdict": compiler.compile(cls.STRINGSDICT_TEMPLATE),
+                "plural": compiler.compile(cls.PLURAL_TEMPLATE),
+                "variables": compiler.compile(cls.VARIABLES_TEMPLATE)
+            }
+        return cls.__pybars_templates
+
+    def __render(self, template: str, context: dict) -> str:
+        if self.__use_pybars:
+            return TemplateGenerator.__compiled_pybars_templates()[template](context)
+        return EMITTERS[template](context)
 
     def generate_header(self, filename: str, project_name: str) -> str:
         """
         Generates the header for the files.
         """
-        return self.__header_template({'filename': filename,
+        return self.__render("header", {'filename': filename,
                                        'project_name': project_name,
                                        'date_created': str(date.today())})
 
@@ -78,7 +107,7 @@ enum {{name}}Localizable: Localizable {
             'enum': enums
         }
 
-        return self.__enum_template(source)
+        return self.__render("enum", source)
 
     def generate_stringsdict(self, plurals: List[str], filename: str, project_name: str) -> str:
         """
@@ -88,14 +117,40 @@ enum {{name}}Localizable: Localizable {
             'header': self.generate_header(filename, project_name),
             'plural_template': [{"plural": plural} for plural in plurals]
         }
-        return self.__stringsdict_template(source)
+        return self.__render("stringsdict", source)
+
+    def write_stringsdict(self, file: TextIO, plurals: Iterable[str], filename: str, project_name: str):
+        """
+        Writes the content of the stringsdict file as each plural is produced, without keeping them all in memory.
+        """
+        if self.__use_pybars:
+            file.write(self.generate_stringsdict(list(plurals), filename, project_name))
+        else:
+            template_emitters.write_stringsdict(file, plurals)
 
     def generate_strings(self, rows: List[LocalisationRow], filename: str, project_name: str) -> str:
         """
         Generates the content of the strings file.
         """
-        header = f"/*\n{self.generate_header(filename, project_name)}*/\n"
-        return header + "\n".join([f'"{row.key}" = "{row.translation.replace("${", "__").replace("}", "__")}";' for row in rows])
+        return self.__strings_header(filename, project_name) + "\n".join([self.__strings_line(row) for row in rows])
+
+    def write_strings(self, file: TextIO, rows: Iterable[Union[LocalisationRow, TableRow]], filename: str, project_name: str):
+        """
+        Writes the content of the strings file one row at a time.
+        """
+        file.write(self.__strings_header(filename, project_name))
+        separator = ""
+        for row in rows:
+            file.write(separator)
+            file.write(self.__strings_line(row))
+            separator = "\n"
+
+    def __strings_header(self, filename: str, project_name: str) -> str:
+        return f"/*\n{self.generate_header(filename, project_name)}*/\n"
+
+    @staticmethod
+    def __strings_line(row: Union[LocalisationRow, TableRow]) -> str:
+        return f'"{row.key}" = "{row.translation.replace("${", "__").replace("}", "__")}";'
 
     def generate_plural(self, key_name: str, variable_string: str, variables: Optional[str]) -> str:
         """
@@ -109,11 +164,11 @@ enum {{name}}Localizable: Localizable {
         if variables is not None:
             template_dict["variable_templates"] = variables
 
-        return self.__plurals_template(template_dict)
+        return self.__render("plural", template_dict)
 
     def generate_variables(self, variables) -> str:
         """
         Generates the variables xml to be used in the stringsdict template
         """
-        return self.__variables_template({"variables": variables})
+        return self.__render("variables", {"variables": variables})
 
@@ -1,51 +1,214 @@
 
-from dataclasses import dataclass
-from typing import Dict, List
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain, repeat
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple, Union
 from enum import IntEnum
 import json
+import re
+import sys
 
 from localisation import PLURAL_KEYS_VALUE
 
 PLURAL_LANGUAGE_KEY = "LANG"
+# A `${variable}` placeholder. It can't contain `$`, `{` or `}`, so every occurrence of one in a translation is found.
+PLACEHOLDER_PATTERN = re.compile(r"\$\{[^${}]*\}")
 
 @dataclass
 class Argument:
+    # Without a __dict__ per instance, as there's one per plural row
+    __slots__ = ("replace_key", "language", "values")
     replace_key: str
     language: str
     values: Dict[str, str]
 
 @dataclass
 class LocalisationRow:
+    __slots__ = ("key", "language", "translation", "arguments")
     key: str
     language: str
     translation: str
     arguments: List[Argument] # Will only be available if this is a `plural`
 
 
-def parse(validated_dicts, plurals):
+class TableRow(NamedTuple):
+    """
+    A row of a LanguageColumn, built as it's iterated over. It has the same attributes the builders read from a
+    LocalisationRow, without the language.
+    """
+    key: str
+    translation: str
+    arguments: Sequence[Argument]
+
+
+# The arguments of every row without plurals
+NO_ARGUMENTS: Tuple[Argument, ...] = ()
+# Builds a TableRow from a tuple without going through Python code, which is several times faster
+_new_table_row = partial(tuple.__new__, TableRow)
+
+
+@dataclass
+class LanguageColumn:
+    """
+    The localisations of a language, as parallel lists instead of an object per row.
+    The keys are interned, and languages with the same keys share the same list. The arguments are only stored for
+    the rows with plurals, and rows with the same plurals share the same tuple.
+    """
+    __slots__ = ("language", "keys", "translations", "arguments")
+    language: str
+    keys: List[str]
+    translations: List[str]
+    # The arguments of the rows with plurals, keyed by the position of the row
+    arguments: Dict[int, Tuple[Argument, ...]]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[TableRow]:
+        arguments = map(self.arguments.get, range(len(self.keys)), repeat(NO_ARGUMENTS))
+        return map(_new_table_row, zip(self.keys, self.translations, arguments))
+
+
+@dataclass
+class LocalisationTable:
+    """
+    The parsed localisations, a LanguageColumn per language. Iterating over it returns the rows of every language,
+    in order, like the list of LocalisationRow returned by `parse`.
+    """
+    columns: Dict[str, LanguageColumn] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(column) for column in self.columns.values())
+
+    def __iter__(self) -> Iterator[TableRow]:
+        return chain.from_iterable(self.columns.values())
+
+    def to_rows(self) -> List[LocalisationRow]:
+        """
+        Returns a LocalisationRow per row, each with its own list of arguments.
+        """
+        return [LocalisationRow(key=row.key, language=column.language, translation=row.translation,
+                                arguments=list(row.arguments))
+                for column in self.columns.values() for row in column]
+
+    @staticmethod
+    def of(localisations: Union["LocalisationTable", List[LocalisationRow]]) -> "LocalisationTable":
+        """
+        Returns the localisations as a table, building it if they're a list of LocalisationRow.
+        """
+        if isinstance(localisations, LocalisationTable):
+            return localisations
+
+        table = LocalisationTable()
+        for row in localisations:
+            column = table.columns.get(row.language)
+            if column is None:
+                column = LanguageColumn(language=row.language, keys=[], translations=[], arguments={})
+                table.columns[row.language] = column
+            if row.arguments:
+                column.arguments[len(column.keys)] = tuple(row.arguments)
+            column.keys.append(row.key)
+            column.translations.append(row.translation)
+        return table
+
+
+def parse(validated_dicts, plurals) -> List[LocalisationRow]:
     """
     Parses a set of dictionaries and plurals into a list of LocalisationRow objects.
     """
+    return parse_table(validated_dicts, plurals).to_rows()
+
+
+def parse_table(validated_dicts, plurals) -> LocalisationTable:
+    """
+    Parses a set of dictionaries and plurals into a LocalisationTable, which takes a fraction of the memory of a
+    LocalisationRow per row.
+    """
     arguments = []
 
     # Get the number of variables
     items_count = len(plurals.get(PLURAL_KEYS_VALUE, []))
+    plural_columns = [(key, value) for key, value in plurals.items() if key != PLURAL_KEYS_VALUE and key != PLURAL_LANGUAGE_KEY]
     for x in range(items_count):
         # For each key in the plurals dictionary, go through its array based on the index from the number of variables
-        arg = Argument(replace_key=plurals.get(PLURAL_KEYS_VALUE)[x], language=plurals.get(PLURAL_LANGUAGE_KEY)[x], values={})
+        arg = Argument(replace_key=sys.intern(plurals.get(PLURAL_KEYS_VALUE)[x]),
+                       language=sys.intern(plurals.get(PLURAL_LANGUAGE_KEY)[x]), values={})
         values = {}
-        for key, value in filter(lambda k: (k[0] != PLURAL_KEYS_VALUE and k[0] != PLURAL_LANGUAGE_KEY), plurals.items()):
-            if value[x:]:
+        for key, value in plural_columns:
+            if x < len(value):
                 values[key.lower()] = value[x]
         arg.values = values
         arguments.append(arg)
 
-    rows = []
+    arguments_index = __build_arguments_index(arguments)
+
+    table = LocalisationTable()
+    shared_keys: List[str] = []
     for language, translations in validated_dicts.items():
-        for key, translation in translations.items():
-            arguments_for_key = list(filter(lambda arg: arg.replace_key in translation and arg.language == language, arguments))
-            row = LocalisationRow(key=key, language=language, translation=translation, arguments=arguments_for_key)
-            rows.append(row)
+        keys = list(translations.keys())
+        if keys == shared_keys:
+            keys = shared_keys
+        else:
+            keys = [sys.intern(key) for key in keys]
+            shared_keys = keys
+
+        language_index = arguments_index.get(language, ArgumentsIndex())
+        # The same arguments found in several rows, keyed by their positions in the plurals
+        shared_arguments: Dict[Tuple[int, ...], Tuple[Argument, ...]] = {}
+        arguments_by_row = {}
+        for position, translation in enumerate(translations.values()):
+            found = __arguments_in_translation(translation, language_index)
+            if found:
+                positions = tuple(argument_position for argument_position, _ in found)
+                arguments_for_key = shared_arguments.get(positions)
+                if arguments_for_key is None:
+                    arguments_for_key = tuple(argument for _, argument in found)
+                    shared_arguments[positions] = arguments_for_key
+                arguments_by_row[position] = arguments_for_key
+
+        table.columns[language] = LanguageColumn(language=language,
+                                                 keys=keys,
+                                                 translations=list(translations.values()),
+                                                 arguments=arguments_by_row)
+
+    return table
+
+
+@dataclass
+class ArgumentsIndex:
+    # The arguments of a language by their placeholder, i.e. {"${x}": [(0, Argument), ...]}, with their position in the plurals
+    placeholders: Dict[str, List[Tuple[int, Argument]]] = field(default_factory=dict)
+    # The arguments whose `replace_key` isn't a single placeholder, which have to be searched for in every translation
+    others: List[Tuple[int, Argument]] = field(default_factory=list)
+
+
+def __build_arguments_index(arguments: List[Argument]) -> Dict[str, ArgumentsIndex]:
+    """
+    Indexes the arguments by language and placeholder, keeping the position of each one in the plurals.
+    """
+    index = {}
+    for position, argument in enumerate(arguments):
+        language_index = index.setdefault(argument.language, ArgumentsIndex())
+        if PLACEHOLDER_PATTERN.fullmatch(argument.replace_key):
+            language_index.placeholders.setdefault(argument.replace_key, []).append((position, argument))
+        else:
+            language_index.others.append((position, argument))
+    return index
+
+
+def __arguments_in_translation(translation: str, language_index: ArgumentsIndex) -> List[Tuple[int, Argument]]:
+    """
+    Returns the arguments whose `replace_key` is in the translation, with their position, in the same order as in
+    the plurals.
+    """
+    found = []
+    if language_index.placeholders:
+        for placeholder in set(PLACEHOLDER_PATTERN.findall(translation)):
+            found.extend(language_index.placeholders.get(placeholder, []))
+    for position, argument in language_index.others:
+        if argument.replace_key in translation:
+            found.append((position, argument))
 
-    return rows
-  
\ No newline at end of file
+    if len(found) > 1:
+        found.sort(key=lambda item: item[0])
+    return found
@@ -1,27 +1,33 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
 from time import time
 
 import os
 from enum import Enum, auto
-from string import ascii_uppercase
 from typing import Dict, List, Optional, Tuple, TypeVar, NewType
 from tempfile import gettempdir
 
-from localisation.utils import create_checksum
+from localisation.utils import create_checksum, create_file, generator_fingerprint, hash_snapshot
 from localisation.validator import validate, validate_plurals
 from localisation.file_copying import copy_xcode_files
-from localisation.output.enum_builder import output_enums
+from localisation.output.enum_builder import ENUM_FILENAME_SUFFIX, output_enums
 from localisation.output.stringsfile_builder import output_localisable_strings
-from localisation.googlesheethelper import GoogleSheetHelper
+from localisation.googlesheethelper import GoogleSheetHelper, MissingWorksheetError
 from localisation.output.template_helper import TemplateGenerator
 from localisation.output.csv_builder import build_csv, build_localisations
-from localisation import CHECKSUM_FILENAME, PLURAL_KEYS_VALUE
-from localisation.parser.sheet_parser import parse
+from localisation import CHECKSUM_FILENAME, KEYS_VALUE, PLURAL_KEYS_VALUE, SNAPSHOT_FILENAME
+from localisation.parser.sheet_parser import parse_table
+from localisation.project_index import ProjectIndex, load_project_index, save_project_index
+from localisation.metrics import Metrics
+from localisation.sources import SheetSource, merge_localisations
 
 KEYS_ROW = 1
+MAX_SOURCE_WORKERS = 8
 PLURALS_VALUE = "plurals"
-KEYS_VALUE = "key"
 PLURALS_START_ROW = 1
+LOCALISATIONS_CSV_NAME = "translations.csv"
+PLURALS_CSV_NAME = "plurals.csv"
 
 
 class FilepathKey(Enum):
@@ -30,6 +36,15 @@ class FilepathKey(Enum):
     stringsdict = auto()
     strings = auto()
     checksum = auto()
+    # The hash of the snapshot the files were generated from, saved once they're copied
+    snapshot = auto()
+
+
+class MissingKeysError(Exception):
+    """
+    Raised when a worksheet doesn't have the column with the app keys, or the Plurals sheet the one with the plural
+    variables.
+    """
 
 
 class Localisation:
@@ -38,34 +53,79 @@ class Localisation:
                  google_sheet_helper: GoogleSheetHelper,
                  template_generator: TemplateGenerator,
                  output_dir: Optional[str],
-                 project_dir: str):
+                 project_dir: str,
+                 concurrent_fetch: bool = False,
+                 sources: Optional[List[SheetSource]] = None,
+                 jobs: int = 1,
+                 locale_fallbacks: Optional[Dict[str, str]] = None,
+                 project_name: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 rescan_project: bool = False,
+                 metrics: Optional[Metrics] = None):
+        """
+        :param sources: The worksheets to fetch the translations from, instead of the sheet of the google_sheet_helper.
+        Plurals are always fetched from the google_sheet_helper.
+        :param jobs: The number of processes writing the files of each language
+        :param locale_fallbacks: The lproj locale each locale is copied to when the project has no lproj for it,
+        i.e. {"pt": "pt-PT"}
+        :param project_name: The name of the project. If it's not set, it's the name of the first xcworkspace in the
+        project dir.
+        :param cache_dir: The folder the index of the project is cached in, so the project isn't walked on every run
+        :param rescan_project: Walks the project even if its cached index is up to date
+        :param metrics: Records the time taken by each stage, and counters such as the rows and bytes written
+        """
         self.__google_sheet_helper = google_sheet_helper
+        self.__concurrent_fetch = concurrent_fetch
+        self.__sources = sources
+        self.__jobs = jobs
+        self.__locale_fallbacks = locale_fallbacks
         self.__template_generator = template_generator
         self.__output_dir = output_dir if output_dir else "../output/{}".format(int(time()))
         self.__project_dir = project_dir if os.path.isabs(project_dir) \
             else os.path.join(os.path.dirname(os.path.abspath(__file__)), project_dir)
         print("Xcode project path is {}".format(self.__project_dir))
 
-        self.__project_name = None
-        for root, dirs, files in os.walk(self.__project_dir):
-            for dir in (dir for dir in dirs if dir.lower().endswith("xcworkspace")):
-                self.__project_name = dir.split(".")[0]
-                break
-            if self.__project_name:
-                break
+        self.__cache_dir = cache_dir
+        self.__rescan_project = rescan_project
+        self.__metrics = metrics if metrics is not None else Metrics()
+        self.__project_index: Optional[ProjectIndex] = None
+
+        self.__project_name = project_name
+        if not self.__project_name:
+            workspace = self.__get_project_index().workspace
+            self.__project_name = workspace.split(".")[0] if workspace else None
 
-    def __get_keys_row(self) -> Dict:
+    def __get_project_index(self) -> ProjectIndex:
         """
-        Returns a dict built from the row with the keys and locales.
-        Dict format: {'key': 'column letter (i.e. A, B, C...)', 'locale1': 'column letter (i.e. A, B, C...)', 'locale2: 'column letter (i.e. A, B, C...)', ...}
+        Returns the index of the project dir, walking it only the first time and if its cached index is out of date.
+        """
+        if self.__project_index is None:
+            with self.__metrics.stage("index_project"):
+                self.__project_index = load_project_index(self.__project_dir,
+                                                          cache_dir=self.__cache_dir,
+                                                          tracked=Localisation.__is_copied_file,
+                                                          rescan=self.__rescan_project)
+        return self.__project_index
+
+    @staticmethod
+    def __is_copied_file(filename: str) -> bool:
+        """
+        Returns whether a file with this name in the project can be replaced by a generated one.
+        """
+        return filename in (LOCALISATIONS_CSV_NAME, PLURALS_CSV_NAME, CHECKSUM_FILENAME) or \
+            filename.upper().endswith(ENUM_FILENAME_SUFFIX.upper())
 
-        Throws KeyError and IndexError
+    def __get_keys_row(self, sheet_helper: GoogleSheetHelper) -> Dict:
+        """
+        Returns a dict built from the row with the keys and locales.
+        Dict format: {'key': 'column letters (i.e. A, B, ..., Z, AA, AB...)', 'locale1': 'column letter (i.e. A, B, C...)', 'locale2: 'column letter (i.e. A, B, C...)', ...}
         """
         dict = {}
-        key_values = self.__google_sheet_helper.get_values(start_at=KEYS_ROW)
-        key_values_array = key_values[0]
+        key_values = sheet_helper.get_values(start_at=KEYS_ROW)
+        key_values_array = key_values[0] if key_values else []
 
-        for value, column in zip(key_values_array, ascii_uppercase):
+        for index, value in enumerate(key_values_array):
+            column = sheet_helper.get_column_letter(index)
             value = value.partition("-")[0].strip()
             if not value:
                 continue
@@ -85,21 +145,20 @@ class Localisation:
         """
         dict = {}
         key_values = self.__google_sheet_helper.get_plurals_values(start_at=PLURALS_START_ROW)
-        key_values_array = key_values[0]
+        key_values_array = key_values[0] if key_values else []
 
-        for value, column in zip(key_values_array, ascii_uppercase):
+        for index, value in enumerate(key_values_array):
             if not value: continue
             if value == "EXAMPLE": continue
 
-            dict[value] = column
+            dict[value] = self.__google_sheet_helper.get_column_letter(index)
         return dict
 
-    def __build_localisation_dict(self, keys_dict: Dict) -> Dict:
+    def __build_localisation_dict(self, keys_dict: Dict, sheet_helper: GoogleSheetHelper) -> Dict:
         """
-        Builds and returns a dict with all the keys and localizations
+        Builds and returns a dict with all the keys and localizations, fetching every column in a single request.
         The key is either the literal string 'key' or the locale.
         The value for each is an array of strings for each row.
-        Throws KeyError and IndexError
         :return:
         {
             "key": ["some.key", "another.key"],
@@ -108,105 +167,242 @@ class Localisation:
         }
         """
 
+        columns = sheet_helper.get_columns(columns=list(keys_dict.values()))
+
         localisation_values = {}
-        for key in keys_dict.keys():
-            localisation_values[key] = [array[0] if array else "" for array in
-                                        self.__google_sheet_helper.get_values(start_at=keys_dict[key])[KEYS_ROW:]]
+        for key, column in keys_dict.items():
+            localisation_values[key] = columns.get(column, [])[KEYS_ROW:]
 
         return localisation_values
 
     def __build_plurals(self, plural_keys: Dict) -> Dict:
+        """
+        Builds and returns a dict with all the plurals, fetching every plural column in a single request.
+        The key is the plural column header, i.e. 'VARIABLE', 'LANG', 'ONE'...
+        The value for each is an array of strings for each row.
+        """
+        columns = self.__google_sheet_helper.get_plurals_columns(columns=list(plural_keys.values()))
+
         plurals = {}
-        for key in plural_keys.keys():
-            plurals[key] = [array[0] if array else "" for array in
-                            self.__google_sheet_helper.get_plurals_values(start_at=plural_keys[key])[
-                            PLURALS_START_ROW:]]
+        for key, column in plural_keys.items():
+            plurals[key] = columns.get(column, [])[PLURALS_START_ROW:]
         return plurals
 
-    def localise(self, skip_csv_generation: bool) -> Optional[dict]:
+    def __fetch_translations(self) -> Dict:
+        """
+        Fetches the Translations sheet, or all the worksheets of the sources, and returns the localisation dict.
+        Throws MissingKeysError if a sheet doesn't have a column with the app keys.
+        """
+        if self.__sources:
+            return self.__fetch_sources()
+        return self.__fetch_worksheet(self.__google_sheet_helper)
+
+    def __fetch_worksheet(self, sheet_helper: GoogleSheetHelper) -> Dict:
+        """
+        Fetches the translations worksheet of the helper and returns its localisation dict.
+        Throws MissingKeysError if the sheet doesn't have a column with the app keys.
+        """
+        keys = self.__get_keys_row(sheet_helper)
+        if KEYS_VALUE not in keys:
+            raise MissingKeysError("A worksheet has no '{}' column".format(KEYS_VALUE))
+        return self.__build_localisation_dict(keys, sheet_helper)
+
+    def __fetch_sources(self) -> Dict:
+        """
+        Fetches every worksheet matching the sources in parallel, and merges them into a single localisation dict.
+        Keys defined in more than one worksheet are reported, and only their first definition is used.
+        """
+        def matching_worksheets(source: SheetSource) -> List[Tuple[str, GoogleSheetHelper]]:
+            spreadsheet = self.__google_sheet_helper.with_spreadsheet(spreadsheet_id=source.spreadsheet_id,
+                                                                      sheet_name=source.worksheet_pattern)
+            names = [name for name in spreadsheet.get_sheet_names() if fnmatchcase(name, source.worksheet_pattern)]
+            if not names:
+                print("WARNING: No worksheet in {} matches '{}'".format(source.spreadsheet_id, source.worksheet_pattern))
+            return [("{}/{}".format(source.spreadsheet_id, name),
+                     spreadsheet.with_spreadsheet(spreadsheet_id=source.spreadsheet_id, sheet_name=name))
+                    for name in names]
+
+        def fetch(worksheet: Tuple[str, GoogleSheetHelper]) -> Tuple[str, Dict]:
+            origin, sheet_helper = worksheet
+            print("Fetching translations from {}".format(origin))
+            return origin, self.__fetch_worksheet(sheet_helper)
+
+        with ThreadPoolExecutor(max_workers=MAX_SOURCE_WORKERS) as executor:
+            worksheets = [worksheet for worksheets in executor.map(matching_worksheets, self.__sources)
+                          for worksheet in worksheets]
+            localisations = list(executor.map(fetch, worksheets))
+
+        merge_result = merge_localisations(localisations, header_rows=KEYS_ROW)
+        for conflict in merge_result.conflicts:
+            print("Key '{}' is defined in more than one worksheet, using the first one: {}"
+                  .format(conflict.key, ", ".join(conflict.origins)))
+        return merge_result.result
+
+    def __fetch_plurals(self) -> Dict:
+        """
+        Fetches the Plurals sheet and returns the plurals dict.
+        Throws MissingKeysError if the sheet doesn't have a column with the plural variables.
+        """
+        plural_keys = self.__get_plural_keys_row()
+        if PLURAL_KEYS_VALUE not in plural_keys:
+            raise MissingKeysError("The plurals sheet has no '{}' column".format(PLURAL_KEYS_VALUE))
+        return self.__build_plurals(plural_keys)
+
+    def __fetch_sheets(self) -> Tuple[Dict, Dict]:
+        """
+        Fetches the Translations and the Plurals sheets.
+        They don't depend on each other, so in concurrent mode both are requested at the same time.
+        :return: A tuple with the localisation dict and the plurals dict
+        """
+        if not self.__concurrent_fetch:
+            return self.__fetch_translations(), self.__fetch_plurals()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            translations = executor.submit(self.__fetch_translations)
+            plurals = executor.submit(self.__fetch_plurals)
+            return translations.result(), plurals.result()
+
+    def __is_up_to_date(self, snapshot_hash: str) -> bool:
+        """
+        Returns `True` if the files in the output dir were generated from a snapshot with the given hash.
+        """
+        snapshot_path = os.path.join(self.__output_dir, SNAPSHOT_FILENAME)
+        if not os.path.exists(snapshot_path):
+            return False
+        with open(snapshot_path) as f:
+            return f.read().strip() == snapshot_hash
+
+    def __save_snapshot_hash(self, snapshot_hash: str):
+        """
+        Saves the hash of the snapshot the files in the output dir were generated from.
+        """
+        with create_file(output_dir=self.__output_dir, filename=SNAPSHOT_FILENAME) as f:
+            f.write(snapshot_hash)
+
+    def localise(self, skip_csv_generation: bool, force: bool = False) -> Optional[dict]:
         """
         Starts the process of creating the localised files.
         Builds a localisation dictionary
+        Returns `None` without generating anything if the spreadsheet, the options and the generator haven't changed
+        since the last run with the same output dir whose files were copied, unless `force` is `True`.
         """
         # If we're skipping past the CSV generation we don't have to:
         # Download the sheet
         # Build the CSV
         localisation_dict = {}
         plurals_dict = {}
-        localisations_csv_name = "translations.csv"
-        plurals_csv_name = "plurals.csv"
+        localisations_csv_name = LOCALISATIONS_CSV_NAME
+        plurals_csv_name = PLURALS_CSV_NAME
         if skip_csv_generation:
             csv_locations = [os.path.join(self.__project_dir, filename) for filename in
                              [localisations_csv_name, plurals_csv_name]]
-            locs = build_localisations(csv_locations=csv_locations)
+            with self.__metrics.stage("read_csv"):
+                locs = build_localisations(csv_locations=csv_locations)
             localisation_dict = locs[0]
             plurals_dict = locs[1]
         else:
-            keys = self.__get_keys_row()
-            plural_keys = self.__get_plural_keys_row()
             try:
-                keys_column = keys[KEYS_VALUE]
-                plural_keys_column = plural_keys[PLURAL_KEYS_VALUE]
-            except KeyError:
-                print("The file needs a row with the app keys and a plurals sheet!")
+                with self.__metrics.stage("fetch"):
+                    localisation_dict, plurals_dict = self.__fetch_sheets()
+            except (MissingKeysError, MissingWorksheetError) as error:
+                print("{}. The file needs a row with the app keys and a plurals sheet!".format(error))
                 sys.exit(-1)
+        self.__metrics.set_counter("rows.keys", len(localisation_dict.get(KEYS_VALUE, [])))
+        self.__metrics.set_counter("rows.plurals", len(plurals_dict.get(PLURAL_KEYS_VALUE, [])))
+        self.__metrics.set_counter("languages", len([key for key in localisation_dict.keys() if key != KEYS_VALUE]))
+
+        snapshot_hash = hash_snapshot(localisation_dict, plurals_dict, self.__project_name,
+                                      self.__locale_fallbacks or {}, skip_csv_generation, generator_fingerprint())
+        if not force and self.__is_up_to_date(snapshot_hash):
+            print("Localisations are up to date, nothing to generate")
+            return None
 
-            localisation_dict = self.__build_localisation_dict(keys)
-            plurals_dict = self.__build_plurals(plural_keys)
+        if not skip_csv_generation:
             # Save into a new set of CSV files
-            files = build_csv(localisation_dict, plurals_dict, localisations_csv_name, plurals_csv_name,
-                              output_dir=os.path.join(self.__output_dir, "csv"))
+            with self.__metrics.stage("csv"):
+                files = build_csv(localisation_dict, plurals_dict, localisations_csv_name, plurals_csv_name,
+                                  output_dir=os.path.join(self.__output_dir, "csv"))
 
         # Validate
-        validated_dicts = {}
-        for localisation in filter(lambda x: (x != KEYS_VALUE), localisation_dict.keys()):
-            print("Validating localisation for {}".format(localisation))
-            validation_result = validate(localisation, localisation_dict[KEYS_VALUE],
-                                         localisation_dict[localisation])
-            validated_dicts[localisation] = validation_result.result
-            for missing_key in validation_result.missing_keys:
-                print("Missing key for value '{}'".format(missing_key))
-            for missing_value in validation_result.missing_values:
-                print("Missing {} value for key '{}'".format(missing_value.localisation, missing_value.key))
-
-        # Validate plurals
-        validated_plurals = validate_plurals(plurals_dict)
+        with self.__metrics.stage("validate"):
+            validated_dicts = {}
+            for localisation in filter(lambda x: (x != KEYS_VALUE), localisation_dict.keys()):
+                print("Validating localisation for {}".format(localisation))
+                validation_result = validate(localisation, localisation_dict[KEYS_VALUE],
+                                             localisation_dict[localisation])
+                validated_dicts[localisation] = validation_result.result
+                for missing_key in validation_result.missing_keys:
+                    print("Missing key for value '{}'".format(missing_key))
+                for missing_value in validation_result.missing_values:
+                    print("Missing {} value for key '{}'".format(missing_value.localisation, missing_value.key))
+
+            # Validate plurals
+            validated_plurals = validate_plurals(plurals_dict)
 
         # For each localisation, for each variable, combine them
-        parsed_localisations = parse(validated_dicts, validated_plurals)
-
-        localisables = output_localisable_strings(localisations=parsed_localisations,
-                                                  template_generator=self.__template_generator,
-                                                  output_dir=self.__output_dir,
-                                                  project_name=self.__project_name)
-        enum_paths = output_enums(localisations=parsed_localisations,
-                                  template_generator=self.__template_generator,
-                                  project_name=self.__project_name,
-                                  output_dir=self.__output_dir)
-        checksum_path = create_checksum(strings_paths=localisables,
-                                        filename=CHECKSUM_FILENAME,
-                                        output_dir=self.__output_dir)
+        with self.__metrics.stage("parse"):
+            parsed_localisations = parse_table(validated_dicts, validated_plurals)
+        self.__metrics.set_counter("rows.parsed", len(parsed_localisations))
+
+        # The SHA-1 of each generated file, hashed as they're written, for the checksum
+        digests = {}
+        with self.__metrics.stage("render"):
+            localisables = output_localisable_strings(localisations=parsed_localisations,
+                                                      template_generator=self.__template_generator,
+                                                      output_dir=self.__output_dir,
+                                                      project_name=self.__project_name,
+                                                      jobs=self.__jobs,
+                                                      digests=digests,
+                                                      metrics=self.__metrics)
+        with self.__metrics.stage("enums"):
+            enum_paths = output_enums(localisations=parsed_localisations,
+                                      template_generator=self.__template_generator,
+                                      project_name=self.__project_name,
+                                      output_dir=self.__output_dir,
+                                      digests=digests)
+        with self.__metrics.stage("checksum"):
+            checksum_path = create_checksum(strings_paths=localisables,
+                                            filename=CHECKSUM_FILENAME,
+                                            output_dir=self.__output_dir,
+                                            digests=digests,
+                                            enum_path=enum_paths,
+                                            locale_fallbacks=self.__locale_fallbacks)
 
         file_paths = {
             FilepathKey.enums: enum_paths, 
             FilepathKey.stringsdict: localisables[1],
             FilepathKey.strings: localisables[0], 
             FilepathKey.checksum: checksum_path,
-            FilepathKey.csv: files if not skip_csv_generation else []
+            FilepathKey.csv: files if not skip_csv_generation else [],
+            FilepathKey.snapshot: snapshot_hash
         }
-
         return file_paths
 
-    def copy_files(self, paths_to_copy: dict):
+    def copy_files(self, paths_to_copy: dict) -> bool:
         """
         Copies all the files generated to the project directory.
+        Only once every file was copied, the hash of the snapshot they were generated from is saved, so the next run
+        with the same snapshot skips them. Otherwise they're generated and copied again.
+        The cached index of the project is saved again too, so the files replaced don't make the next run walk it.
+        Returns `True` if every file was copied.
         """
         if not self.__project_dir:
             print("Skipping xcode file copy, missing path")
-            return
+            return False
         csv_path = paths_to_copy[FilepathKey.csv]
         enum_path = paths_to_copy[FilepathKey.enums]
         stringsdict_path = paths_to_copy[FilepathKey.stringsdict]
         strings_path = paths_to_copy[FilepathKey.strings]
         checksum_path = paths_to_copy[FilepathKey.checksum]
-        copy_xcode_files(csv_path, enum_path, stringsdict_path, strings_path, checksum_path, self.__project_dir)
+        project_index = self.__get_project_index()
+        with self.__metrics.stage("copy"):
+            copied = copy_xcode_files(csv_path, enum_path, stringsdict_path, strings_path, checksum_path,
+                                      self.__project_dir, locale_fallbacks=self.__locale_fallbacks,
+                                      project_index=project_index)
+        if copied:
+            self.__save_snapshot_hash(paths_to_copy[FilepathKey.snapshot])
+            # Replacing the files changed the modification times of their directories. Otherwise the project is
+            # walked again, picking up the files the copy added.
+            if self.__cache_dir:
+                save_project_index(self.__project_dir, self.__cache_dir, project_index)
+        return copied
@@ -1,8 +1,16 @@
 # Set up the command line app
 import argparse
-from typing import Optional
+import cProfile
+import pstats
+from typing import Dict, List, Optional
 
 from googlesheethelper import GoogleSheetHelper
+from snapshot_cache import SnapshotCache
+from request_scheduler import RequestScheduler
+from transport import SheetsTransport, TransportConfig
+from sources import SheetSource
+from locales import parse_locale_fallback
+from metrics import Metrics
 from process_localisation import Localisation
 from output.template_helper import TemplateGenerator
 
@@ -15,7 +23,24 @@ def main(spreadsheet_id: str,
          credentials: str,
          output_dir: Optional[str],
          project_dir: Optional[str],
-         skip_csv: bool = False) -> None:
+         skip_csv: bool = False,
+         concurrent_fetch: bool = False,
+         force: bool = False,
+         cache_dir: Optional[str] = None,
+         cache_max_age: Optional[float] = None,
+         cache_max_entries: Optional[int] = None,
+         cache_max_bytes: Optional[int] = None,
+         requests_per_minute: Optional[float] = None,
+         max_retries: int = 5,
+         http_timeout: float = 60.0,
+         gzip: bool = True,
+         sources: Optional[List[SheetSource]] = None,
+         jobs: int = 1,
+         locale_fallbacks: Optional[Dict[str, str]] = None,
+         project_name: Optional[str] = None,
+         rescan_project: bool = False,
+         metrics_json: Optional[str] = None,
+         api_endpoint: Optional[str] = None) -> None:
     
     print('spreadsheet id: {}'.format(spreadsheet_id))
     print('sheet name: {}'.format(sheet_name))
@@ -23,19 +48,63 @@ def main(spreadsheet_id: str,
     print('output dir: {}'.format(output_dir))
     print('project dir: {}'.format(project_dir))
     print('skip csv: {}'.format(skip_csv))
+    print('concurrent fetch: {}'.format(concurrent_fetch))
+    print('force: {}'.format(force))
+    print('cache dir: {}'.format(cache_dir))
+    print('requests per minute: {}'.format(requests_per_minute))
+    print('http timeout: {}'.format(http_timeout))
+    print('gzip: {}'.format(gzip))
+    print('sources: {}'.format(sources))
+    print('jobs: {}'.format(jobs))
+    print('locale fallbacks: {}'.format(locale_fallbacks))
+    print('project name: {}'.format(project_name))
+    print('metrics json: {}'.format(metrics_json))
+    print('api endpoint: {}'.format(api_endpoint))
+
+    snapshot_cache = None
+    if cache_dir:
+        snapshot_cache = SnapshotCache(directory=cache_dir,
+                                       max_age=cache_max_age,
+                                       max_entries=cache_max_entries,
+                                       max_bytes=cache_max_bytes)
+    request_scheduler = RequestScheduler(requests_per_minute=requests_per_minute, max_retries=max_retries)
+    transport = SheetsTransport(TransportConfig(timeout=http_timeout, gzip=gzip))
+    metrics = Metrics()
 
     google_sheet_helper = GoogleSheetHelper(scopes=SCOPES,
                                             credentials=credentials,
                                             spreadsheet_id=spreadsheet_id,
                                             sheet_name=sheet_name,
-                                            plurals_sheet_name=plurals_sheet_name)
+                                            plurals_sheet_name=plurals_sheet_name,
+                                            snapshot_cache=snapshot_cache,
+                                            request_scheduler=request_scheduler,
+                                            transport=transport,
+                                            metrics=metrics,
+                                            api_endpoint=api_endpoint)
     template_helper = TemplateGenerator()
 
-    localisation = Localisation(google_sheet_helper, template_helper, output_dir, project_dir)
-    paths_written = localisation.localise(skip_csv_generation=skip_csv)
+    localisation = Localisation(google_sheet_helper, template_helper, output_dir, project_dir,
+                                concurrent_fetch=concurrent_fetch, sources=sources, jobs=jobs,
+                                locale_fallbacks=locale_fallbacks, project_name=project_name,
+                                cache_dir=cache_dir, rescan_project=rescan_project, metrics=metrics)
+    with metrics.stage("localise"):
+        paths_written = localisation.localise(skip_csv_generation=skip_csv, force=force)
+    print("Made {} Sheets API requests, {} retried, waited {:.2f}s for the rate limit and {:.2f}s backing off"
+          .format(request_scheduler.requests, request_scheduler.retries,
+                  request_scheduler.throttled_seconds, request_scheduler.backoff_seconds))
+    transport.close()
     if paths_written:
         localisation.copy_files(paths_to_copy=paths_written)
 
+    metrics.set_counter("api.requests", request_scheduler.requests)
+    metrics.set_counter("api.retries", request_scheduler.retries)
+    metrics.set_counter("api.throttled_seconds", request_scheduler.throttled_seconds)
+    metrics.set_counter("api.backoff_seconds", request_scheduler.backoff_seconds)
+    print(metrics.summary())
+    if metrics_json:
+        metrics.write_json(metrics_json)
+        print("Wrote metrics to {}".format(metrics_json))
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("--credentials", help="Path to Google Cloud credentials with Google Sheets read permissions")
@@ -46,6 +115,61 @@ if __name__ == '__main__':
     parser.add_argument("--project-dir", help="Xcode Project directory")
     parser.add_argument("--skip-csv", action='store_true',
                         help="Skips generation of csv representation and retrieves it instead from project-dir")
+    parser.add_argument("--concurrent-fetch", action='store_true',
+                        help="Fetches the translations and plurals sheets at the same time")
+    parser.add_argument("--force", action='store_true',
+                        help="Generates the files even if the spreadsheet hasn't changed since the last run")
+    parser.add_argument("--cache-dir", help="Folder to cache the fetched sheets in. The sheets aren't cached if it's not set")
+    parser.add_argument("--cache-max-age", type=float, default=600,
+                        help="Seconds a cached sheet can be used for (defaults to 600)")
+    parser.add_argument("--cache-max-entries", type=int, default=64,
+                        help="Maximum number of cached responses, the least recently used are removed (defaults to 64)")
+    parser.add_argument("--cache-max-bytes", type=int, default=50 * 1024 * 1024,
+                        help="Maximum size of the cache in bytes, the least recently used are removed (defaults to 50MB)")
+    parser.add_argument("--requests-per-minute", type=float,
+                        help="Maximum number of Sheets API requests per minute. Not limited if it's not set")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Times a request is retried after a quota or server error (defaults to 5)")
+    parser.add_argument("--http-timeout", type=float, default=60.0,
+                        help="Seconds to wait for each Sheets API response (defaults to 60)")
+    parser.add_argument("--no-gzip", action='store_true', help="Doesn't ask for gzipped Sheets API responses")
+    parser.add_argument("--source", action='append', type=SheetSource.parse, dest="sources",
+                        help="Worksheets to fetch the translations from instead of --sheet-name, as "
+                             "'spreadsheet_id:worksheet_pattern', i.e. 'abc123:Translations*'. Can be repeated, "
+                             "the plurals are still fetched from --sheet-id")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of processes writing the files of each language (defaults to 1)")
+    parser.add_argument("--locale-fallback", action='append', type=parse_locale_fallback, dest="locale_fallbacks",
+                        help="lproj locale to copy a locale to when the project has no lproj for it, as "
+                             "'locale=lproj_locale', i.e. 'pt=pt-PT'. Can be repeated")
+    parser.add_argument("--project-name",
+                        help="Name of the project, used for the enum. Defaults to the name of the first xcworkspace "
+                             "in project-dir")
+    parser.add_argument("--rescan-project", action='store_true',
+                        help="Walks project-dir even if its index cached in cache-dir is up to date")
+    parser.add_argument("--metrics-json",
+                        help="Path to write the time taken by each stage, the Sheets API requests made and the rows "
+                             "and bytes written to, as JSON")
+    parser.add_argument("--profile",
+                        help="Path to dump cProfile stats of the run to, readable with pstats. The slowest functions "
+                             "are printed as well. Processes started with --jobs aren't profiled")
+    parser.add_argument("--api-endpoint",
+                        help="Root URL of the Sheets API to use instead of Google's, i.e. a local fake one like "
+                             "http://127.0.0.1:8080. Its requests aren't authorised, so --credentials isn't needed")
     args = parser.parse_args()
 
-    main(args.sheet_id, args.sheet_name, args.plurals_sheet_name, args.credentials, args.output, args.project_dir, args.skip_csv)
+    main_args = (args.sheet_id, args.sheet_name, args.plurals_sheet_name, args.credentials, args.output, args.project_dir, args.skip_csv,
+                 args.concurrent_fetch, args.force, args.cache_dir, args.cache_max_age, args.cache_max_entries, args.cache_max_bytes,
+                 args.requests_per_minute, args.max_retries, args.http_timeout, not args.no_gzip,
+                 args.sources, args.jobs, dict(args.locale_fallbacks or []),
+                 args.project_name, args.rescan_project, args.metrics_json, args.api_endpoint)
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(main, *main_args)
+        finally:
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        main(*main_args)
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from hashlib import sha1
+from os import path, walk
+from typing import Callable, Dict, List, Optional, Set
+
+from localisation.locales import canonical_locale
+
+# Directories that never contain files to replace: build products, dependencies and version control
+IGNORED_DIRECTORIES = {"DerivedData", "Pods", ".git", "build", "node_modules"}
+IGNORED_EXTENSIONS = (".app", ".appex", ".build", ".framework")
+LPROJ_EXTENSION = ".lproj"
+DESCRIPTOR_EXTENSION = ".project.json"
+# Bumped whenever the descriptor format, or what's indexed, changes
+DESCRIPTOR_VERSION = 3
+
+
+@dataclass
+class LprojDirectory:
+    path: str
+    # The names of the files in the directory, i.e. {"Localizable.strings", "Localizable.stringsdict"}
+    files: Set[str]
+
+
+@dataclass
+class ProjectIndex:
+    """
+    The directories of an Xcode project that files are copied to, built with a single walk of the project.
+    """
+    # The directories containing each file name, in the order they were walked
+    files: Dict[str, List[str]] = field(default_factory=dict)
+    # The same, keyed by the upper case file name
+    files_by_upper_name: Dict[str, List[str]] = field(default_factory=dict)
+    # The lproj directories outside of bundles, keyed by their canonical locale, i.e. "en-GB" for en_GB.lproj
+    lproj_dirs: Dict[str, List[LprojDirectory]] = field(default_factory=dict)
+    # The name of the first xcworkspace found, i.e. "Project.xcworkspace"
+    workspace: Optional[str] = None
+
+    def directories_with(self, filename: str, ignore_case: bool = False) -> List[str]:
+        """
+        Returns the directories containing a file with the given name.
+        """
+        if ignore_case:
+            return self.files_by_upper_name.get(filename.upper(), [])
+        return self.files.get(filename, [])
+
+
+def index_project(project_dir: str, tracked: Optional[Callable[[str], bool]] = None) -> ProjectIndex:
+    """
+    Walks the project directory once, without descending into the ignored directories, and indexes its files.
+    :param tracked: Returns whether a file name is indexed. Every file is if it's not set. lproj directories are
+    always indexed with all their files.
+    """
+    index = ProjectIndex()
+    for dirpath, dirs, files in walk(project_dir):
+        # Pruning in place stops the walk from descending into them
+        dirs[:] = [dir for dir in dirs if dir not in IGNORED_DIRECTORIES and not dir.endswith(IGNORED_EXTENSIONS)]
+
+        if index.workspace is None:
+            index.workspace = next((dir for dir in dirs if dir.lower().endswith("xcworkspace")), None)
+
+        for file in files:
+            if tracked is None or tracked(file):
+                index.files.setdefault(file, []).append(dirpath)
+                index.files_by_upper_name.setdefault(file.upper(), []).append(dirpath)
+
+        dirname = path.basename(dirpath)
+        if dirname.endswith(LPROJ_EXTENSION) and ".bundle" not in dirpath:
+            locale = canonical_locale(dirname)
+            index.lproj_dirs.setdefault(locale, []).append(LprojDirectory(path=dirpath, files=set(files)))
+
+    return index
+
+
+def load_project_index(project_dir: str,
+                       cache_dir: Optional[str] = None,
+                       tracked: Optional[Callable[[str], bool]] = None,
+                       rescan: bool = False) -> ProjectIndex:
+    """
+    Returns the index of the project, reading it from the descriptor cached in `cache_dir` by a previous run if the
+    project hasn't changed since, so the project isn't walked again.
+    The descriptor is keyed by the project path, and it's only used while the modification times of the project
+    directory, of every directory it records and of all their parents are the same, so a new lproj next to an
+    indexed one is noticed. Directories added elsewhere in the project aren't, `rescan` walks the project regardless.
+    """
+    descriptor_path = __descriptor_path(cache_dir, project_dir) if cache_dir else None
+    if descriptor_path and not rescan:
+        index = __read_descriptor(descriptor_path, project_dir)
+        if index is not None:
+            print("Using the cached index of {}".format(project_dir))
+            return index
+
+    index = index_project(project_dir, tracked)
+    if descriptor_path:
+        __write_descriptor(descriptor_path, project_dir, index)
+    return index
+
+
+def save_project_index(project_dir: str, cache_dir: str, index: ProjectIndex):
+    """
+    Caches the index of the project in `cache_dir` again, with the current modification times of its directories.
+    Call it once files have been replaced in the indexed directories, i.e. after copying the generated files, so
+    the next run doesn't walk the project again because of them. The files in the index must still be the same.
+    """
+    __write_descriptor(__descriptor_path(cache_dir, project_dir), project_dir, index)
+
+
+def __descriptor_path(cache_dir: str, project_dir: str) -> str:
+    key = sha1(path.abspath(project_dir).encode("utf-8")).hexdigest()
+    return path.join(cache_dir, key + DESCRIPTOR_EXTENSION)
+
+
+def __recorded_directories(project_dir: str, index: ProjectIndex) -> Set[str]:
+    """
+    Returns the directories in the index and their parents up to the project dir, whose modification time changes
+    when a file or directory is added to or removed from them.
+    """
+    indexed = set()
+    for dirpaths in index.files.values():
+        indexed.update(dirpaths)
+    for lproj_dirs in index.lproj_dirs.values():
+        indexed.update(lproj_dir.path for lproj_dir in lproj_dirs)
+
+    directories = {project_dir}
+    for directory in indexed:
+        while directory not in directories:
+            directories.add(directory)
+            parent = path.dirname(directory)
+            if parent == directory or not directory.startswith(project_dir):
+                break
+            directory = parent
+    return directories
+
+
+def __read_descriptor(descriptor_path: str, project_dir: str) -> Optional[ProjectIndex]:
+    """
+    Returns the index stored in the descriptor, or None if there isn't one or the project changed since.
+    """
+    try:
+        with open(descriptor_path, "r") as f:
+            descriptor = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if descriptor.get("version") != DESCRIPTOR_VERSION or descriptor.get("project_dir") != project_dir:
+        return None
+
+    for directory, mtime in descriptor["directories"].items():
+        try:
+            if os.stat(directory).st_mtime != mtime:
+                return None
+        except OSError:
+            return None
+
+    index = ProjectIndex(workspace=descriptor["workspace"])
+    for file, dirpaths in descriptor["files"].items():
+        index.files[file] = dirpaths
+        index.files_by_upper_name.setdefault(file.upper(), []).extend(dirpaths)
+    for locale, lproj_dirs in descriptor["lproj_dirs"].items():
+        index.lproj_dirs[locale] = [LprojDirectory(path=lproj_dir["path"], files=set(lproj_dir["files"]))
+                                    for lproj_dir in lproj_dirs]
+    return index
+
+
+def __write_descriptor(descriptor_path: str, project_dir: str, index: ProjectIndex):
+    directories = {}
+    for directory in __recorded_directories(project_dir, index):
+        try:
+            directories[directory] = os.stat(directory).st_mtime
+        except OSError:
+            # The project dir doesn't exist, there's nothing worth caching
+            return
+
+    descriptor = {
+        "version": DESCRIPTOR_VERSION,
+        "project_dir": project_dir,
+        "directories": directories,
+        "workspace": index.workspace,
+        "files": index.files,
+        "lproj_dirs": {locale: [{"path": lproj_dir.path, "files": sorted(lproj_dir.files)} for lproj_dir in lproj_dirs]
+                       for locale, lproj_dirs in index.lproj_dirs.items()}
+    }
+    os.makedirs(path.dirname(descriptor_path), exist_ok=True)
+    temp_path = "{}.{}.{}.tmp".format(descriptor_path, os.getpid(), threading.get_ident())
+    with open(temp_path, "w") as f:
+        json.dump(descriptor, f)
+    os.replace(temp_path, descriptor_path)
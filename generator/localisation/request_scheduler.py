@@ -0,0 +1,144 @@
+import random
+import socket
+import threading
+from time import monotonic, sleep
+from typing import Callable, Optional, TypeVar
+
+from googleapiclient.errors import HttpError
+
+T = TypeVar("T")
+
+# Quota errors and transient server errors, see https://developers.google.com/sheets/api/limits
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    A token bucket rate limiter. Tokens are refilled at `requests_per_minute`, up to `capacity`,
+    and each request takes one, waiting for it if the bucket is empty.
+    """
+
+    def __init__(self,
+                 requests_per_minute: float,
+                 capacity: Optional[float] = None,
+                 clock: Callable[[], float] = monotonic,
+                 sleep: Callable[[float], None] = sleep):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive, got {}".format(requests_per_minute))
+
+        self.__rate = requests_per_minute / 60
+        self.__capacity = capacity if capacity is not None else max(1.0, self.__rate)
+        self.__tokens = self.__capacity
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__last_refill = clock()
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until there is one available.
+        :return: The seconds waited
+        """
+        with self.__lock:
+            now = self.__clock()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__last_refill) * self.__rate)
+            self.__last_refill = now
+            # The token is reserved before sleeping, so concurrent callers queue up behind each other
+            self.__tokens -= 1
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0.0
+
+        if wait > 0:
+            self.__sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    """
+    Executes the requests made to the Sheets API, rate limiting them with a token bucket and retrying the
+    ones that fail with a quota or transient error, using exponential backoff with full jitter.
+
+    The time spent waiting, either for the rate limit or before a retry, is kept in `throttled_seconds` and
+    `backoff_seconds`.
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 32.0,
+                 clock: Callable[[], float] = monotonic,
+                 sleep: Callable[[float], None] = sleep,
+                 jitter: Callable[[], float] = random.random):
+        self.__token_bucket = TokenBucket(requests_per_minute, clock=clock, sleep=sleep) if requests_per_minute else None
+        self.__max_retries = max_retries
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__sleep = sleep
+        self.__jitter = jitter
+        self.__lock = threading.Lock()
+
+        self.requests = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    @property
+    def waited_seconds(self) -> float:
+        """
+        The total seconds spent waiting for the rate limit and before retries.
+        """
+        return self.throttled_seconds + self.backoff_seconds
+
+    def execute(self, request: Callable[[], T]) -> T:
+        """
+        Executes the request, retrying it up to `max_retries` times if it fails with a retryable error.
+        The last error is raised if all the attempts fail.
+        """
+        attempt = 0
+        while True:
+            if self.__token_bucket is not None:
+                throttled = self.__token_bucket.acquire()
+                with self.__lock:
+                    self.throttled_seconds += throttled
+
+            with self.__lock:
+                self.requests += 1
+
+            try:
+                return request()
+            except Exception as error:
+                if attempt >= self.__max_retries or not self.__is_retryable(error):
+                    raise
+
+                delay = self.__retry_delay(error, attempt)
+                print("Sheets API request failed ({}), retrying in {:.2f}s".format(error, delay))
+                with self.__lock:
+                    self.retries += 1
+                    self.backoff_seconds += delay
+                self.__sleep(delay)
+                attempt += 1
+
+    def __retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Returns the seconds to wait before retrying: the `Retry-After` the server asked for if there is one,
+        otherwise a random delay up to base_delay * 2^attempt, capped at max_delay.
+        """
+        retry_after = self.__retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.__max_delay)
+        return self.__jitter() * min(self.__max_delay, self.__base_delay * (2 ** attempt))
+
+    @staticmethod
+    def __retry_after(error: Exception) -> Optional[float]:
+        if not isinstance(error, HttpError):
+            return None
+        try:
+            return float(error.resp.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def __is_retryable(error: Exception) -> bool:
+        if isinstance(error, HttpError):
+            return error.resp.status in RETRYABLE_STATUSES
+        return isinstance(error, (ConnectionError, socket.timeout))
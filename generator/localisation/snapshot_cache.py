@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from hashlib import sha1
+from time import time
+from typing import Any, Callable, List, Optional, Tuple
+
+SNAPSHOT_EXTENSION = ".snapshot.json"
+
+
+class SnapshotCache:
+    """
+    An on-disk cache of the responses fetched from a spreadsheet.
+    Each entry is keyed by the spreadsheet id, the worksheet name and the request made for it, i.e. the ranges.
+
+    Entries older than `max_age` seconds are never returned. When there are more than `max_entries` entries, or they
+    take more than `max_bytes`, the least recently used ones are removed.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 max_age: Optional[float] = None,
+                 max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time):
+        self.__directory = directory
+        self.__max_age = max_age
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__clock = clock
+        self.__lock = threading.Lock()
+
+    def get(self, spreadsheet_id: str, sheet_name: str, request: str) -> Optional[Any]:
+        """
+        Returns the cached response for the request, or None if there isn't a fresh one.
+        """
+        entry_path = self.__entry_path(spreadsheet_id, sheet_name, request)
+        with self.__lock:
+            try:
+                with open(entry_path, "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+            now = self.__clock()
+            if self.__max_age is not None and now - entry.get("created_at", 0) > self.__max_age:
+                self.__remove(entry_path)
+                return None
+
+            # The modification time of an entry is its last access, which drives the LRU eviction
+            os.utime(entry_path, (now, now))
+            return entry.get("response")
+
+    def put(self, spreadsheet_id: str, sheet_name: str, request: str, response: Any):
+        """
+        Stores the response for the request, evicting old entries if the cache is over its limits.
+        """
+        entry_path = self.__entry_path(spreadsheet_id, sheet_name, request)
+        now = self.__clock()
+        entry = {
+            "spreadsheet_id": spreadsheet_id,
+            "sheet_name": sheet_name,
+            "request": request,
+            "created_at": now,
+            "response": response
+        }
+
+        with self.__lock:
+            os.makedirs(self.__directory, exist_ok=True)
+            temp_path = "{}.{}.{}.tmp".format(entry_path, os.getpid(), threading.get_ident())
+            with open(temp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, entry_path)
+            os.utime(entry_path, (now, now))
+            self.__evict()
+
+    def clear(self):
+        """
+        Removes every entry of the cache.
+        """
+        with self.__lock:
+            for entry_path, _, _ in self.__entries():
+                self.__remove(entry_path)
+
+    def __evict(self):
+        """
+        Removes the least recently used entries until the cache is within its limits.
+        Expired entries are removed when they're read, or evicted here like any other entry.
+        """
+        entries = self.__entries()
+        entries.sort(key=lambda entry: entry[1])
+        total_bytes = sum(size for _, _, size in entries)
+        while entries and ((self.__max_entries is not None and len(entries) > self.__max_entries) or
+                           (self.__max_bytes is not None and total_bytes > self.__max_bytes)):
+            entry_path, _, size = entries.pop(0)
+            self.__remove(entry_path)
+            total_bytes -= size
+
+    def __entries(self) -> List[Tuple[str, float, int]]:
+        """
+        Returns a list of (path, last access time, size in bytes) for every entry of the cache.
+        """
+        if not os.path.isdir(self.__directory):
+            return []
+
+        entries = []
+        for filename in os.listdir(self.__directory):
+            if not filename.endswith(SNAPSHOT_EXTENSION):
+                continue
+            entry_path = os.path.join(self.__directory, filename)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((entry_path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def __entry_path(self, spreadsheet_id: str, sheet_name: str, request: str) -> str:
+        key = json.dumps([spreadsheet_id, sheet_name, request])
+        return os.path.join(self.__directory, sha1(key.encode("utf-8")).hexdigest() + SNAPSHOT_EXTENSION)
+
+    @staticmethod
+    def __remove(entry_path: str):
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
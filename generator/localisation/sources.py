@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Dict, List, Tuple
+
+from localisation import KEYS_VALUE
+
+
+@dataclass
+class SheetSource:
+    spreadsheet_id: str
+    # A shell-style pattern matched against the worksheet names, i.e. "Translations*"
+    worksheet_pattern: str
+
+    @staticmethod
+    def parse(source: str) -> "SheetSource":
+        """
+        Parses a source given as `spreadsheet_id:worksheet_pattern`
+        """
+        spreadsheet_id, separator, worksheet_pattern = source.partition(":")
+        if not separator or not spreadsheet_id or not worksheet_pattern:
+            raise ValueError("Invalid source '{}', expected 'spreadsheet_id:worksheet_pattern'".format(source))
+        return SheetSource(spreadsheet_id=spreadsheet_id, worksheet_pattern=worksheet_pattern)
+
+
+@dataclass
+class KeyConflict:
+    key: str
+    # Where each definition of the key came from, i.e. ["spreadsheet_id/Translations row 3", "other_id/Feature row 12"]
+    origins: List[str]
+
+
+@dataclass
+class MergeResult:
+    result: Dict[str, List[str]] = field(default_factory=dict)
+    conflicts: List[KeyConflict] = field(default_factory=list)
+
+
+def merge_localisations(localisations: List[Tuple[str, Dict[str, List[str]]]], header_rows: int = 1) -> MergeResult:
+    """
+    Merges the localisation dicts fetched from several worksheets into a single one, in the given order.
+    A key defined in more than one worksheet is reported as a conflict, and only its first definition is kept.
+
+    :param localisations: A list of (origin, localisation dict), where the origin describes the worksheet the dict
+    came from and the dict has the same format as the one built from a single worksheet:
+    {
+        "key": ["some.key", "another.key"],
+        "en": ["Some translation", "Another translation"]
+    }
+    :param header_rows: The number of rows above the values, used to report the row of each conflicting key
+    """
+    ret = MergeResult()
+    ret.result[KEYS_VALUE] = []
+    key_origins: Dict[str, List[str]] = {}
+    key_sources: Dict[str, str] = {}
+    # Used as an ordered set
+    conflicting_keys: Dict[str, None] = {}
+
+    for origin, localisation in localisations:
+        keys = localisation.get(KEYS_VALUE, [])
+        locales = [locale for locale in localisation.keys() if locale != KEYS_VALUE]
+        # Columns have their trailing empty cells trimmed, so they can all have different lengths
+        rows = zip_longest(keys, *(localisation[locale] for locale in locales), fillvalue="")
+        merged_rows = len(ret.result[KEYS_VALUE])
+
+        for index, row in enumerate(rows):
+            key, values = row[0], row[1:]
+            if key:
+                key_origins.setdefault(key, []).append("{} row {}".format(origin, index + header_rows + 1))
+                # Keys repeated in the same worksheet are left for the validator, like with a single worksheet
+                if key_sources.setdefault(key, origin) != origin:
+                    conflicting_keys[key] = None
+                    continue
+
+            ret.result[KEYS_VALUE].append(key)
+            for locale, value in zip(locales, values):
+                column = ret.result.setdefault(locale, [""] * merged_rows)
+                column.append(value)
+            merged_rows += 1
+            # Locales that aren't in this worksheet have no value for the row
+            for column in ret.result.values():
+                if len(column) < merged_rows:
+                    column.append("")
+
+    ret.conflicts = [KeyConflict(key=key, origins=key_origins[key]) for key in conflicting_keys]
+    return ret
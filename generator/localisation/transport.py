@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.http import HttpRequest
+
+
+@dataclass
+class TransportConfig:
+    # Seconds to wait for the connection and for each response
+    timeout: float = 60.0
+    # Asks Google to gzip the responses, which makes the JSON payloads several times smaller
+    gzip: bool = True
+    # Connections kept open between requests, any extra one is closed once it's returned to the pool
+    max_idle_connections: int = 8
+
+
+class CompressedHttp(httplib2.Http):
+    """
+    An httplib2 transport that asks for gzipped responses.
+    Google APIs only compress them when both the `Accept-Encoding` and the `User-Agent` headers mention gzip.
+    """
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        headers = dict(headers) if headers else {}
+        headers["accept-encoding"] = "gzip"
+        user_agent = headers.get("user-agent", "")
+        if "gzip" not in user_agent:
+            headers["user-agent"] = "{} (gzip)".format(user_agent).strip()
+        return super().request(uri, method, body, headers, *args, **kwargs)
+
+
+class SheetsTransport:
+    """
+    A pool of authorised http objects for the Sheets API.
+    Each http object keeps its connection to the API open, so requests reuse it instead of doing a new TLS handshake.
+    httplib2 isn't thread safe, so an http object is only ever used by one thread at a time: requests check one
+    out of the pool, and return it once they're done.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.__config = config if config is not None else TransportConfig()
+        self.__credentials = None
+        self.__idle: List[httplib2.Http] = []
+        self.__lock = threading.Lock()
+
+    def authorize(self, credentials):
+        """
+        Sets the credentials every request is authorised with. Connections opened with previous credentials are closed.
+        """
+        with self.__lock:
+            self.__credentials = credentials
+            idle, self.__idle = self.__idle, []
+        for http in idle:
+            self.__close(http)
+
+    def execute(self, request: HttpRequest) -> Dict:
+        """
+        Executes the request with an http object from the pool.
+        """
+        with self.connection() as http:
+            return request.execute(http=http)
+
+    @contextmanager
+    def connection(self) -> Iterator[httplib2.Http]:
+        """
+        Checks an http object out of the pool, creating a new one if they're all in use, and returns it afterwards.
+        """
+        with self.__lock:
+            http = self.__idle.pop() if self.__idle else None
+        if http is None:
+            http = self.__build_http()
+
+        try:
+            yield http
+        finally:
+            with self.__lock:
+                keep = len(self.__idle) < self.__config.max_idle_connections
+                if keep:
+                    self.__idle.append(http)
+            if not keep:
+                self.__close(http)
+
+    def close(self):
+        """
+        Closes every idle connection.
+        """
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+        for http in idle:
+            self.__close(http)
+
+    def __build_http(self) -> httplib2.Http:
+        http_class = CompressedHttp if self.__config.gzip else httplib2.Http
+        http = http_class(timeout=self.__config.timeout)
+        if self.__credentials is None:
+            return http
+        return AuthorizedHttp(self.__credentials, http=http)
+
+    @staticmethod
+    def __close(http):
+        # AuthorizedHttp wraps the actual transport
+        http = getattr(http, "http", http)
+        for connection in list(getattr(http, "connections", {}).values()):
+            connection.close()
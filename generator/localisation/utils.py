@@ -1,19 +1,147 @@
+import json
+import os
+import shutil
+import threading
 from os import path, makedirs
 from hashlib import sha1
+from typing import Dict, Optional
 
+from localisation import CHECKSUM_MANIFEST_FILENAME, CHECKSUM_MANIFEST_VERSION
 
-def create_file(output_dir: str, filename: str):
+
+class AtomicFile:
+    """
+    A text file handle that writes to a temporary file next to `name`, and only replaces `name` with it when it's
+    closed, if the content is different. A file whose bytes haven't changed keeps its modification time, so Xcode
+    doesn't process it again.
+    If the `with` block raises, the temporary file is removed and `name` is left as it was.
+
+    The SHA-1 of the content is computed as it's written, see `hexdigest`, and its size is kept in `bytes_written`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.changed = False
+        self.bytes_written = 0
+        self.__temp_name = _temp_path(name)
+        self.__file = open(self.__temp_name, "w")
+        self.__hasher = sha1()
+        # Text files translate "\n" when they're written, the hash is of the bytes in the file
+        self.__newline = os.linesep if os.linesep != "\n" else None
+
+    def write(self, text: str) -> int:
+        encoded = text.replace("\n", self.__newline) if self.__newline else text
+        encoded = encoded.encode(self.__file.encoding)
+        self.__hasher.update(encoded)
+        self.bytes_written += len(encoded)
+        return self.__file.write(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def hexdigest(self) -> str:
+        """
+        Returns the SHA-1 of everything written so far, the same `create_checksum` would compute from the file.
+        """
+        return self.__hasher.hexdigest()
+
+    def flush(self):
+        self.__file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def close(self):
+        """
+        Closes the file, replacing `name` with the written content if it's different.
+        """
+        if self.__file.closed:
+            return
+        self.__file.close()
+        self.changed = _replace_if_changed(self.__temp_name, self.name, self.hexdigest())
+
+    def discard(self):
+        """
+        Closes the file without replacing `name`.
+        """
+        if not self.__file.closed:
+            self.__file.close()
+            os.remove(self.__temp_name)
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def create_file(output_dir: str, filename: str) -> AtomicFile:
     """
     Creates a file handle to the given filename and returns it.
+    The file is only written when the handle is closed, and only if its content changed.
     """
     filepath = path.join(output_dir, filename)
     makedirs(path.dirname(filepath), exist_ok=True)
 
-    file = open(filepath, "w+")
-    return file
+    return AtomicFile(filepath)
+
+
+def copy_if_changed(source: str, destination: str) -> bool:
+    """
+    Copies the source file to the destination, which can be a directory, unless the destination already has the
+    same content. The destination is replaced atomically.
+    :return: True if the file was copied, False if the destination was already up to date
+    """
+    if path.isdir(destination):
+        destination = path.join(destination, path.basename(source))
+    if path.exists(destination) and __same_content(source, destination):
+        return False
+
+    temp_path = _temp_path(destination)
+    try:
+        shutil.copy(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
 
 
-def __hash(path: str) -> str:
+def _temp_path(filepath: str) -> str:
+    return "{}.{}.{}.tmp".format(filepath, os.getpid(), threading.get_ident())
+
+
+def _replace_if_changed(temp_path: str, filepath: str, temp_hash: str) -> bool:
+    """
+    Moves the temporary file to filepath if their contents are different, otherwise removes it.
+    :param temp_hash: The SHA-1 of the temporary file
+    :return: True if filepath was replaced
+    """
+    if path.exists(filepath) and path.getsize(temp_path) == path.getsize(filepath) and \
+            _hash(filepath) == temp_hash:
+        os.remove(temp_path)
+        return False
+
+    if path.exists(filepath):
+        # Keeps the permissions of the file being replaced
+        shutil.copymode(filepath, temp_path)
+    os.replace(temp_path, filepath)
+    return True
+
+
+def __same_content(path_a: str, path_b: str) -> bool:
+    if path.getsize(path_a) != path.getsize(path_b):
+        return False
+    return _hash(path_a) == _hash(path_b)
+
+
+def _hash(path: str) -> str:
     BLOCKSIZE = 65536
     hasher = sha1()
     with open(path, 'rb') as f:
@@ -24,14 +152,70 @@ def __hash(path: str) -> str:
     return hasher.hexdigest()
 
 
-def create_checksum(filename, strings_paths: (dict, dict), output_dir=".") -> str:
+def create_checksum(filename, strings_paths: (dict, dict), output_dir=".", digests: Optional[Dict[str, str]] = None,
+                    enum_path: Optional[str] = None, locale_fallbacks: Optional[Dict[str, str]] = None) -> str:
     """
     Creates a checksum of the given filename
+    Also creates the manifest read by validate_checksum.py next to it, with the SHA-1 of the strings and stringsdict
+    files of each locale and of the enum.
+    :param digests: The SHA-1 of the files, keyed by their path, computed as they were written. Files without one
+    are read to hash them.
+    :param locale_fallbacks: The lproj locale each locale is copied to when the project has no lproj for it
     """
+    digests = digests if digests is not None else {}
+    manifest_files = []
     with create_file(output_dir=output_dir, filename=filename) as f:
-        for item in strings_paths:
+        for item, name in zip(strings_paths, ["Localizable.strings", "Localizable.stringsdict"]):
             for localisation in item:
-                sha_hash = __hash(item[localisation])
+                sha_hash = digests.get(item[localisation]) or _hash(item[localisation])
                 f.write("{} {}\n".format(sha_hash, localisation))
+                manifest_files.append({"locale": localisation, "name": name, "sha1": sha_hash})
+
+        checksum_path = path.realpath(f.name)
+
+    if enum_path is not None:
+        manifest_files.append({"name": path.basename(enum_path), "sha1": digests.get(enum_path) or _hash(enum_path)})
+    manifest = {
+        "version": CHECKSUM_MANIFEST_VERSION,
+        "locale_fallbacks": locale_fallbacks or {},
+        "files": manifest_files
+    }
+    with create_file(output_dir=path.dirname(checksum_path), filename=CHECKSUM_MANIFEST_FILENAME) as f:
+        json.dump(manifest, f, indent=2)
 
-        return path.realpath(f.name)
+    return checksum_path
+
+
+# The fingerprint of the generator, computed once per process
+_generator_fingerprint: Optional[str] = None
+
+
+def generator_fingerprint() -> str:
+    """
+    Returns a SHA-1 of the code of the generator and of the templates it copies to the project, so the files are
+    generated again after the generator is upgraded.
+    """
+    global _generator_fingerprint
+    if _generator_fingerprint is None:
+        package_dir = path.dirname(path.abspath(__file__))
+        source_dirs = [package_dir, path.join(package_dir, "..", "templates")]
+        hasher = sha1()
+        for source_dir in source_dirs:
+            for dirpath, dirs, files in os.walk(source_dir):
+                dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+                for file in sorted(files):
+                    if file.endswith((".py", ".sh")):
+                        file_path = path.join(dirpath, file)
+                        hasher.update(path.relpath(file_path, source_dir).encode("utf-8"))
+                        hasher.update(_hash(file_path).encode("utf-8"))
+        _generator_fingerprint = hasher.hexdigest()
+    return _generator_fingerprint
+
+
+def hash_snapshot(*values) -> str:
+    """
+    Returns a SHA-1 of the given JSON serialisable values, i.e. the dictionaries fetched from the spreadsheet.
+    The same content always returns the same hash, regardless of the order of the dictionary keys.
+    """
+    content = json.dumps(values, sort_keys=True, ensure_ascii=False)
+    return sha1(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Checks that the localisation files of the project haven't been edited since they were generated.
+
+It reads the `.checksum.localizablegooglesheets.json` manifest next to this script, finds the Localizable.strings,
+Localizable.stringsdict and enum files of the project with a single scan, and compares their SHA-1 with the manifest.
+Files whose modification time and size haven't changed since they were last verified aren't hashed again.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+
+MANIFEST_FILENAME = ".checksum.localizablegooglesheets.json"
+MANIFEST_VERSION = 1
+# Build products, dependencies and version control, which are never checked
+IGNORED_DIRECTORIES = {"DerivedData", "Pods", ".git", "build", "node_modules"}
+IGNORED_EXTENSIONS = (".app", ".appex", ".build", ".framework")
+LPROJ_EXTENSION = ".lproj"
+LEGACY_LPROJ_NAMES = {"english": "en", "french": "fr", "german": "de", "italian": "it", "japanese": "ja",
+                      "spanish": "es", "dutch": "nl"}
+BLOCKSIZE = 65536
+
+
+def canonical_locale(name):
+    """
+    Returns the canonical identifier of a locale or lproj directory, the same way the generator does.
+    """
+    if name.lower().endswith(LPROJ_EXTENSION):
+        name = name[:-len(LPROJ_EXTENSION)]
+    if name == "Base":
+        return name
+    if name.lower() in LEGACY_LPROJ_NAMES:
+        return LEGACY_LPROJ_NAMES[name.lower()]
+
+    subtags = name.replace("_", "-").split("-")
+    canonical = [subtags[0].lower()]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4 and subtag.isalpha():
+            canonical.append(subtag.title())
+        elif len(subtag) == 2 or (len(subtag) == 3 and subtag.isdigit()):
+            canonical.append(subtag.upper())
+        else:
+            canonical.append(subtag)
+    return "-".join(canonical)
+
+
+def scan_project(root, filenames, enum_names):
+    """
+    Walks the project once, without descending into the ignored directories.
+    :return: A tuple with the paths of the given filenames in each lproj directory outside of bundles, keyed by
+    (canonical locale, filename), the canonical locales of those lproj directories, and the first path of each enum,
+    keyed by its upper case name
+    """
+    lproj_files = {}
+    lproj_locales = set()
+    enum_files = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [dir for dir in dirs if dir not in IGNORED_DIRECTORIES and not dir.endswith(IGNORED_EXTENSIONS)]
+
+        dirname = os.path.basename(dirpath)
+        if dirname.endswith(LPROJ_EXTENSION) and ".bundle" not in dirpath:
+            locale = canonical_locale(dirname)
+            lproj_locales.add(locale)
+            for file in files:
+                if file in filenames:
+                    lproj_files.setdefault((locale, file), []).append(os.path.join(dirpath, file))
+
+        for file in files:
+            if file.upper() in enum_names and file.upper() not in enum_files:
+                enum_files[file.upper()] = os.path.join(dirpath, file)
+    return lproj_files, lproj_locales, enum_files
+
+
+def resolve_targets(manifest, lproj_files, lproj_locales, enum_files):
+    """
+    Returns a list of (path, expected SHA-1) for every file of the manifest found in the project, and the entries of
+    the manifest that weren't found.
+    A locale is checked in the lproj directories of the same locale, or of its fallback if the project has no lproj
+    directory for it, like the generator copies them.
+    """
+    generated = {canonical_locale(entry["locale"]) for entry in manifest["files"] if entry.get("locale")}
+    fallbacks = {canonical_locale(locale): canonical_locale(fallback)
+                 for locale, fallback in manifest.get("locale_fallbacks", {}).items()}
+
+    targets = []
+    missing = []
+    for entry in manifest["files"]:
+        if entry.get("locale"):
+            locale = canonical_locale(entry["locale"])
+            fallback = fallbacks.get(locale)
+            if locale not in lproj_locales and fallback is not None and fallback not in generated:
+                locale = fallback
+            paths = lproj_files.get((locale, entry["name"]))
+        else:
+            enum_path = enum_files.get(entry["name"].upper())
+            paths = [enum_path] if enum_path else None
+
+        if not paths:
+            missing.append(entry)
+        for path in paths or []:
+            targets.append((path, entry["sha1"]))
+    return targets, missing
+
+
+def file_hash(path):
+    hasher = sha1()
+    with open(path, "rb") as f:
+        buffer = f.read(BLOCKSIZE)
+        while len(buffer) > 0:
+            hasher.update(buffer)
+            buffer = f.read(BLOCKSIZE)
+    return hasher.hexdigest()
+
+
+def hash_files(paths, stamp, jobs):
+    """
+    Returns the SHA-1 of each path, reusing the one in the stamp if the file has the same modification time and size
+    it had when it was hashed.
+    :param stamp: {path: [mtime_ns, size, sha1]}, updated with the hashed files
+    """
+    hashes = {}
+    to_hash = []
+    for path in paths:
+        stat = os.stat(path)
+        stamped = stamp.get(path)
+        if stamped and stamped[0] == stat.st_mtime_ns and stamped[1] == stat.st_size:
+            hashes[path] = stamped[2]
+        else:
+            to_hash.append((path, stat))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for (path, stat), digest in zip(to_hash, executor.map(file_hash, [path for path, _ in to_hash])):
+            hashes[path] = digest
+            stamp[path] = [stat.st_mtime_ns, stat.st_size, digest]
+    return hashes
+
+
+def default_stamp_path(root):
+    """
+    The stamp is kept out of the project, in Xcode's derived files folder if the script runs in a build phase.
+    """
+    directory = os.environ.get("DERIVED_FILE_DIR") or tempfile.gettempdir()
+    key = sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(directory, "validate_checksum.{}.stamp.json".format(key))
+
+
+def read_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, value):
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+    except OSError:
+        # The stamp only saves time, verifying works without it
+        pass
+
+
+def validate(root, manifest_path, stamp_path, jobs):
+    """
+    :return: True if every file found in the project matches the manifest
+    """
+    manifest = read_json(manifest_path, None)
+    if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+        print("Failed to parse the {} file. Is its path correct?".format(manifest_path))
+        return False
+
+    filenames = {entry["name"] for entry in manifest["files"] if entry.get("locale")}
+    enum_names = {entry["name"].upper() for entry in manifest["files"] if not entry.get("locale")}
+    lproj_files, lproj_locales, enum_files = scan_project(root, filenames, enum_names)
+    targets, missing = resolve_targets(manifest, lproj_files, lproj_locales, enum_files)
+    for entry in missing:
+        name = "{} {}".format(entry["locale"], entry["name"]) if entry.get("locale") else entry["name"]
+        print("WARNING: Couldn't find {} in the project".format(name))
+
+    stamp = read_json(stamp_path, {})
+    hashes = hash_files(sorted({path for path, _ in targets}), stamp, jobs)
+
+    valid = True
+    for path, expected in targets:
+        if hashes[path] != expected:
+            print("Remember the \"THIS FILE IS GENERATED, DO NOT EDIT IT!\" bit in {}? Well, it was edited!".format(path))
+            valid = False
+            # Hashed again next time, so it's reported until it's fixed
+            stamp.pop(path, None)
+
+    write_json(stamp_path, stamp)
+    return valid
+
+
+if __name__ == '__main__':
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default=".", help="Directory to look for the files in (defaults to the current one)")
+    parser.add_argument("--manifest", default=os.path.join(script_dir, MANIFEST_FILENAME),
+                        help="Path to the checksum manifest (defaults to the one next to this script)")
+    parser.add_argument("--stamp", help="Path to the file caching the hashes between runs")
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1),
+                        help="Number of files hashed at the same time")
+    args = parser.parse_args()
+
+    print("Checking localisation checksum")
+    if not validate(args.root, args.manifest, args.stamp or default_stamp_path(args.root), args.jobs):
+        sys.exit(-1)
+    print("Localisations are good!")
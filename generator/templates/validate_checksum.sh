@@ -1,5 +1,11 @@
 #!/usr/bin/env bash
 
+# The Python verifier checks the strings, stringsdict and enum files with a single scan of the project
+script_dir=$(cd "$(dirname "$0")" && pwd)
+if command -v python3 >/dev/null 2>&1 && [ -f "$script_dir/validate_checksum.py" ] && [ -f "$script_dir/.checksum.localizablegooglesheets.json" ]; then
+    exec python3 "$script_dir/validate_checksum.py"
+fi
+
 echo "Checking localisation checksum"
 
 languages_list=`cat ./.checksum.localizablegooglesheets | cut -d' ' -f2`
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Tuple
+
+from benchmark.fake_spreadsheets import FakeSpreadsheets, Spreadsheets
+from localisation.googlesheethelper import GoogleSheetHelper
+from localisation.metrics import Metrics
+from localisation.snapshot_cache import SnapshotCache
+
+
+class FakeRequest:
+    """
+    Stands in for a googleapiclient HttpRequest, returning an already computed response.
+    """
+
+    def __init__(self, service: "FakeSheetsService", response: Dict):
+        self.__service = service
+        self.__response = response
+
+    def execute(self, http=None, num_retries=0) -> Dict:
+        self.__service.executed_requests += 1
+        return self.__response
+
+
+class FakeSpreadsheetsResource:
+    """
+    Stands in for the `spreadsheets()` resource, serving the grid properties of the worksheets.
+    """
+
+    def __init__(self, service: "FakeSheetsService"):
+        self.__service = service
+
+    def values(self) -> "FakeSheetsService":
+        return self.__service
+
+    def get(self, spreadsheetId: str, fields: Optional[str] = None) -> FakeRequest:
+        self.__service.requested_ranges.append("metadata")
+        return FakeRequest(self.__service, self.__service.fixture.metadata(spreadsheetId))
+
+
+class FakeSheetsService:
+    """
+    An in-memory stand-in for the GoogleSheets service, serving `spreadsheets().get` and
+    `spreadsheets().values().get/batchGet`.
+    The spreadsheets are given as {spreadsheet_id: {sheet_name: [row, row, ...]}}, where each row is a list of strings,
+    and served by the same FakeSpreadsheets as the benchmarks' FakeSheetsServer.
+    """
+
+    def __init__(self, spreadsheets: Spreadsheets, extra_rows: int = 0, extra_columns: int = 0):
+        self.fixture = FakeSpreadsheets(spreadsheets, extra_rows=extra_rows, extra_columns=extra_columns)
+        self.requested_ranges: List[str] = []
+        self.executed_requests = 0
+
+    @property
+    def spreadsheets_data(self) -> Spreadsheets:
+        return self.fixture.spreadsheets
+
+    def spreadsheets(self) -> FakeSpreadsheetsResource:
+        return FakeSpreadsheetsResource(self)
+
+    def get(self, spreadsheetId: str, range: str, majorDimension: str = "ROWS") -> FakeRequest:
+        return FakeRequest(self, self.__value_range(spreadsheetId, range, majorDimension))
+
+    def batchGet(self, spreadsheetId: str, ranges: List[str], majorDimension: str = "ROWS") -> FakeRequest:
+        value_ranges = [self.__value_range(spreadsheetId, range, majorDimension) for range in ranges]
+        return FakeRequest(self, {"spreadsheetId": spreadsheetId, "valueRanges": value_ranges})
+
+    def __value_range(self, spreadsheet_id: str, range: str, major_dimension: str) -> Dict:
+        self.requested_ranges.append(range)
+        return self.fixture.value_range(spreadsheet_id, range, major_dimension)
+
+
+def fake_sheet_helper(sheets: Dict[str, List[List[str]]],
+                      sheet_name: str = "Translations",
+                      plurals_sheet_name: Optional[str] = "Plurals",
+                      spreadsheet_id: str = "mockSpreadsheet",
+                      snapshot_cache: Optional[SnapshotCache] = None,
+                      extra_rows: int = 0,
+                      extra_columns: int = 0,
+                      metrics: Optional[Metrics] = None) -> Tuple[GoogleSheetHelper, FakeSheetsService]:
+    """
+    Returns a GoogleSheetHelper backed by a FakeSheetsService serving the given sheets, and the service itself.
+    """
+    service = FakeSheetsService({spreadsheet_id: sheets}, extra_rows=extra_rows, extra_columns=extra_columns)
+    helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id=spreadsheet_id, sheet_name=sheet_name,
+                               plurals_sheet_name=plurals_sheet_name, service=service, snapshot_cache=snapshot_cache,
+                               metrics=metrics)
+    return helper, service
@@ -0,0 +1,41 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+from benchmark.run_benchmark import STAGES, ScenarioResult, StageResult, compare, regressions, run_scenario
+from benchmark.synthetic import SheetShape, generate_sheets
+from localisation import KEYS_VALUE, PLURAL_KEYS_VALUE
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generate_sheets(self):
+        shape = SheetShape(keys=50, locales=3, plural_variables=4)
+        localisations, plurals = generate_sheets(shape)
+
+        self.assertEqual(list(localisations.keys()), [KEYS_VALUE, "en", "fr", "de"])
+        self.assertEqual(len(set(localisations[KEYS_VALUE])), 50)
+        for locale in ["en", "fr", "de"]:
+            self.assertEqual(len(localisations[locale]), 50)
+        self.assertEqual(len(plurals[PLURAL_KEYS_VALUE]), 4 * 3)
+        self.assertEqual(generate_sheets(shape), (localisations, plurals))
+
+    def test_run_scenario(self):
+        with TemporaryDirectory() as output_dir:
+            result = run_scenario(SheetShape(keys=50, locales=3, plural_variables=4), output_dir=output_dir)
+
+        self.assertEqual(result.name, "50x3")
+        self.assertEqual(list(result.stages.keys()), STAGES)
+        for stage in result.stages.values():
+            self.assertIsNotNone(stage.peak_bytes)
+
+    def test_regressions(self):
+        baseline = ScenarioResult(name="10x1", keys=10, locales=1,
+                                  stages={"parse": StageResult(seconds=1.0, peak_bytes=100),
+                                          "render": StageResult(seconds=1.0, peak_bytes=100)})
+        result = ScenarioResult(name="10x1", keys=10, locales=1,
+                                stages={"parse": StageResult(seconds=1.1, peak_bytes=300),
+                                        "render": StageResult(seconds=3.0, peak_bytes=None)})
+
+        self.assertEqual(regressions(result, baseline, tolerance=1.5), ["10x1 parse peak memory", "10x1 render time"])
+        self.assertEqual(regressions(result, None, tolerance=1.5), [])
+        self.assertEqual(len(compare(result, baseline)), 3)
@@ -1,13 +1,22 @@
+import json
+import os
 import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+from benchmark.fake_sheets_server import FakeSheetsServer
+from localisation import googlesheethelper
 from localisation.googlesheethelper import GoogleSheetHelper, A1NotationRange, SheetRange
+from localisation.request_scheduler import RequestScheduler
+from test.fake_sheets_service import FakeSheetsService, fake_sheet_helper
 
 
 class TestGoogleSheetHelper(unittest.TestCase):
 
     def setUp(self):
         super().setUp()
-        self.sheet_helper = GoogleSheetHelper(scopes="", spreadsheet_id="", sheet_name="mockName")
+        self.sheet_helper = GoogleSheetHelper(scopes="", credentials="", spreadsheet_id="", sheet_name="mockName")
 
     def test_get_a1_notation_from_sheet_range(self):
         self.assertEqual(self.sheet_helper.get_a1_notation_from_sheet_range(sheet_name="mockName", sheet_range=SheetRange(("A", "A"))),
@@ -22,3 +31,142 @@ class TestGoogleSheetHelper(unittest.TestCase):
                          A1NotationRange("'mockName'!A1:A1"))
         self.assertEqual(self.sheet_helper.get_range(sheet_name="mockName", start_at="A1", end_at="Z10"),
                          A1NotationRange("'mockName'!A1:Z10"))
+
+    def test_get_column_letter(self):
+        self.assertEqual(GoogleSheetHelper.get_column_letter(0), "A")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(25), "Z")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(26), "AA")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(51), "AZ")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(52), "BA")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(701), "ZZ")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(702), "AAA")
+        self.assertEqual(GoogleSheetHelper.get_column_letter(18277), "ZZZ")
+        with self.assertRaises(ValueError):
+            GoogleSheetHelper.get_column_letter(-1)
+
+    def test_get_column_index(self):
+        for index in range(0, 20000):
+            self.assertEqual(GoogleSheetHelper.get_column_index(GoogleSheetHelper.get_column_letter(index)), index)
+        self.assertEqual(GoogleSheetHelper.get_column_index("aa"), 26)
+        with self.assertRaises(ValueError):
+            GoogleSheetHelper.get_column_index("A1")
+
+    def test_get_column_range(self):
+        self.assertEqual(self.sheet_helper.get_column_range(sheet_name="mockName", start_column=2),
+                         A1NotationRange("'mockName'!C:C"))
+        self.assertEqual(self.sheet_helper.get_column_range(sheet_name="mockName", start_column=0, end_column=119),
+                         A1NotationRange("'mockName'!A:DP"))
+
+    def test_get_columns_in_a_single_request(self):
+        column_count = 120
+        header = ["key"] + ["locale{}".format(index) for index in range(1, column_count)]
+        rows = [header] + [["{}.{}".format(column, row) for column in header] for row in range(0, 5)]
+        sheet_helper, service = fake_sheet_helper({"Translations": rows})
+
+        columns = [GoogleSheetHelper.get_column_letter(index) for index in range(0, column_count)]
+        values = sheet_helper.get_columns(columns=columns)
+
+        # One request for the grid properties, and a single one for all the columns
+        self.assertEqual(service.executed_requests, 2)
+        self.assertEqual(len(values), column_count)
+        self.assertEqual(values["A"], ["key", "key.0", "key.1", "key.2", "key.3", "key.4"])
+        self.assertEqual(values["DP"], ["locale119", "locale119.0", "locale119.1", "locale119.2", "locale119.3", "locale119.4"])
+
+    def test_get_columns_with_empty_cells(self):
+        sheet_helper, _ = fake_sheet_helper({"Translations": [["key", "en", "pt"],
+                                                              ["a", "", ""],
+                                                              ["", "b", ""]]})
+
+        values = sheet_helper.get_columns(columns=["A", "B", "C"])
+
+        self.assertEqual(values, {"A": ["key", "a"], "B": ["en", "", "b"], "C": ["pt"]})
+
+    def test_get_bounded_range(self):
+        sheet_helper, service = fake_sheet_helper({"Translations": [["key", "en"], ["test.example", "Example"]]},
+                                                  extra_rows=98, extra_columns=28)
+
+        self.assertEqual(sheet_helper.get_bounded_range(sheet_name="Translations", start_at=1),
+                         A1NotationRange("'Translations'!A1:AD1"))
+        self.assertEqual(sheet_helper.get_bounded_range(sheet_name="Translations", start_at="C"),
+                         A1NotationRange("'Translations'!C1:C100"))
+        self.assertEqual(sheet_helper.get_bounded_range(sheet_name="Translations", start_at="A2", end_at="B3"),
+                         A1NotationRange("'Translations'!A2:B3"))
+        self.assertEqual(sheet_helper.get_bounded_range(sheet_name="Unknown", start_at="C"),
+                         A1NotationRange("'Unknown'!C:C"))
+        # The grid properties of all the worksheets are fetched once
+        self.assertEqual(service.executed_requests, 1)
+
+    def test_get_columns_with_bounded_ranges(self):
+        sheet_helper, service = fake_sheet_helper({"Translations": [["key", "en"], ["test.example", "Example"]]},
+                                                  extra_rows=10)
+
+        values = sheet_helper.get_columns(columns=["A", "B"])
+
+        self.assertEqual(values, {"A": ["key", "test.example"], "B": ["en", "Example"]})
+        self.assertIn("'Translations'!B1:B12", service.requested_ranges)
+
+    def test_with_spreadsheet_builds_service_lazily(self):
+        service = FakeSheetsService({"main": {"Translations": [["key", "en"]]},
+                                     "other": {"Login": [["key", "en"], ["login.title", "Login"]]}})
+        sheet_helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id="main", sheet_name="Translations")
+        with patch.object(GoogleSheetHelper, "_GoogleSheetHelper__build_sheets_service",
+                          return_value=service) as build_sheets_service:
+            other_helper = sheet_helper.with_spreadsheet(spreadsheet_id="other", sheet_name="Login")
+            build_sheets_service.assert_not_called()
+
+            self.assertEqual(other_helper.get_values(start_at=1), [["key", "en"]])
+            self.assertEqual(sheet_helper.get_values(start_at=1), [["key", "en"]])
+            build_sheets_service.assert_called_once()
+
+    def test_discovery_document_cache(self):
+        with FakeSheetsServer({}) as server, TemporaryDirectory() as temp_dir:
+            cache_path = path.join(temp_dir, "discovery", "sheets.v4.json")
+            discovery_url = server.endpoint + "/$discovery/rest?version={apiVersion}"
+            with patch.object(googlesheethelper, "DISCOVERY_CACHE_PATH", cache_path), \
+                    patch.object(googlesheethelper, "DISCOVERY_URL", discovery_url):
+                get_discovery_document = self.sheet_helper._GoogleSheetHelper__get_discovery_document
+
+                # Fetched and cached the first time
+                self.assertEqual(get_discovery_document()["rootUrl"], server.endpoint + "/")
+                with open(cache_path) as f:
+                    self.assertEqual(json.load(f)["rootUrl"], server.endpoint + "/")
+
+                # A stale document is fetched again
+                with open(cache_path, "w") as f:
+                    json.dump({"name": "sheets", "version": "v4", "rootUrl": "stale"}, f)
+                self.assertEqual(get_discovery_document()["rootUrl"], "stale")
+                os.utime(cache_path, (0, 0))
+                self.assertEqual(get_discovery_document()["rootUrl"], server.endpoint + "/")
+
+                # Unless it can't be fetched
+                os.utime(cache_path, (0, 0))
+                with patch.object(googlesheethelper, "DISCOVERY_URL", server.endpoint + "/missing"):
+                    self.assertEqual(get_discovery_document()["rootUrl"], server.endpoint + "/")
+
+    def test_fetch_from_api_endpoint(self):
+        sheets = {"Translations": [["key", "en", "pt"], ["test.example", "Example"], ["test.other", "Other", "Outro"]],
+                  "Plurals": [["VARIABLE", "LANG", "ONE"]]}
+        with FakeSheetsServer({"mockSpreadsheet": sheets}, extra_rows=5) as server:
+            sheet_helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id="mockSpreadsheet",
+                                             sheet_name="Translations", plurals_sheet_name="Plurals",
+                                             api_endpoint=server.endpoint)
+
+            self.assertEqual(sheet_helper.get_values(start_at=1), [["key", "en", "pt"]])
+            self.assertEqual(sheet_helper.get_columns(columns=["A", "C"]),
+                             {"A": ["key", "test.example", "test.other"], "C": ["pt", "", "Outro"]})
+            self.assertEqual(sheet_helper.get_plurals_values(start_at=1), [["VARIABLE", "LANG", "ONE"]])
+
+        self.assertEqual(len(server.requests), 4)
+        self.assertIn("C1%3AC8", server.requests[2])
+
+    def test_retry_throttled_requests_from_api_endpoint(self):
+        with FakeSheetsServer({"mockSpreadsheet": {"Translations": [["key", "en"]]}}, throttle_every=2) as server:
+            request_scheduler = RequestScheduler(base_delay=0)
+            sheet_helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id="mockSpreadsheet",
+                                             sheet_name="Translations", request_scheduler=request_scheduler,
+                                             api_endpoint=server.endpoint)
+
+            self.assertEqual(sheet_helper.get_values(start_at=1), [["key", "en"]])
+
+        self.assertEqual(server.throttled, 1)
+        self.assertEqual(request_scheduler.retries, 1)
@@ -0,0 +1,37 @@
+import unittest
+
+from localisation.locales import LocaleResolver, canonical_locale, parse_locale_fallback
+
+
+class TestLocales(unittest.TestCase):
+
+    def test_canonical_locale(self):
+        self.assertEqual(canonical_locale("en"), "en")
+        self.assertEqual(canonical_locale("en-GB.lproj"), "en-GB")
+        self.assertEqual(canonical_locale("en_gb"), "en-GB")
+        self.assertEqual(canonical_locale("zh-hans"), "zh-Hans")
+        self.assertEqual(canonical_locale("zh_Hant_TW"), "zh-Hant-TW")
+        self.assertEqual(canonical_locale("es-419"), "es-419")
+        self.assertEqual(canonical_locale("English.lproj"), "en")
+        self.assertEqual(canonical_locale("Base.lproj"), "Base")
+
+    def test_parse_locale_fallback(self):
+        self.assertEqual(parse_locale_fallback("pt=pt-PT"), ("pt", "pt-PT"))
+        with self.assertRaises(ValueError):
+            parse_locale_fallback("pt")
+
+    def test_resolve_exact_locales(self):
+        lproj_dirs = {"en": ["en.lproj"], "en-GB": ["en-GB.lproj"], "pt-BR": ["pt-BR.lproj"]}
+        destinations = LocaleResolver().resolve(["en", "en_GB", "pt"], lproj_dirs)
+
+        # "en" isn't copied to en-GB.lproj, and "pt" has no lproj without a fallback
+        self.assertEqual(destinations, {"en": ["en.lproj"], "en_GB": ["en-GB.lproj"], "pt": []})
+
+    def test_resolve_fallbacks(self):
+        lproj_dirs = {"pt-PT": ["pt-PT.lproj"], "es": ["es.lproj"], "es-ES": ["es-ES.lproj"]}
+        resolver = LocaleResolver({"pt": "pt_PT", "es": "es-ES", "ja": "ja-JP"})
+
+        self.assertEqual(resolver.resolve(["pt", "es", "ja"], lproj_dirs),
+                         {"pt": ["pt-PT.lproj"], "es": ["es.lproj"], "ja": []})
+        # The fallback isn't used when its locale is generated too
+        self.assertEqual(resolver.resolve(["pt", "pt-PT"], lproj_dirs), {"pt": [], "pt-PT": ["pt-PT.lproj"]})
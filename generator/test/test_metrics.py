@@ -0,0 +1,45 @@
+import json
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from localisation.metrics import Metrics, RequestMetrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_stages_and_counters(self):
+        now = [0.0]
+        metrics = Metrics(clock=lambda: now[0])
+
+        for seconds in [1.5, 0.5]:
+            with metrics.stage("render"):
+                now[0] += seconds
+        metrics.add_stage("render.en", 0.25)
+        metrics.increment("bytes.written", 10)
+        metrics.increment("bytes.written", 5)
+        metrics.add_request(RequestMetrics(spreadsheet_id="id", sheet_name="Translations", request="values.get", seconds=0.1))
+
+        self.assertEqual(metrics.stages["render"].seconds, 2.0)
+        self.assertEqual(metrics.stages["render"].calls, 2)
+        self.assertEqual(metrics.counters["bytes.written"], 15)
+        # Only the top level stages
+        self.assertEqual(metrics.summary(), "render: 2.000s")
+
+        with TemporaryDirectory() as temp_dir:
+            metrics_path = path.join(temp_dir, "metrics", "run.json")
+            metrics.write_json(metrics_path)
+            with open(metrics_path) as f:
+                written = json.load(f)
+
+        self.assertEqual(written["stages"]["render.en"], {"seconds": 0.25, "calls": 1})
+        self.assertEqual(written["requests"][0]["request"], "values.get")
+        self.assertFalse(written["requests"][0]["cached"])
+        self.assertEqual(written["counters"], {"bytes.written": 15})
+
+    def test_stage_is_recorded_when_it_raises(self):
+        metrics = Metrics()
+        with self.assertRaises(ValueError):
+            with metrics.stage("fetch"):
+                raise ValueError()
+        self.assertEqual(metrics.stages["fetch"].calls, 1)
@@ -0,0 +1,232 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from os import path
+from typing import List
+from unittest.mock import patch
+
+from localisation import CHECKSUM_FILENAME, project_index
+from localisation.googlesheethelper import GoogleSheetHelper
+from localisation.metrics import Metrics
+from localisation.process_localisation import Localisation, FilepathKey
+from localisation.output.template_helper import TemplateGenerator
+from localisation.sources import SheetSource
+from test.fake_sheets_service import FakeSheetsService, fake_sheet_helper
+
+
+PLURALS = [
+    ["VARIABLE", "EXAMPLE", "LANG", "ONE", "OTHER"],
+    ["${x}", "You have ${x} things", "locale1", "one thing", "${x} things"],
+]
+
+
+def translations_sheet(locale_count: int):
+    """
+    Builds a Translations sheet with a comment column and `locale_count` locales.
+    """
+    locales = ["locale{}".format(index) for index in range(1, locale_count + 1)]
+    header = ["key - developer key", "- comments"] + locales
+    rows = [header,
+            ["test.example", "A comment"] + ["Example in {}".format(locale) for locale in locales],
+            ["test.plural", ""] + ["You have ${{x}} things in {}".format(locale) for locale in locales]]
+    return rows, locales
+
+
+def _make_project(project_dir: str, locales: List[str]):
+    """
+    Creates a project with every file the generator replaces, and an lproj for each of the locales.
+    """
+    files = ["translations.csv", "plurals.csv", CHECKSUM_FILENAME, "ProjectLocalizations.swift"]
+    for locale in locales:
+        files += [path.join("{}.lproj".format(locale), "Localizable.strings"),
+                  path.join("{}.lproj".format(locale), "Localizable.stringsdict")]
+    for file in files:
+        os.makedirs(path.dirname(path.join(project_dir, file)), exist_ok=True)
+        with open(path.join(project_dir, file), "w") as f:
+            f.write("")
+
+
+class TestProcessLocalisation(unittest.TestCase):
+
+    def test_localise_more_than_26_columns(self):
+        rows, locales = translations_sheet(locale_count=120)
+        sheet_helper, service = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+
+        with TemporaryDirectory() as temp_dir:
+            localisation = Localisation(sheet_helper, TemplateGenerator(), path.join(temp_dir, "output"), temp_dir)
+            paths = localisation.localise(skip_csv_generation=False)
+
+            self.assertEqual(sorted(paths[FilepathKey.strings].keys()), sorted(locales))
+            with open(paths[FilepathKey.strings]["locale120"]) as f:
+                self.assertIn('"test.example" = "Example in locale120";', f.read())
+
+        # One request for the grid properties, then one for the header row and one for all the columns of each sheet
+        self.assertEqual(service.executed_requests, 5)
+        self.assertIn("'Translations'!A1:DR1", service.requested_ranges)
+        self.assertIn("'Translations'!DR1:DR3", service.requested_ranges)
+        # The comments column isn't fetched
+        self.assertNotIn("'Translations'!B1:B3", service.requested_ranges)
+
+    def test_localise_skips_unchanged_spreadsheet(self):
+        rows, locales = translations_sheet(locale_count=2)
+        sheet_helper, service = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+
+        with TemporaryDirectory() as temp_dir:
+            output_dir = path.join(temp_dir, "output")
+            project_dir = path.join(temp_dir, "project")
+            _make_project(project_dir, locales)
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project")
+
+            # The files aren't skipped until they're copied to the project
+            self.assertIsNotNone(localisation.localise(skip_csv_generation=False))
+            paths = localisation.localise(skip_csv_generation=False)
+            self.assertIsNotNone(paths)
+            self.assertTrue(localisation.copy_files(paths))
+            self.assertIsNone(localisation.localise(skip_csv_generation=False))
+            self.assertIsNotNone(localisation.localise(skip_csv_generation=False, force=True))
+
+            # Editing a translation makes the next run generate the files again
+            service.spreadsheets_data["mockSpreadsheet"]["Translations"][1][2] = "Edited example"
+            paths = localisation.localise(skip_csv_generation=False)
+            self.assertIsNotNone(paths)
+            with open(paths[FilepathKey.strings]["locale1"]) as f:
+                self.assertIn('"test.example" = "Edited example";', f.read())
+            self.assertTrue(localisation.copy_files(paths))
+            self.assertIsNone(localisation.localise(skip_csv_generation=False))
+
+            # So does changing the options the files are generated with
+            self.assertIsNotNone(localisation.localise(skip_csv_generation=True))
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project", locale_fallbacks={"locale3": "locale1"})
+            self.assertIsNotNone(localisation.localise(skip_csv_generation=False))
+
+    def test_localise_regenerates_after_failed_copy(self):
+        rows, locales = translations_sheet(locale_count=2)
+        sheet_helper, _ = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+
+        with TemporaryDirectory() as temp_dir:
+            output_dir = path.join(temp_dir, "output")
+            project_dir = path.join(temp_dir, "project")
+            _make_project(project_dir, locales)
+            # The project has no enum to replace
+            os.remove(path.join(project_dir, "ProjectLocalizations.swift"))
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project")
+
+            paths = localisation.localise(skip_csv_generation=False)
+            self.assertFalse(localisation.copy_files(paths))
+            self.assertIsNotNone(localisation.localise(skip_csv_generation=False))
+
+    def test_copy_files_keeps_project_index_cached(self):
+        rows, locales = translations_sheet(locale_count=2)
+        sheet_helper, service = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+
+        with TemporaryDirectory() as temp_dir:
+            output_dir = path.join(temp_dir, "output")
+            project_dir = path.join(temp_dir, "project")
+            cache_dir = path.join(temp_dir, "cache")
+            _make_project(project_dir, locales)
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project", cache_dir=cache_dir)
+            self.assertTrue(localisation.copy_files(localisation.localise(skip_csv_generation=False)))
+
+            # The next run uses the cached index, even though the copy updated the project
+            service.spreadsheets_data["mockSpreadsheet"]["Translations"][1][2] = "Edited example"
+            with patch.object(project_index, "walk") as walk:
+                localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                            project_name="Project", cache_dir=cache_dir)
+                self.assertTrue(localisation.copy_files(localisation.localise(skip_csv_generation=False)))
+                walk.assert_not_called()
+            with open(path.join(project_dir, "locale1.lproj", "Localizable.strings")) as f:
+                self.assertIn('"test.example" = "Edited example";', f.read())
+
+    def test_copy_files_reports_locales_without_lproj(self):
+        rows, _ = translations_sheet(locale_count=2)
+        sheet_helper, _ = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+
+        with TemporaryDirectory() as temp_dir:
+            output_dir = path.join(temp_dir, "output")
+            project_dir = path.join(temp_dir, "project")
+            _make_project(project_dir, ["locale1", "locale2-PT"])
+            strings_path = path.join(project_dir, "locale2-PT.lproj", "Localizable.strings")
+
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project")
+            self.assertFalse(localisation.copy_files(localisation.localise(skip_csv_generation=False)))
+            self.assertEqual(path.getsize(strings_path), 0)
+
+            localisation = Localisation(sheet_helper, TemplateGenerator(), output_dir, project_dir,
+                                        project_name="Project", locale_fallbacks={"locale2": "locale2-PT"})
+            self.assertTrue(localisation.copy_files(localisation.localise(skip_csv_generation=False)))
+            with open(strings_path) as f:
+                self.assertIn('"test.example" = "Example in locale2";', f.read())
+
+    def test_localise_missing_worksheet(self):
+        rows, _ = translations_sheet(locale_count=1)
+        for sheets in [{"Translations": rows}, {"Translations": [["- comments"], ["A comment"]], "Plurals": PLURALS}]:
+            sheet_helper, _ = fake_sheet_helper(sheets)
+            with TemporaryDirectory() as temp_dir:
+                localisation = Localisation(sheet_helper, TemplateGenerator(), path.join(temp_dir, "output"), temp_dir)
+                with self.assertRaises(SystemExit):
+                    localisation.localise(skip_csv_generation=False)
+
+    def test_localise_doesnt_report_other_errors_as_missing_sheets(self):
+        rows, _ = translations_sheet(locale_count=1)
+        sheet_helper, _ = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS})
+        with TemporaryDirectory() as temp_dir:
+            localisation = Localisation(sheet_helper, TemplateGenerator(), path.join(temp_dir, "output"), temp_dir,
+                                        concurrent_fetch=True)
+            with patch.object(GoogleSheetHelper, "get_plurals_columns", side_effect=KeyError("bug")):
+                with self.assertRaises(KeyError):
+                    localisation.localise(skip_csv_generation=False)
+
+    def test_localise_multiple_sources(self):
+        service = FakeSheetsService({
+            "main": {"Translations": [["key", "en"], ["unused.key", "Unused"]], "Plurals": PLURALS},
+            "features": {"Login": [["key", "en", "pt"], ["login.title", "Login", "Entrar"], ["common.ok", "OK", "OK"]],
+                         "Settings": [["key", "en"], ["settings.title", "Settings"], ["common.ok", "Okay"]],
+                         "Notes": [["key", "en"], ["notes.title", "Notes"]]},
+            "others": {"Profile": [["key - developer key", "pt", "en"], ["profile.title", "Perfil", "Profile"]]},
+        })
+        sheet_helper = GoogleSheetHelper(scopes=[], credentials="", spreadsheet_id="main", sheet_name="Translations",
+                                         plurals_sheet_name="Plurals", service=service)
+        sources = [SheetSource(spreadsheet_id="features", worksheet_pattern="[LS]*"),
+                   SheetSource(spreadsheet_id="others", worksheet_pattern="*")]
+
+        with TemporaryDirectory() as temp_dir:
+            localisation = Localisation(sheet_helper, TemplateGenerator(), path.join(temp_dir, "output"), temp_dir,
+                                        sources=sources)
+            paths = localisation.localise(skip_csv_generation=False)
+
+            with open(paths[FilepathKey.strings]["en"]) as f:
+                strings = f.read()
+            with open(paths[FilepathKey.strings]["pt"]) as f:
+                pt_strings = f.read()
+
+        self.assertIn('"login.title" = "Login";', strings)
+        self.assertIn('"settings.title" = "Settings";', strings)
+        self.assertIn('"profile.title" = "Profile";', strings)
+        self.assertIn('"common.ok" = "OK";', strings)
+        self.assertNotIn('"common.ok" = "Okay";', strings)
+        self.assertNotIn("notes.title", strings)
+        self.assertNotIn("unused.key", strings)
+        self.assertIn('"profile.title" = "Perfil";', pt_strings)
+
+    def test_localise_records_metrics(self):
+        rows, locales = translations_sheet(locale_count=3)
+        metrics = Metrics()
+        sheet_helper, service = fake_sheet_helper({"Translations": rows, "Plurals": PLURALS}, metrics=metrics)
+
+        with TemporaryDirectory() as temp_dir:
+            localisation = Localisation(sheet_helper, TemplateGenerator(), path.join(temp_dir, "output"), temp_dir,
+                                        metrics=metrics)
+            localisation.localise(skip_csv_generation=False)
+
+        for stage in ["fetch", "validate", "parse", "render", "enums", "checksum"] + ["render." + locale for locale in locales]:
+            self.assertIn(stage, metrics.stages)
+        self.assertEqual(len(metrics.requests), service.executed_requests)
+        self.assertEqual(metrics.counters["rows.keys"], 2)
+        self.assertEqual(metrics.counters["languages"], 3)
+        self.assertEqual(metrics.counters["rows.written"], 6)
+        self.assertGreater(metrics.counters["bytes.written"], 0)
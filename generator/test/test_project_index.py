@@ -0,0 +1,108 @@
+import os
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from unittest.mock import patch
+
+from localisation import project_index
+from localisation.project_index import index_project, load_project_index, save_project_index
+from localisation.utils import copy_if_changed
+
+
+class TestProjectIndex(unittest.TestCase):
+
+    def __create_files(self, project_dir: str, *filepaths: str):
+        for filepath in filepaths:
+            filepath = path.join(project_dir, filepath)
+            os.makedirs(path.dirname(filepath), exist_ok=True)
+            open(filepath, "w").close()
+
+    def test_index_project(self):
+        with TemporaryDirectory() as project_dir:
+            self.__create_files(project_dir,
+                                "App/en.lproj/Localizable.strings",
+                                "App/en-GB.lproj/Localizable.strings",
+                                "App/en-GB.lproj/Localizable.stringsdict",
+                                "App/Resources.bundle/en.lproj/Localizable.strings",
+                                "App/Generated/AppLocalizations.swift",
+                                "App.xcworkspace/contents.xcworkspacedata",
+                                "Pods/Library/en.lproj/Localizable.strings",
+                                "DerivedData/Build/App.app/en.lproj/Localizable.strings",
+                                "Carthage/Library.framework/en.lproj/Localizable.strings",
+                                "build/translations.csv",
+                                ".git/translations.csv",
+                                "node_modules/module/translations.csv",
+                                "translations.csv")
+
+            index = index_project(project_dir)
+
+            self.assertEqual(index.workspace, "App.xcworkspace")
+            self.assertEqual(index.directories_with("translations.csv"), [project_dir])
+            self.assertEqual(index.directories_with("applocalizations.SWIFT", ignore_case=True),
+                             [path.join(project_dir, "App/Generated")])
+            self.assertEqual(index.directories_with("applocalizations.SWIFT"), [])
+
+            self.assertEqual(sorted(index.lproj_dirs.keys()), ["en", "en-GB"])
+            self.assertEqual([lproj_dir.path for lproj_dir in index.lproj_dirs["en"]],
+                             [path.join(project_dir, "App/en.lproj")])
+            self.assertEqual(index.lproj_dirs["en-GB"][0].files, {"Localizable.strings", "Localizable.stringsdict"})
+
+    def test_load_project_index_from_cache(self):
+        with TemporaryDirectory() as project_dir, TemporaryDirectory() as cache_dir:
+            self.__create_files(project_dir,
+                                "App/en.lproj/Localizable.strings",
+                                "App/AppLocalizations.swift",
+                                "App/Other.swift",
+                                "App.xcworkspace/contents.xcworkspacedata")
+            tracked = lambda filename: filename.endswith("Localizations.swift")
+
+            index = load_project_index(project_dir, cache_dir=cache_dir, tracked=tracked)
+            self.assertEqual(index.directories_with("Other.swift"), [])
+
+            with patch.object(project_index, "walk") as walk:
+                cached_index = load_project_index(project_dir, cache_dir=cache_dir, tracked=tracked)
+                walk.assert_not_called()
+            self.assertEqual(cached_index, index)
+
+            # A change to a recorded directory invalidates the cached index
+            self.__create_files(project_dir, "App/en.lproj/Localizable.stringsdict")
+            os.utime(path.join(project_dir, "App/en.lproj"), (0, 0))
+            index = load_project_index(project_dir, cache_dir=cache_dir, tracked=tracked)
+            self.assertEqual(index.lproj_dirs["en"][0].files, {"Localizable.strings", "Localizable.stringsdict"})
+
+    def test_new_lproj_invalidates_cached_index(self):
+        with TemporaryDirectory() as project_dir, TemporaryDirectory() as cache_dir:
+            self.__create_files(project_dir, "App/Resources/en.lproj/Localizable.strings")
+            os.utime(path.join(project_dir, "App/Resources"), (0, 0))
+            os.utime(path.join(project_dir, "App"), (0, 0))
+
+            index = load_project_index(project_dir, cache_dir=cache_dir)
+            self.assertEqual(sorted(index.lproj_dirs.keys()), ["en"])
+
+            # The parent of the lproj is the only directory that changes
+            self.__create_files(project_dir, "App/Resources/fr.lproj/Localizable.strings")
+            os.utime(path.join(project_dir, "App/Resources"), (1, 1))
+            index = load_project_index(project_dir, cache_dir=cache_dir)
+            self.assertEqual(sorted(index.lproj_dirs.keys()), ["en", "fr"])
+
+    def test_saved_index_is_used_after_copying(self):
+        with TemporaryDirectory() as project_dir, TemporaryDirectory() as cache_dir, \
+                TemporaryDirectory() as output_dir:
+            self.__create_files(project_dir, "App/en.lproj/Localizable.strings", "translations.csv")
+            self.__create_files(output_dir, "translations.csv", "Localizable.strings")
+            with open(path.join(output_dir, "translations.csv"), "w") as f:
+                f.write("key,en")
+            for directory in [project_dir, path.join(project_dir, "App"), path.join(project_dir, "App/en.lproj")]:
+                os.utime(directory, (0, 0))
+            index = load_project_index(project_dir, cache_dir=cache_dir)
+
+            # Replacing the files changes the modification times of their directories
+            copy_if_changed(path.join(output_dir, "translations.csv"), project_dir)
+            copy_if_changed(path.join(output_dir, "Localizable.strings"),
+                            path.join(project_dir, "App/en.lproj/Localizable.strings"))
+            save_project_index(project_dir, cache_dir, index)
+
+            with patch.object(project_index, "walk") as walk:
+                self.assertEqual(load_project_index(project_dir, cache_dir=cache_dir), index)
+                walk.assert_not_called()
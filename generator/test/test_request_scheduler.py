@@ -0,0 +1,124 @@
+import unittest
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from localisation.request_scheduler import RequestScheduler, TokenBucket
+
+
+class MockClock:
+    """
+    A clock that only moves forward when something sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(status: int, retry_after: str = None) -> HttpError:
+    response = httplib2.Response({"status": status})
+    if retry_after is not None:
+        response["retry-after"] = retry_after
+    return HttpError(response, b"{}")
+
+
+class FailingRequest:
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"values": []}
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_acquire_waits_for_tokens(self):
+        clock = MockClock()
+        bucket = TokenBucket(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+        clock.now += 10
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_capacity_allows_bursts(self):
+        clock = MockClock()
+        bucket = TokenBucket(requests_per_minute=60, capacity=3, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(requests_per_minute=0)
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = MockClock()
+
+    def scheduler(self, **kwargs) -> RequestScheduler:
+        return RequestScheduler(clock=self.clock, sleep=self.clock.sleep, jitter=lambda: 1.0, **kwargs)
+
+    def test_retries_with_exponential_backoff(self):
+        scheduler = self.scheduler(base_delay=1, max_delay=5)
+        request = FailingRequest([http_error(429), http_error(503), http_error(500), http_error(502)])
+
+        self.assertEqual(scheduler.execute(request), {"values": []})
+        self.assertEqual(request.calls, 5)
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 5])
+        self.assertEqual(scheduler.retries, 4)
+        self.assertEqual(scheduler.backoff_seconds, 12)
+        self.assertEqual(scheduler.waited_seconds, 12)
+
+    def test_retry_after_header(self):
+        scheduler = self.scheduler()
+        request = FailingRequest([http_error(429, retry_after="3")])
+
+        scheduler.execute(request)
+
+        self.assertEqual(self.clock.sleeps, [3])
+
+    def test_does_not_retry_client_errors(self):
+        scheduler = self.scheduler()
+        request = FailingRequest([http_error(403)])
+
+        with self.assertRaises(HttpError):
+            scheduler.execute(request)
+        self.assertEqual(request.calls, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_gives_up_after_max_retries(self):
+        scheduler = self.scheduler(max_retries=2)
+        request = FailingRequest([http_error(429)] * 3)
+
+        with self.assertRaises(HttpError):
+            scheduler.execute(request)
+        self.assertEqual(request.calls, 3)
+
+    def test_rate_limit(self):
+        scheduler = self.scheduler(requests_per_minute=30)
+
+        for _ in range(3):
+            scheduler.execute(FailingRequest([]))
+
+        self.assertEqual(scheduler.requests, 3)
+        self.assertAlmostEqual(scheduler.throttled_seconds, 4.0)
+        self.assertEqual(scheduler.backoff_seconds, 0)
@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from localisation.parser.sheet_parser import parse, parse_table, LocalisationRow, LocalisationTable, Argument
+
+
+class TestSheetParser(unittest.TestCase):
+
+    def test_parse(self):
+        validated_dicts = {
+            "en": {"test.example": "An example", "test.plural": "${x} in the plural and ${y}"},
+            "pt": {"test.plural": "${y} e ${x} no plural"},
+        }
+        plurals = {
+            "VARIABLE": ["${x}", "${y}", "${x}", "${y}"],
+            "LANG": ["en", "en", "pt", "pt"],
+            "ONE": ["one x", "one y", "um x", "um y"],
+            "OTHER": ["${x} xs", "${y} ys", "${x} xs", "${y} ys"],
+        }
+
+        en_x = Argument(replace_key="${x}", language="en", values={"one": "one x", "other": "${x} xs"})
+        en_y = Argument(replace_key="${y}", language="en", values={"one": "one y", "other": "${y} ys"})
+        pt_x = Argument(replace_key="${x}", language="pt", values={"one": "um x", "other": "${x} xs"})
+        pt_y = Argument(replace_key="${y}", language="pt", values={"one": "um y", "other": "${y} ys"})
+
+        self.assertEqual(parse(validated_dicts, plurals), [
+            LocalisationRow(key="test.example", language="en", translation="An example", arguments=[]),
+            LocalisationRow(key="test.plural", language="en", translation="${x} in the plural and ${y}", arguments=[en_x, en_y]),
+            LocalisationRow(key="test.plural", language="pt", translation="${y} e ${x} no plural", arguments=[pt_x, pt_y]),
+        ])
+
+    def test_parse_matches_substring_search(self):
+        """
+        The arguments found through the index are the same, and in the same order, as searching every argument
+        of the language in every translation.
+        """
+        generator = random.Random(7)
+        languages = ["en", "pt", "es"]
+        variables = ["${a}", "${b}", "${long_name}", "${a}", "__c__", "${d"]
+        plurals = {"VARIABLE": [], "LANG": [], "OTHER": []}
+        for _ in range(40):
+            plurals["VARIABLE"].append(generator.choice(variables))
+            plurals["LANG"].append(generator.choice(languages))
+            plurals["OTHER"].append("other")
+
+        fragments = variables + ["text", "${", "}", "${${a}}", "${a ${b}}", "$", " "]
+        validated_dicts = {language: {"key{}".format(index): "".join(generator.choice(fragments) for _ in range(6))
+                                      for index in range(100)}
+                           for language in languages}
+
+        rows = parse(validated_dicts, plurals)
+
+        arguments = [Argument(replace_key=key, language=language, values={"other": "other"})
+                     for key, language in zip(plurals["VARIABLE"], plurals["LANG"])]
+        for row in rows:
+            expected = [argument for argument in arguments
+                        if argument.replace_key in row.translation and argument.language == row.language]
+            self.assertEqual(row.arguments, expected, row.translation)
+
+    def test_parse_table(self):
+        validated_dicts = {
+            "en": {"test.example": "An example", "test.plural": "${x} items", "test.other": "${x} others"},
+            "pt": {"test.example": "Um exemplo", "test.plural": "${x} itens", "test.other": "${x} outros"},
+            "es": {"test.plural": "${x} cosas"},
+        }
+        plurals = {"VARIABLE": ["${x}", "${x}", "${x}"], "LANG": ["en", "pt", "es"], "OTHER": ["x", "x", "x"]}
+
+        table = parse_table(validated_dicts, plurals)
+
+        self.assertEqual(table.to_rows(), parse(validated_dicts, plurals))
+        self.assertEqual(len(table), 7)
+        self.assertEqual([row.key for row in table.columns["es"]], ["test.plural"])
+        # Languages with the same keys share them, and rows with the same plurals share their arguments
+        self.assertIs(table.columns["en"].keys, table.columns["pt"].keys)
+        self.assertIs(table.columns["en"].arguments[1], table.columns["en"].arguments[2])
+        self.assertNotIn(0, table.columns["en"].arguments)
+        self.assertEqual(LocalisationTable.of(table.to_rows()), table)
@@ -0,0 +1,89 @@
+import unittest
+from tempfile import TemporaryDirectory
+from os import listdir
+
+from localisation.snapshot_cache import SnapshotCache
+from test.fake_sheets_service import fake_sheet_helper
+
+
+class MockClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = TemporaryDirectory()
+        self.clock = MockClock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        super().tearDown()
+
+    def test_get_and_put(self):
+        cache = SnapshotCache(self.temp_dir.name, clock=self.clock)
+        self.assertIsNone(cache.get("sheetId", "Translations", "A:A"))
+
+        cache.put("sheetId", "Translations", "A:A", {"values": [["key"]]})
+
+        self.assertEqual(cache.get("sheetId", "Translations", "A:A"), {"values": [["key"]]})
+        self.assertIsNone(cache.get("sheetId", "Plurals", "A:A"))
+        self.assertIsNone(cache.get("anotherSheetId", "Translations", "A:A"))
+        self.assertIsNone(cache.get("sheetId", "Translations", "B:B"))
+
+    def test_max_age(self):
+        cache = SnapshotCache(self.temp_dir.name, max_age=60, clock=self.clock)
+        cache.put("sheetId", "Translations", "A:A", {"values": []})
+
+        self.clock.now += 60
+        self.assertEqual(cache.get("sheetId", "Translations", "A:A"), {"values": []})
+        self.clock.now += 1
+        self.assertIsNone(cache.get("sheetId", "Translations", "A:A"))
+        self.assertEqual(listdir(self.temp_dir.name), [])
+
+    def test_max_entries_evicts_least_recently_used(self):
+        cache = SnapshotCache(self.temp_dir.name, max_entries=2, clock=self.clock)
+        cache.put("sheetId", "Translations", "A:A", {"values": [["a"]]})
+        self.clock.now += 1
+        cache.put("sheetId", "Translations", "B:B", {"values": [["b"]]})
+        self.clock.now += 1
+        # Reading A:A makes B:B the least recently used
+        cache.get("sheetId", "Translations", "A:A")
+        self.clock.now += 1
+        cache.put("sheetId", "Translations", "C:C", {"values": [["c"]]})
+
+        self.assertIsNotNone(cache.get("sheetId", "Translations", "A:A"))
+        self.assertIsNone(cache.get("sheetId", "Translations", "B:B"))
+        self.assertIsNotNone(cache.get("sheetId", "Translations", "C:C"))
+
+    def test_max_bytes(self):
+        cache = SnapshotCache(self.temp_dir.name, max_bytes=1024, clock=self.clock)
+        cache.put("sheetId", "Translations", "A:A", {"values": [["a" * 600]]})
+        self.clock.now += 1
+        cache.put("sheetId", "Translations", "B:B", {"values": [["b" * 600]]})
+
+        self.assertIsNone(cache.get("sheetId", "Translations", "A:A"))
+        self.assertIsNotNone(cache.get("sheetId", "Translations", "B:B"))
+
+    def test_sheet_helper_uses_cache(self):
+        cache = SnapshotCache(self.temp_dir.name, max_age=60, clock=self.clock)
+        rows = [["key", "en"], ["test.example", "Example"]]
+
+        sheet_helper, service = fake_sheet_helper({"Translations": rows}, snapshot_cache=cache)
+        first_values = sheet_helper.get_columns(columns=["A", "B"])
+
+        # A new run, with the spreadsheet changed, gets the cached values while they're fresh
+        rows[1][1] = "Changed"
+        sheet_helper, service = fake_sheet_helper({"Translations": rows}, snapshot_cache=cache)
+        self.assertEqual(sheet_helper.get_columns(columns=["A", "B"]), first_values)
+        self.assertEqual(service.executed_requests, 0)
+
+        self.clock.now += 61
+        self.assertEqual(sheet_helper.get_columns(columns=["A", "B"]), {"A": ["key", "test.example"], "B": ["en", "Changed"]})
+        self.assertEqual(service.executed_requests, 1)
@@ -0,0 +1,50 @@
+import unittest
+
+from localisation.sources import SheetSource, KeyConflict, merge_localisations
+
+
+class TestSources(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(SheetSource.parse("abc123:Translations*"),
+                         SheetSource(spreadsheet_id="abc123", worksheet_pattern="Translations*"))
+        self.assertEqual(SheetSource.parse("abc123:Feature: Login"),
+                         SheetSource(spreadsheet_id="abc123", worksheet_pattern="Feature: Login"))
+        with self.assertRaises(ValueError):
+            SheetSource.parse("abc123")
+        with self.assertRaises(ValueError):
+            SheetSource.parse("abc123:")
+
+    def test_merge_localisations(self):
+        merge_result = merge_localisations([
+            ("sheet1/Login", {"key": ["login.title", "", "login.button"],
+                              "en": ["Login", "", "Go"],
+                              "pt": ["Entrar"]}),
+            ("sheet2/Settings", {"key": ["settings.title"],
+                                 "es": ["Ajustes"],
+                                 "en": ["Settings"]}),
+        ])
+
+        self.assertEqual(merge_result.result, {
+            "key": ["login.title", "", "login.button", "settings.title"],
+            "en": ["Login", "", "Go", "Settings"],
+            "pt": ["Entrar", "", "", ""],
+            "es": ["", "", "", "Ajustes"],
+        })
+        self.assertEqual(merge_result.conflicts, [])
+
+    def test_merge_conflicts(self):
+        merge_result = merge_localisations([
+            ("sheet1/Login", {"key": ["login.title", "login.title", "common.ok"], "en": ["Login", "Log in", "OK"]}),
+            ("sheet1/Common", {"key": ["common.ok", "common.cancel"], "en": ["Okay", "Cancel"]}),
+            ("sheet2/Settings", {"key": ["common.ok"], "en": ["Fine"]}),
+        ])
+
+        # Repeated keys in the same worksheet are kept for the validator to handle, like with a single worksheet
+        self.assertEqual(merge_result.result, {
+            "key": ["login.title", "login.title", "common.ok", "common.cancel"],
+            "en": ["Login", "Log in", "OK", "Cancel"],
+        })
+        self.assertEqual(merge_result.conflicts, [
+            KeyConflict(key="common.ok", origins=["sheet1/Login row 4", "sheet1/Common row 2", "sheet2/Settings row 2"])
+        ])
@@ -1,9 +1,10 @@
 import unittest
 from unittest.mock import patch
-from tempfile import gettempdir
+from tempfile import gettempdir, TemporaryDirectory
 from datetime import date
 from os import path, remove
 import filecmp
+from hashlib import sha1
 
 from localisation.output.stringsfile_builder import output_localisable_strings
 from localisation.output.template_helper import TemplateGenerator
@@ -42,7 +43,34 @@ class TestStringsfileBuilder(unittest.TestCase):
                 expected_file = f'./test/resources/strings/{language}.localizable.strings'
                 self.assertTrue(filecmp.cmp(filepath, expected_file))
                 remove(filepath)
- 
+
+    def test_output_localisable_strings_in_several_jobs(self):
+        generator = TemplateGenerator()
+        arguments = [
+            Argument(replace_key="__a__", language="en", values={"one": "one", "few": "few", "many": "many"}),
+        ]
+        localisations = []
+        for language in ["en", "pt", "es", "ja"]:
+            localisations += [
+                LocalisationRow(key="key", language=language, translation="A or b __a__", arguments=arguments),
+                LocalisationRow(key="key2", language=language, translation="A or b", arguments=[]),
+            ]
+
+        with TemporaryDirectory() as serial_dir, TemporaryDirectory() as parallel_dir:
+            serial_paths = output_localisable_strings(localisations, template_generator=generator,
+                                                      output_dir=serial_dir, project_name="TestName")
+            digests = {}
+            parallel_paths = output_localisable_strings(localisations, template_generator=generator,
+                                                        output_dir=parallel_dir, project_name="TestName", jobs=2,
+                                                        digests=digests)
+
+            for serial_files, parallel_files in zip(serial_paths, parallel_paths):
+                self.assertEqual(list(serial_files.keys()), list(parallel_files.keys()))
+                for language, filepath in serial_files.items():
+                    self.assertTrue(filecmp.cmp(filepath, parallel_files[language], shallow=False))
+                    with open(parallel_files[language], "rb") as f:
+                        self.assertEqual(digests[parallel_files[language]], sha1(f.read()).hexdigest())
+
     def __remove_comments_from_file(self, filename: str):
         with open(filename, "r+") as f:
             d = f.readlines()
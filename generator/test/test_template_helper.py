@@ -1,7 +1,17 @@
+import re
 import unittest
 from datetime import date
+from io import StringIO
+
+import pybars
 
 from localisation.output.template_helper import TemplateGenerator
+from localisation.parser.sheet_parser import LocalisationRow
+
+
+def _pinned_pybars_version() -> str:
+    with open("requirements.txt") as f:
+        return re.search(r"^pybars3==(\S+)$", f.read(), re.MULTILINE).group(1)
 
 
 class TestTemplateHelper(unittest.TestCase):
@@ -97,3 +107,58 @@ enum Enum3Localizable: Localizable {{
 
         self.maxDiff = None
         self.assertEqual(enums_file_str, mock.format(header=header))
+
+    @unittest.skipUnless(pybars.__version__ == _pinned_pybars_version(),
+                         "The emitters match the pybars version pinned in requirements.txt")
+    def test_emitters_match_pybars(self):
+        pybars_helper = TemplateGenerator(use_pybars=True)
+        # Characters pybars escapes, and values that aren't strings
+        names = ["", "Plain", "A & B", "\"quoted\" 'single' `tick`", "<tag attr='1'>", "&amp; already", "Ünïcødé ✓", "line\nbreak"]
+
+        for name in names:
+            self.assertEqual(self.__template_helper.generate_header(filename=name, project_name=name),
+                             pybars_helper.generate_header(filename=name, project_name=name))
+            self.assertEqual(self.__template_helper.generate_header(filename=name, project_name=None),
+                             pybars_helper.generate_header(filename=name, project_name=None))
+
+        cases = [{"case_name": name or "empty", "identifier_lint": index % 2 == 0} for index, name in enumerate(names)]
+        for enums in [[], [{"name": "NoCases", "namespace": "no.cases", "case": []}],
+                      [{"name": name, "enum_name_lint": index % 3 == 0, "namespace": name, "case": cases[index:]}
+                       for index, name in enumerate(names)]]:
+            self.assertEqual(self.__template_helper.generate_enums("File'name", "Project<Name>", enums),
+                             pybars_helper.generate_enums("File'name", "Project<Name>", enums))
+
+        variables = [{"variable_name": name,
+                      "plural_types": [{"plural_name": plural, "plural_value": "{} %d {}".format(plural, name)}
+                                       for plural in ["zero", "one", "other"][:index % 4]]}
+                     for index, name in enumerate(names)]
+        self.assertEqual(self.__template_helper.generate_variables([]), pybars_helper.generate_variables([]))
+        self.assertEqual(self.__template_helper.generate_variables(variables), pybars_helper.generate_variables(variables))
+
+        plurals = []
+        for name in names:
+            for variable_templates in [None, "", self.__template_helper.generate_variables(variables[:2])]:
+                plural = self.__template_helper.generate_plural(name, "%#@" + name + "@", variable_templates)
+                self.assertEqual(plural, pybars_helper.generate_plural(name, "%#@" + name + "@", variable_templates))
+                plurals.append(plural)
+
+        for plurals_in_file in [[], plurals[:1], plurals]:
+            self.assertEqual(self.__template_helper.generate_stringsdict(plurals_in_file, "A&B", "Project"),
+                             pybars_helper.generate_stringsdict(plurals_in_file, "A&B", "Project"))
+
+    def test_write_matches_generate(self):
+        rows = [LocalisationRow(key="key{}".format(index), language="en", translation="A ${b} \"c\"", arguments=[])
+                for index in range(3)]
+        plurals = [self.__template_helper.generate_plural("key{}".format(index), "%#@__b__@", None) for index in range(3)]
+
+        for template_helper in [self.__template_helper, TemplateGenerator(use_pybars=True)]:
+            for count in range(4):
+                strings = StringIO()
+                template_helper.write_strings(strings, iter(rows[:count]), "en.localizable.strings", "Project")
+                self.assertEqual(strings.getvalue(),
+                                 template_helper.generate_strings(rows[:count], "en.localizable.strings", "Project"))
+
+                stringsdict = StringIO()
+                template_helper.write_stringsdict(stringsdict, iter(plurals[:count]), "en.Localizable.stringsdict", "Project")
+                self.assertEqual(stringsdict.getvalue(),
+                                 template_helper.generate_stringsdict(plurals[:count], "en.Localizable.stringsdict", "Project"))
@@ -0,0 +1,67 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import httplib2
+
+from localisation.transport import CompressedHttp, SheetsTransport, TransportConfig
+
+
+class TestSheetsTransport(unittest.TestCase):
+
+    def test_connections_are_reused(self):
+        transport = SheetsTransport()
+
+        with transport.connection() as first:
+            pass
+        with transport.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+
+    def test_concurrent_requests_get_different_connections(self):
+        transport = SheetsTransport()
+
+        with transport.connection() as first:
+            with transport.connection() as second:
+                self.assertIsNot(first, second)
+
+    def test_max_idle_connections(self):
+        transport = SheetsTransport(TransportConfig(max_idle_connections=1))
+        used = []
+        barrier = threading.Barrier(3)
+
+        def request():
+            with transport.connection() as http:
+                used.append(http)
+                barrier.wait()
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(map(id, used))), 3)
+        with transport.connection() as http:
+            self.assertIn(http, used)
+            with transport.connection() as another_http:
+                self.assertNotIn(another_http, used)
+
+    def test_timeout_and_gzip(self):
+        transport = SheetsTransport(TransportConfig(timeout=5, gzip=True))
+        with transport.connection() as http:
+            self.assertIsInstance(http, CompressedHttp)
+            self.assertEqual(http.timeout, 5)
+
+        transport = SheetsTransport(TransportConfig(gzip=False))
+        with transport.connection() as http:
+            self.assertNotIsInstance(http, CompressedHttp)
+
+    def test_compressed_http_headers(self):
+        with patch.object(httplib2.Http, "request", return_value=(None, b"")) as request:
+            CompressedHttp().request("https://sheets.googleapis.com", headers={"user-agent": "google-api-python-client"})
+
+            headers = request.call_args[0][3]
+            self.assertEqual(headers["accept-encoding"], "gzip")
+            self.assertEqual(headers["user-agent"], "google-api-python-client (gzip)")
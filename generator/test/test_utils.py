@@ -0,0 +1,86 @@
+import os
+import unittest
+from hashlib import sha1
+from os import path
+from tempfile import TemporaryDirectory
+
+from localisation.utils import copy_if_changed, create_checksum, create_file
+
+
+class TestUtils(unittest.TestCase):
+
+    def test_create_file_keeps_unchanged_file(self):
+        with TemporaryDirectory() as output_dir:
+            with create_file(output_dir, "en/en.localizable.strings") as f:
+                f.write("\"key\" = \"value\";")
+            filepath = path.join(output_dir, "en/en.localizable.strings")
+            os.utime(filepath, (0, 0))
+
+            with create_file(output_dir, "en/en.localizable.strings") as f:
+                f.write("\"key\" = \"value\";")
+            self.assertFalse(f.changed)
+            self.assertEqual(path.getmtime(filepath), 0)
+
+            with create_file(output_dir, "en/en.localizable.strings") as f:
+                f.write("\"key\" = \"new value\";")
+            self.assertTrue(f.changed)
+            self.assertNotEqual(path.getmtime(filepath), 0)
+            with open(filepath) as written:
+                self.assertEqual(written.read(), "\"key\" = \"new value\";")
+            self.assertEqual(os.listdir(path.join(output_dir, "en")), ["en.localizable.strings"])
+
+    def test_create_file_leaves_file_on_error(self):
+        with TemporaryDirectory() as output_dir:
+            with create_file(output_dir, "file.txt") as f:
+                f.write("old")
+
+            with self.assertRaises(ValueError):
+                with create_file(output_dir, "file.txt") as f:
+                    f.write("new")
+                    raise ValueError()
+
+            with open(path.join(output_dir, "file.txt")) as written:
+                self.assertEqual(written.read(), "old")
+            self.assertEqual(os.listdir(output_dir), ["file.txt"])
+
+    def test_copy_if_changed(self):
+        with TemporaryDirectory() as source_dir, TemporaryDirectory() as project_dir:
+            source = path.join(source_dir, "translations.csv")
+            with open(source, "w") as f:
+                f.write("key,en\n")
+
+            self.assertTrue(copy_if_changed(source, project_dir))
+            destination = path.join(project_dir, "translations.csv")
+            os.utime(destination, (0, 0))
+            self.assertFalse(copy_if_changed(source, project_dir))
+            self.assertEqual(path.getmtime(destination), 0)
+
+            with open(source, "w") as f:
+                f.write("key,en,pt\n")
+            self.assertTrue(copy_if_changed(source, destination))
+            with open(destination) as copied:
+                self.assertEqual(copied.read(), "key,en,pt\n")
+
+    def test_create_file_hashes_written_content(self):
+        with TemporaryDirectory() as output_dir:
+            with create_file(output_dir, "ja.localizable.strings") as f:
+                f.write("\"key\" = \"日本語\";\n")
+                f.writelines(["\"key2\" = \"Ünïcødé\";\n", "\"key3\" = \"x\";"])
+
+            with open(f.name, "rb") as written:
+                self.assertEqual(f.hexdigest(), sha1(written.read()).hexdigest())
+
+    def test_create_checksum_uses_digests(self):
+        with TemporaryDirectory() as output_dir:
+            paths = {}
+            digests = {}
+            for language in ["en", "pt"]:
+                with create_file(output_dir, "{}.localizable.strings".format(language)) as f:
+                    f.write("\"key\" = \"{}\";".format(language))
+                paths[language] = f.name
+                digests[f.name] = f.hexdigest()
+
+            with open(create_checksum(".checksum", (paths, {}), output_dir)) as f:
+                read_checksum = f.read()
+            with open(create_checksum(".checksum", (paths, {}), output_dir, digests=digests)) as f:
+                self.assertEqual(f.read(), read_checksum)
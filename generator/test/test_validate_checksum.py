@@ -0,0 +1,90 @@
+import importlib.util
+import os
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from localisation import CHECKSUM_MANIFEST_FILENAME
+from localisation.utils import create_checksum, create_file
+
+spec = importlib.util.spec_from_file_location("validate_checksum", "./templates/validate_checksum.py")
+validate_checksum = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(validate_checksum)
+
+
+class TestValidateChecksum(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__temp_dir = TemporaryDirectory()
+        self.__output_dir = path.join(self.__temp_dir.name, "output")
+        self.__project_dir = path.join(self.__temp_dir.name, "project")
+        self.__stamp_path = path.join(self.__temp_dir.name, "stamp.json")
+
+        generated = {}
+        for filename in ["en.localizable.strings", "en.Localizable.stringsdict", "pt.localizable.strings",
+                         "en-GB.localizable.strings", "AppLocalizations.swift"]:
+            with create_file(self.__output_dir, filename) as f:
+                f.write("Contents of {}".format(filename))
+            generated[filename] = f.name
+
+        strings_paths = ({"en": generated["en.localizable.strings"], "pt": generated["pt.localizable.strings"],
+                          "en-GB": generated["en-GB.localizable.strings"]},
+                         {"en": generated["en.Localizable.stringsdict"]})
+        create_checksum(".checksum", strings_paths, self.__output_dir, enum_path=generated["AppLocalizations.swift"],
+                        locale_fallbacks={"pt": "pt-PT"})
+        self.__manifest_path = path.join(self.__output_dir, CHECKSUM_MANIFEST_FILENAME)
+
+        # Where copy_xcode_files would copy them
+        self.__copy(generated["en.localizable.strings"], "App/en.lproj/Localizable.strings")
+        self.__copy(generated["en.Localizable.stringsdict"], "App/en.lproj/Localizable.stringsdict")
+        self.__copy(generated["pt.localizable.strings"], "App/pt-PT.lproj/Localizable.strings")
+        self.__copy(generated["en-GB.localizable.strings"], "App/en_GB.lproj/Localizable.strings")
+        self.__copy(generated["AppLocalizations.swift"], "App/Generated/AppLocalizations.swift")
+        # Never checked
+        self.__write("App/Resources.bundle/en.lproj/Localizable.strings", "Edited")
+        self.__write("Pods/Library/en.lproj/Localizable.strings", "Edited")
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+        super().tearDown()
+
+    def __write(self, filepath: str, content: str):
+        filepath = path.join(self.__project_dir, filepath)
+        os.makedirs(path.dirname(filepath), exist_ok=True)
+        with open(filepath, "w") as f:
+            f.write(content)
+
+    def __copy(self, source: str, filepath: str):
+        with open(source) as f:
+            self.__write(filepath, f.read())
+
+    def __validate(self) -> bool:
+        return validate_checksum.validate(self.__project_dir, self.__manifest_path, self.__stamp_path, jobs=2)
+
+    def test_validate_generated_files(self):
+        self.assertTrue(self.__validate())
+
+    def test_validate_edited_files(self):
+        for filepath in ["App/en.lproj/Localizable.stringsdict", "App/pt-PT.lproj/Localizable.strings",
+                         "App/Generated/AppLocalizations.swift"]:
+            with open(path.join(self.__project_dir, filepath)) as f:
+                content = f.read()
+            self.__write(filepath, content + " edited")
+            self.assertFalse(self.__validate(), filepath)
+            self.__write(filepath, content)
+            self.assertTrue(self.__validate(), filepath)
+
+    def test_validate_skips_stamped_files(self):
+        self.assertTrue(self.__validate())
+
+        with patch.object(validate_checksum, "file_hash") as file_hash:
+            self.assertTrue(self.__validate())
+            file_hash.assert_not_called()
+
+    def test_validate_without_fallback_when_lproj_exists(self):
+        # Like the generator, pt isn't copied to pt-PT once the project has a pt lproj, even without the file
+        self.__write("App/pt.lproj/InfoPlist.strings", "Not generated")
+        self.__write("App/pt-PT.lproj/Localizable.strings", "Edited")
+        self.assertTrue(self.__validate())